@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+ANSI Processing Benchmark
+
+Measures the throughput of escape stripping, line splitting and the
+scrollback on a few kinds of synthetic terminal output, fed in PTY-sized
+chunks.
+
+Usage:
+    python benchmarks/ansi_benchmark.py [--megabytes 64] [--chunk 20480]
+"""
+import time
+import random
+import argparse
+from viloxtermjs.ansi import AnsiStripper, LineSplitter
+from viloxtermjs.scrollback import Scrollback
+
+
+def plain_log(size):
+    line = b"2024-05-01 12:00:00,123 INFO worker.build compiled module %d in 12ms\n"
+    return b"".join(line % i for i in range(size // len(line) + 1))[:size]
+
+
+def colored_listing(size):
+    entry = b"\x1b[0m\x1b[01;34mdirectory%d\x1b[0m  \x1b[01;32mscript%d.sh\x1b[0m  file%d.txt\r\n"
+    return b"".join(entry % (i, i, i) for i in range(size // len(entry) + 1))[:size]
+
+
+def progress_bars(size):
+    rng = random.Random(0)
+    frame = b"\r\x1b[2K\x1b[32m%3d%%\x1b[0m [%s%s] \x1b]0;building\x07"
+    out = []
+    total = 0
+    while total < size:
+        done = rng.randrange(40)
+        chunk = frame % (done * 100 // 40, b"#" * done, b" " * (40 - done))
+        out.append(chunk)
+        total += len(chunk)
+    return b"".join(out)[:size]
+
+
+WORKLOADS = {
+    "plain log": plain_log,
+    "colored listing": colored_listing,
+    "progress bars": progress_bars,
+}
+
+
+def throughput(consume, data, chunk):
+    chunks = [data[i:i + chunk] for i in range(0, len(data), chunk)]
+    start = time.perf_counter()
+    for piece in chunks:
+        consume(piece)
+    return len(data) / (time.perf_counter() - start) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs ANSI processing benchmark")
+    parser.add_argument("--megabytes", type=int, default=64)
+    parser.add_argument("--chunk", type=int, default=20 * 1024)
+    args = parser.parse_args()
+
+    size = args.megabytes * 1024 * 1024
+    print(f"{'workload':18} {'strip MB/s':>11} {'strip+split':>12} {'scrollback':>11}")
+    for name, make in WORKLOADS.items():
+        data = make(size)
+        strip = throughput(AnsiStripper().feed, data, args.chunk)
+        stripper, splitter = AnsiStripper(), LineSplitter()
+        split = throughput(lambda piece: splitter.feed(stripper.feed(piece)), data, args.chunk)
+        scrollback = throughput(Scrollback().feed, data, args.chunk)
+        print(f"{name:18} {strip:11.0f} {split:12.0f} {scrollback:11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Programmatic I/O Benchmark
+
+Measures how fast a session can be driven from Python without a browser:
+send()/wait_for() round trips per second against ``cat``, and bulk output
+throughput through an output callback. Bulk throughput is usually capped by
+the PTY itself, so the CPU time this process spends per MB is reported too.
+
+Usage:
+    python benchmarks/automation_benchmark.py [--round-trips 5000] [--megabytes 256]
+"""
+import time
+import argparse
+import threading
+from viloxtermjs.server import TerminalServer
+
+
+def round_trips(count):
+    server = TerminalServer(command='cat')
+    server.spawn()
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            server.send(b"%d\n" % i)
+            server.wait_for(b"\n%d\r\n" % i, timeout=10)
+        return count / (time.perf_counter() - start)
+    finally:
+        server.stop()
+
+
+def bulk_output(megabytes, scrollback_lines):
+    server = TerminalServer(command='sh', cmd_args=f"-c 'head -c {megabytes}M /dev/zero | tr \"\\\\0\" x'",
+                            scrollback_lines=scrollback_lines)
+    received = [0]
+    done = threading.Event()
+    server.add_output_callback(lambda chunk: received.__setitem__(0, received[0] + len(chunk)))
+    server.add_exit_callback(lambda code: done.set())
+    start, cpu_start = time.perf_counter(), time.process_time()
+    server.spawn()
+    done.wait(300)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+    server.stop()
+    megabytes = received[0] / 1e6
+    return megabytes / elapsed, cpu * 1000 / megabytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs programmatic I/O benchmark")
+    parser.add_argument("--round-trips", type=int, default=5000)
+    parser.add_argument("--megabytes", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"send/wait_for round trips: {round_trips(args.round_trips):8.0f} /s")
+    for scrollback_lines in (0, 10000):
+        rate, cpu = bulk_output(args.megabytes, scrollback_lines)
+        print(f"bulk output, scrollback {scrollback_lines:5}: {rate:6.0f} MB/s {cpu:6.2f} CPU ms/MB")
+
+
+if __name__ == "__main__":
+    main()
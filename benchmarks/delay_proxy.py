@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Artificial-Delay Proxy
+
+A TCP proxy that holds every chunk for a fixed delay in each direction, to
+try the terminal page over a slow link without leaving the machine.
+
+Usage:
+    python benchmarks/delay_proxy.py --target 127.0.0.1:PORT [--listen 8765] [--delay-ms 100]
+
+The round trip through the proxy is twice ``--delay-ms``.
+"""
+import time
+import asyncio
+import argparse
+import threading
+
+
+async def _pipe(reader, writer, delay):
+    # Chunks go into a queue stamped with their due time so order is kept
+    queue = asyncio.Queue()
+
+    async def forward():
+        while True:
+            due, data = await queue.get()
+            await asyncio.sleep(max(0, due - time.monotonic()))
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    sender = asyncio.ensure_future(forward())
+    try:
+        while True:
+            data = await reader.read(65536)
+            queue.put_nowait((time.monotonic() + delay, data))
+            if not data:
+                break
+    except ConnectionError:
+        queue.put_nowait((0, b""))
+    await sender
+
+
+async def serve(listen_port, target_host, target_port, delay, started=None):
+    async def handle(client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(target_host, target_port)
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(_pipe(client_reader, server_writer, delay),
+                             _pipe(server_reader, client_writer, delay),
+                             return_exceptions=True)
+
+    server = await asyncio.start_server(handle, "127.0.0.1", listen_port)
+    if started is not None:
+        started(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def start_in_thread(target_port, delay_ms, target_host="127.0.0.1"):
+    """Run a proxy on a free port in a daemon thread and return that port"""
+    ready = threading.Event()
+    port = []
+
+    def started(listen_port):
+        port.append(listen_port)
+        ready.set()
+
+    thread = threading.Thread(target=asyncio.run, daemon=True,
+                              args=(serve(0, target_host, target_port, delay_ms / 1000, started),))
+    thread.start()
+    ready.wait(5)
+    return port[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", required=True, help="host:port of the terminal server")
+    parser.add_argument("--listen", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=100, help="delay added in each direction")
+    args = parser.parse_args()
+
+    host, _, port = args.target.rpartition(":")
+    print(f"http://127.0.0.1:{args.listen}/ -> {args.target}, +{args.delay_ms:g} ms each way")
+    asyncio.run(serve(args.listen, host or "127.0.0.1", int(port), args.delay_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Typing Latency Benchmark
+
+Loads the terminal page through an artificial-delay proxy in a
+QWebEngineView, types into ``cat`` and reports how long each key takes to
+appear on screen, with and without predictive echo.
+
+Usage:
+    python benchmarks/echo_latency_benchmark.py [--delay-ms 100] [--keys 40]
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Types one key at a time and times it until the cursor moves past it
+MEASURE_SCRIPT = """
+(async () => {
+    const samples = [];
+    for (let i = 0; i < %d; i++) {
+        const column = term.buffer.active.cursorX;
+        const start = performance.now();
+        await new Promise((resolve) => {
+            const listener = term.onWriteParsed(() => {
+                if (term.buffer.active.cursorX > column) {
+                    listener.dispose();
+                    resolve();
+                }
+            });
+            term.input(String.fromCharCode(97 + i %% 26));
+        });
+        samples.push(performance.now() - start);
+        await new Promise((resolve) => setTimeout(resolve, 50));
+    }
+    samples.sort((a, b) => a - b);
+    window.echoResults = {
+        median_ms: samples[Math.floor(samples.length / 2)],
+        max_ms: samples[samples.length - 1],
+        stats: window.predictiveEcho ? window.predictiveEcho.stats : null,
+    };
+})();
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--delay-ms", type=float, default=100, help="delay added in each direction")
+    parser.add_argument("--keys", type=int, default=40, help="keys typed per run")
+    args = parser.parse_args()
+
+    from PySide6.QtCore import QTimer, QUrl
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtWebEngineWidgets import QWebEngineView
+    from viloxtermjs import TerminalServer
+    from delay_proxy import start_in_thread
+
+    app = QApplication(sys.argv)
+    view = QWebEngineView()
+    view.resize(1000, 700)
+    view.show()
+    runs = [False, True]
+    state = {}
+
+    def next_run():
+        if not runs:
+            app.quit()
+            return
+        predictive_echo = runs.pop(0)
+        server = TerminalServer(command='cat', predictive_echo=predictive_echo)
+        port = start_in_thread(server.start(), args.delay_ms)
+        state.update(server=server, predictive_echo=predictive_echo, started=False)
+        view.load(QUrl(f"http://127.0.0.1:{port}/"))
+
+    def on_results(results):
+        if not results:
+            return
+        state["server"].stop()
+        print(json.dumps(dict(results, predictive_echo=state["predictive_echo"],
+                              round_trip_ms=2 * args.delay_ms)))
+        next_run()
+
+    def poll():
+        if "server" not in state:
+            return
+        if not state["started"] and state["server"].child_pid:
+            state["started"] = True
+            view.page().runJavaScript(MEASURE_SCRIPT % args.keys)
+        elif state["started"]:
+            view.page().runJavaScript("window.echoResults", on_results)
+
+    timer = QTimer()
+    timer.timeout.connect(poll)
+    timer.start(500)
+    next_run()
+    app.exec()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Output Fairness Benchmark
+
+Types keys into ``cat`` in one session while other sessions in the same
+process flood their pages with ``yes``, and measures how long each echo
+takes to come back, with and without a shared OutputScheduler
+(scheduler=...). The pages are raw WebSocket clients in processes of
+their own, like a browser: the flooding ones read as fast as they can and
+acknowledge output like the page does, and keys are typed at 100 per
+second at most.
+
+Usage:
+    python benchmarks/fairness_benchmark.py [--floods 4] [--keys 300]
+"""
+import time
+import struct
+import argparse
+import threading
+import statistics
+import multiprocessing
+import simple_websocket
+from viloxtermjs.server import TerminalServer
+from viloxtermjs.scheduler import OutputScheduler
+
+
+def flood_reader(port, stop, counter, index):
+    """Read a flooding page's output and ack it in ACK_BYTES steps"""
+    ws = simple_websocket.Client.connect(f"ws://127.0.0.1:{port}/ws")
+    unacked = 0
+    try:
+        while not stop.is_set():
+            message = ws.receive(0.5)
+            if not message or message[0] != 0x10:
+                continue
+            counter[index] += len(message) - 1
+            unacked += len(message) - 1
+            if unacked >= TerminalServer.ACK_BYTES:
+                ws.send(b"\x02" + struct.pack(">I", unacked))
+                unacked = 0
+    except simple_websocket.ConnectionClosed:
+        pass
+    finally:
+        ws.close()
+
+
+def flood_pages(ports, stop, counter):
+    """Run one flood_reader per port, standing in for the browser"""
+    readers = [threading.Thread(target=flood_reader, args=(port, stop, counter, index))
+               for index, port in enumerate(ports)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+
+
+def type_keys(port, keys, results):
+    """Type ``keys`` keys at typing speed and report each echo time in ms"""
+    ws = simple_websocket.Client.connect(f"ws://127.0.0.1:{port}/ws")
+    samples = []
+    try:
+        for i in range(keys):
+            key = "abcdefghijklmnopqrstuvwxyz"[i % 26].encode()
+            start = time.perf_counter()
+            ws.send(b"\x00" + key)
+            while True:
+                message = ws.receive(10)
+                if message is None:
+                    raise TimeoutError("no echo within 10 s")
+                if message[0] == 0x10 and key in message:
+                    break
+            samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+    finally:
+        ws.close()
+        results.put(samples)
+
+
+def measure(floods, keys, scheduler):
+    options = {"transport": "websocket", "scheduler": scheduler}
+    flooders = [TerminalServer(command='yes', **options) for _ in range(floods)]
+    typed = TerminalServer(command='cat', **options)
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    counter = context.Array("q", floods, lock=False)
+    results = context.Queue()
+    pages = context.Process(target=flood_pages,
+                            args=([server.start() for server in flooders], stop, counter))
+    pages.start()
+    try:
+        # Let the floods get going
+        time.sleep(1.0)
+        flooded = sum(counter)
+        start = time.perf_counter()
+        typist = context.Process(target=type_keys, args=(typed.start(), keys, results))
+        typist.start()
+        samples = results.get(timeout=keys * 10)
+        throughput = (sum(counter) - flooded) / (time.perf_counter() - start) / 2**20
+        typist.join(5)
+    finally:
+        stop.set()
+        pages.join(5)
+        for server in flooders + [typed]:
+            server.stop()
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], samples[-1], throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs output fairness benchmark")
+    parser.add_argument("--floods", type=int, default=4, help="sessions running yes")
+    parser.add_argument("--keys", type=int, default=300, help="keys typed per run")
+    parser.add_argument("--quantum", type=int, default=OutputScheduler().quantum,
+                        help="scheduler quantum in bytes")
+    args = parser.parse_args()
+
+    print(f"{args.floods} sessions flooding, {args.keys} keys typed into another one")
+    for label, scheduler in (("unscheduled", None), ("scheduled", OutputScheduler(args.quantum))):
+        median, p99, worst, throughput = measure(args.floods, args.keys, scheduler)
+        print(f"{label:>11}: echo median {median:6.2f} ms, p99 {p99:6.2f} ms, max {worst:6.2f} ms; "
+              f"floods {throughput:6.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
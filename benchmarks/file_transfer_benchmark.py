@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+File Transfer Benchmark
+
+Uploads and downloads a file through the /files endpoint of a session
+(file_transfer=True) and reports the throughput next to a plain disk copy,
+and next to pasting the same bytes into ``cat > file`` through the PTY.
+
+Usage:
+    python benchmarks/file_transfer_benchmark.py [--megabytes 1024] [--paste-megabytes 16]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import http.client
+from urllib.parse import quote
+from viloxtermjs.server import TerminalServer
+from viloxtermjs.filetransfer import CHUNK_BYTES, session_cwd
+
+
+def wait_for_cwd(server, directory):
+    while session_cwd(server.child_pid) != directory:
+        time.sleep(0.01)
+
+
+def upload(port, token, source, name):
+    connection = http.client.HTTPConnection("127.0.0.1", port, blocksize=CHUNK_BYTES)
+    with open(source, "rb") as f:
+        connection.request("PUT", f"/files?name={quote(name)}", body=f, headers={
+            "X-Viloxterm-Token": token, "Content-Length": str(os.path.getsize(source))})
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 201, response.status
+
+
+def download(port, token, name, destination):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", f"/files?name={quote(name)}&token={token}")
+    response = connection.getresponse()
+    with open(destination, "wb") as f:
+        while True:
+            chunk = response.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            f.write(chunk)
+
+
+def paste(directory, megabytes):
+    """Push bytes through the PTY into ``cat``, the way a paste travels"""
+    server = TerminalServer(command='sh', cmd_args=f"-c 'cd {directory} && stty raw -echo && exec cat > pasted'")
+    server.spawn()
+    wait_for_cwd(server, directory)
+    time.sleep(0.2)
+    # Hex text, since a paste has to stay clear of control characters
+    block = os.urandom(CHUNK_BYTES // 2).hex().encode()
+    start = time.perf_counter()
+    for _ in range(megabytes):
+        server.send(block)
+    path = os.path.join(directory, "pasted")
+    while os.path.getsize(path) < megabytes * CHUNK_BYTES:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    server.stop()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs file transfer benchmark")
+    parser.add_argument("--megabytes", type=int, default=1024, help="size of the transferred file")
+    parser.add_argument("--paste-megabytes", type=int, default=16, help="bytes pushed through the PTY")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.bin")
+        with open(source, "wb") as f:
+            for _ in range(args.megabytes):
+                f.write(os.urandom(CHUNK_BYTES))
+        session_dir = os.path.join(directory, "session")
+        os.mkdir(session_dir)
+        mib = args.megabytes
+
+        start = time.perf_counter()
+        shutil.copyfile(source, os.path.join(directory, "copy.bin"))
+        print(f"  disk copy: {mib / (time.perf_counter() - start):7.1f} MiB/s")
+
+        server = TerminalServer(command='sh', cmd_args=f"-c 'cd {session_dir} && exec cat'",
+                                file_transfer=True)
+        port = server.start()
+        server.spawn()
+        wait_for_cwd(server, session_dir)
+        try:
+            start = time.perf_counter()
+            upload(port, server.file_token, source, "uploaded.bin")
+            print(f"     upload: {mib / (time.perf_counter() - start):7.1f} MiB/s")
+            start = time.perf_counter()
+            download(port, server.file_token, "uploaded.bin", os.path.join(directory, "downloaded.bin"))
+            print(f"   download: {mib / (time.perf_counter() - start):7.1f} MiB/s")
+        finally:
+            server.stop()
+
+        elapsed = paste(session_dir, args.paste_megabytes)
+        print(f"PTY (paste): {args.paste_megabytes / elapsed:7.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
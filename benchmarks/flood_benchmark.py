@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Output Flood Benchmark
+
+Floods a session with scrolling output and reports how long the command
+takes to finish and how many bytes a viewer has to parse, with and without
+frame_rate. The viewer stands in for a browser: it takes len(batch) /
+--parse-mbps seconds per batch before acknowledging it, so flow control
+slows the PTY down just like a real page would.
+
+Usage:
+    python benchmarks/flood_benchmark.py [--megabytes 64] [--parse-mbps 30]
+"""
+import time
+import argparse
+import threading
+from viloxtermjs.server import TerminalServer
+
+
+def flood(megabytes, parse_mbps, frame_rate):
+    server = TerminalServer(command='sh', frame_rate=frame_rate,
+                            cmd_args=f"-c 'head -c {megabytes}M /dev/zero | base64'")
+    parsed = [0, 0]
+    exited = threading.Event()
+
+    def send(data):
+        time.sleep(len(data) / (parse_mbps * 1e6))
+        parsed[0] += len(data)
+        parsed[1] += 1
+        viewer.acknowledge(len(data))
+
+    viewer = server.add_viewer(send)
+    server.add_exit_callback(lambda code: exited.set())
+    start = time.perf_counter()
+    server.spawn()
+    exited.wait(600)
+    elapsed = time.perf_counter() - start
+    server.stop()
+    return elapsed, server.output_bytes / 1e6, parsed[0] / 1e6, parsed[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs output flood benchmark")
+    parser.add_argument("--megabytes", type=int, default=64, help="input to base64, output is 4/3 of it")
+    parser.add_argument("--parse-mbps", type=float, default=30, help="simulated browser parse speed")
+    args = parser.parse_args()
+
+    for frame_rate in (None, 30, 60):
+        elapsed, output, parsed, batches = flood(args.megabytes, args.parse_mbps, frame_rate)
+        label = f"{frame_rate} fps" if frame_rate else "raw stream"
+        print(f"{label:>10}: command done in {elapsed:6.2f} s, {output:7.1f} MB output, "
+              f"{parsed:7.2f} MB in {batches} batches to the viewer")
+
+
+if __name__ == "__main__":
+    main()
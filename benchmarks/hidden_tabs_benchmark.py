@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Hidden Tabs Benchmark
+
+Runs several busy sessions, like background tabs tailing logs, and reports
+how many bytes and batches reach their viewers when every session is
+visible and when only one is. Each viewer stands in for a page: it takes
+len(batch) / --parse-mbps seconds per batch, which is counted as render
+time.
+
+Usage:
+    python benchmarks/hidden_tabs_benchmark.py [--sessions 8] [--seconds 5]
+"""
+import time
+import argparse
+from viloxtermjs.server import TerminalServer
+
+COMMAND = "-c 'while :; do date; ls -l /usr/bin | head -n 20; sleep 0.01; done'"
+
+
+def attach(server, parse_mbps, total):
+    """Add a viewer that parses at ``parse_mbps`` and counts into ``total``"""
+    def send(data):
+        cost = len(data) / (parse_mbps * 1e6)
+        time.sleep(cost)
+        total[0] += len(data)
+        total[1] += 1
+        total[2] += cost
+        viewer.acknowledge(len(data))
+
+    viewer = server.add_viewer(send)
+
+
+def run(sessions, seconds, parse_mbps, visible):
+    servers, totals = [], []
+    for index in range(sessions):
+        server = TerminalServer(command='sh', cmd_args=COMMAND)
+        server.set_visible(index < visible)
+        total = [0, 0, 0.0]
+        attach(server, parse_mbps, total)
+        server.spawn()
+        servers.append(server)
+        totals.append(total)
+    time.sleep(seconds)
+    output = sum(server.output_bytes for server in servers)
+    for server in servers:
+        server.stop()
+    sent = sum(total[0] for total in totals)
+    batches = sum(total[1] for total in totals)
+    render = sum(total[2] for total in totals)
+    return output / 1e6, sent / 1e6, batches, render
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs hidden tabs benchmark")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--parse-mbps", type=float, default=30, help="simulated browser parse speed")
+    args = parser.parse_args()
+
+    for visible in (args.sessions, 1):
+        output, sent, batches, render = run(args.sessions, args.seconds, args.parse_mbps, visible)
+        print(f"{visible:>2}/{args.sessions} visible: {output:6.1f} MB output, {sent:6.2f} MB in "
+              f"{batches} batches to viewers, {render:5.2f} s simulated render time")
+
+
+if __name__ == "__main__":
+    main()
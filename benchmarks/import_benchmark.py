@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Import Time Benchmark
+
+Measures how long importing viloxtermjs takes in a fresh interpreter, and
+which heavy dependencies each import pulls in.
+
+Usage:
+    python benchmarks/import_benchmark.py [--runs 10]
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+STATEMENTS = [
+    "import viloxtermjs",
+    "from viloxtermjs import TerminalServer",
+    "from viloxtermjs import TerminalWidget",
+]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = [name for name in ('PySide6', 'flask', 'flask_socketio') if name in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'loaded': heavy}}))
+"""
+
+
+def measure(statement, runs):
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement)],
+            capture_output=True, text=True, check=True,
+        )
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(sample["seconds"])
+        loaded = sample["loaded"]
+    return statistics.median(timings), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs import time benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for statement in STATEMENTS:
+        try:
+            seconds, loaded = measure(statement, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{statement:45} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{statement:45} {seconds * 1000:8.1f} ms  loads: {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
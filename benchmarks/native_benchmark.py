@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Widget Startup and Memory Benchmark
+
+Opens terminals with TerminalWidget (QtWebEngine) or NativeTerminalWidget
+(QPainter) and reports the time until each shows its first output, plus
+the resident memory of the process and every process it started (shells
+and Chromium helpers included). Each kind runs in a fresh process.
+
+Usage:
+    python benchmarks/native_benchmark.py [--count 5] [--widgets native,web]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+
+def tree_rss_mb(pid):
+    """Resident memory of ``pid`` and all its descendants, from /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, ()))
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            pass
+    return total / 1e6
+
+
+def run(kind, count, command):
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    start = time.perf_counter()
+    if kind == "native":
+        from viloxtermjs.native import NativeTerminalWidget
+        widgets = [NativeTerminalWidget(command) for _ in range(count)]
+        ready = lambda: all(any(line.strip() for line in w._screen.display) for w in widgets)
+    else:
+        from viloxtermjs.widget import TerminalWidget
+        widgets = [TerminalWidget(command) for _ in range(count)]
+        loaded = []
+        for widget in widgets:
+            widget.web_view.loadFinished.connect(loaded.append)
+        ready = lambda: len(loaded) == count
+    for widget in widgets:
+        widget.show()
+    while not ready() and time.perf_counter() - start < 60:
+        app.processEvents()
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    time.sleep(1)
+    app.processEvents()
+    result = {"widget": kind, "count": count, "ready_s": round(elapsed, 3),
+              "rss_mb": round(tree_rss_mb(os.getpid()), 1)}
+    for widget in widgets:
+        widget.close_terminal()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=5, help="terminals opened at once")
+    parser.add_argument("--widgets", default="native,web")
+    parser.add_argument("--command", default="bash", help="command run in each terminal")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, args.count, args.command)
+        return
+    for kind in args.widgets.split(","):
+        subprocess.run([sys.executable, __file__, "--run", kind, "--count", str(args.count),
+                        "--command", args.command])
+
+
+if __name__ == "__main__":
+    main()
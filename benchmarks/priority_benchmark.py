@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Foreground Latency under Background Load Benchmark
+
+Starts hidden sessions that keep the CPU busy, like builds in background
+tabs, and a focused session running ``cat`` on a raw terminal, so every
+key has to be read and written back by a scheduled process. Reports the
+echo latency of the focused session with every session at the same
+priority and with the default PriorityPolicy.
+
+Usage:
+    python benchmarks/priority_benchmark.py [--background 4] [--keys 200]
+"""
+import time
+import argparse
+import statistics
+from viloxtermjs.server import TerminalServer
+from viloxtermjs.priority import PriorityPolicy
+
+BUSY = "-c 'while :; do :; done'"
+RAW_CAT = "-c 'stty raw -echo; exec cat'"
+
+
+def measure(background, keys, policy):
+    busy = []
+    for _ in range(background):
+        server = TerminalServer(command='sh', cmd_args=BUSY, priority=policy)
+        server.spawn()
+        server.set_visible(False)
+        busy.append(server)
+    foreground = TerminalServer(command='sh', cmd_args=RAW_CAT, priority=policy)
+    foreground.spawn()
+    foreground.set_focused(True)
+    time.sleep(1)
+    samples = []
+    try:
+        for i in range(keys):
+            key = "abcdefghijklmnopqrstuvwxyz"[i % 26]
+            start = time.perf_counter()
+            foreground.send(key)
+            foreground.wait_for(key, timeout=10)
+            samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.02)
+    finally:
+        foreground.stop()
+        for server in busy:
+            server.stop()
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], samples[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs foreground latency benchmark")
+    parser.add_argument("--background", type=int, default=4, help="busy hidden sessions")
+    parser.add_argument("--keys", type=int, default=200, help="keys typed into the focused session")
+    args = parser.parse_args()
+
+    for label, policy in (("same priority", None), ("PriorityPolicy", PriorityPolicy())):
+        median, p99, worst = measure(args.background, args.keys, policy)
+        print(f"{label:>14}: echo median {median:6.2f} ms, p99 {p99:6.2f} ms, max {worst:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
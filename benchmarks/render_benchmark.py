@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Render Throughput Benchmark
+
+Loads the TerminalServer benchmark page in a QWebEngineView and reports
+bytes/s and frames/s for each xterm.js renderer.
+
+Usage:
+    python benchmarks/render_benchmark.py [--mb 8] [--renderers webgl,canvas,dom] [--gpu]
+
+Pass --gpu to skip the software-rendering defaults so WebGL runs on the GPU.
+"""
+import os
+import sys
+import json
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=float, default=8, help="megabytes written per renderer")
+    parser.add_argument("--renderers", default="webgl,canvas,dom")
+    parser.add_argument("--gpu", action="store_true", help="allow GPU rendering in QtWebEngine")
+    args = parser.parse_args()
+
+    if args.gpu:
+        os.environ["VILOXTERMJS_GPU"] = "1"
+
+    from PySide6.QtCore import QTimer, QUrl
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtWebEngineWidgets import QWebEngineView
+    from viloxtermjs import TerminalServer
+
+    app = QApplication(sys.argv)
+    server = TerminalServer()
+    port = server.start()
+
+    view = QWebEngineView()
+    view.resize(1000, 700)
+    view.load(QUrl(f"http://127.0.0.1:{port}/benchmark?mb={args.mb}&renderers={args.renderers}"))
+    view.show()
+
+    def on_results(results):
+        if not results:
+            return
+        timer.stop()
+        for result in results:
+            print(json.dumps(result))
+        server.stop()
+        app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(lambda: view.page().runJavaScript("window.benchmarkResults", on_results))
+    timer.start(500)
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Session Spawn Benchmark
+
+Grows this process to --ballast-mb of resident memory, starts --threads
+busy threads like a GUI application has, then opens sessions with
+pty.fork() from this process and through the zygote. Reports how long
+spawn() blocks the caller and how long until the command's first output.
+
+Usage:
+    python benchmarks/spawn_benchmark.py [--ballast-mb 1024] [--threads 8] [--count 20]
+"""
+import os
+import time
+import argparse
+import threading
+import statistics
+from viloxtermjs.server import TerminalServer
+from viloxtermjs.zygote import ZygoteClient
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def measure(count, zygote):
+    spawn_ms, ready_ms = [], []
+    for _ in range(count):
+        server = TerminalServer(command='sh', cmd_args="-c 'echo ready; exec cat'", zygote=zygote)
+        start = time.perf_counter()
+        server.spawn()
+        spawn_ms.append((time.perf_counter() - start) * 1000)
+        server.wait_for("ready", timeout=10)
+        ready_ms.append((time.perf_counter() - start) * 1000)
+        server.stop()
+    return statistics.median(spawn_ms), max(spawn_ms), statistics.median(ready_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs session spawn benchmark")
+    parser.add_argument("--ballast-mb", type=int, default=1024, help="resident memory to add")
+    parser.add_argument("--threads", type=int, default=8, help="busy threads in this process")
+    parser.add_argument("--count", type=int, default=20, help="sessions opened per method")
+    args = parser.parse_args()
+
+    # Started while this process is still small, as an application would
+    zygote = ZygoteClient()
+    ballast = bytearray(args.ballast_mb * 1024 * 1024)
+    # Touch every page so it is resident
+    ballast[::4096] = b"x" * len(range(0, len(ballast), 4096))
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            sum(range(1000))
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=busy, daemon=True) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    print(f"host process: {rss_mb():.0f} MB resident, {threading.active_count()} threads")
+    try:
+        for label, method in (("pty.fork()", None), ("zygote", zygote)):
+            spawn, worst, ready = measure(args.count, method)
+            print(f"{label:>10}: spawn() median {spawn:6.2f} ms, max {worst:6.2f} ms, "
+                  f"first output after {ready:6.2f} ms")
+    finally:
+        stop.set()
+        zygote.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Page Transport Benchmark
+
+Compares socket.io with the raw WebSocket protocol (transport='websocket')
+for what the terminal page does: connecting, typing a key into ``cat`` and
+waiting for its echo. The socket.io client follows the browser client's
+steps (polling handshake, namespace connect, upgrade to a WebSocket), and
+the wire size counts WebSocket frame headers and masks.
+
+Usage:
+    python benchmarks/transport_benchmark.py [--keys 500]
+"""
+import json
+import time
+import argparse
+import statistics
+import urllib.request
+import simple_websocket
+from viloxtermjs.server import TerminalServer
+
+
+def wire_size(message, from_client):
+    """Bytes a WebSocket message takes on the wire, frame header included"""
+    size = len(message.encode() if isinstance(message, str) else message)
+    header = 2 if size < 126 else 4 if size < 65536 else 10
+    return size + header + (4 if from_client else 0)
+
+
+class RawClient:
+    def __init__(self, port):
+        self.ws = simple_websocket.Client.connect(f"ws://127.0.0.1:{port}/ws")
+        self.wire = 0
+
+    def type_key(self, key):
+        message = b"\x00" + key.encode()
+        self.wire += wire_size(message, True)
+        self.ws.send(message)
+        while True:
+            message = self.ws.receive(10)
+            self.wire += wire_size(message, False)
+            if message[0] == 0x10 and key.encode() in message:
+                return
+
+    def close(self):
+        self.ws.close()
+
+
+class SocketIOClient:
+    def __init__(self, port):
+        base = f"http://127.0.0.1:{port}/socket.io/?EIO=4&transport=polling"
+        with urllib.request.urlopen(base) as response:
+            sid = json.loads(response.read()[1:])["sid"]
+        polling = f"{base}&sid={sid}"
+        urllib.request.urlopen(urllib.request.Request(
+            polling, data=b'40/pty,{"readOnly":false}', method="POST")).read()
+        while b"40/pty," not in urllib.request.urlopen(polling).read():
+            pass
+        self.ws = simple_websocket.Client.connect(
+            f"ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket&sid={sid}")
+        self.ws.send("2probe")
+        assert self.ws.receive(10) == "3probe"
+        self.ws.send("5")
+        self.wire = 0
+
+    def type_key(self, key):
+        message = "42/pty," + json.dumps(["pty-input", {"input": key}])
+        self.wire += wire_size(message, True)
+        self.ws.send(message)
+        while True:
+            message = self.ws.receive(10)
+            self.wire += wire_size(message, False)
+            if message == "2":
+                self.ws.send("3")
+            elif isinstance(message, bytes) and key.encode() in message:
+                return
+
+    def close(self):
+        self.ws.close()
+
+
+def measure(client_class, keys):
+    server = TerminalServer(command='cat')
+    port = server.start()
+    start = time.perf_counter()
+    client = client_class(port)
+    connect_ms = (time.perf_counter() - start) * 1000
+    samples = []
+    try:
+        for i in range(keys):
+            key = "abcdefghijklmnopqrstuvwxyz"[i % 26]
+            start = time.perf_counter()
+            client.type_key(key)
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        client.close()
+        server.stop()
+    samples.sort()
+    return connect_ms, client.wire / keys, statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs page transport benchmark")
+    parser.add_argument("--keys", type=int, default=500, help="keys typed per transport")
+    args = parser.parse_args()
+
+    for label, client_class in (("socket.io", SocketIOClient), ("raw WebSocket", RawClient)):
+        connect_ms, wire, median, p99 = measure(client_class, args.keys)
+        print(f"{label:>13}: connect {connect_ms:6.2f} ms, {wire:5.1f} bytes on the wire per key, "
+              f"echo median {median:5.2f} ms, p99 {p99:5.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,9 @@ setup(
         "simple-websocket>=1.0.0",
     ],
     extras_require={
+        "native": [
+            "pyte>=0.8.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
@@ -0,0 +1,77 @@
+"""
+Tests for the bytes-level ANSI stripping and line splitting
+"""
+from viloxtermjs.ansi import strip_ansi, AnsiStripper, LineSplitter
+
+
+class TestStripAnsi:
+    """Test suite for strip_ansi and AnsiStripper"""
+
+    def test_strips_sequences_and_controls(self):
+        """Test CSI, OSC, DCS, short escapes and C0 controls are removed"""
+        data = (b"\x1b[1;31mred\x1b[0m \x1b]0;title\x07ok\x1bP1$r\x1b\\ "
+                b"\x1b(Bdone\r\n\ttab\x08\x7f")
+
+        assert strip_ansi(data) == b"red ok done\n\ttab"
+
+    def test_plain_text_unchanged(self):
+        """Test text without escapes passes through"""
+        assert strip_ansi("héllo wörld\n".encode()) == "héllo wörld\n".encode()
+
+    def test_split_escape_is_carried(self):
+        """Test an escape split across chunks is stripped once complete"""
+        stripper = AnsiStripper()
+
+        assert stripper.feed(b"one\x1b[3") == b"one"
+        assert stripper.feed(b"8;5;12") == b""
+        assert stripper.feed(b"mtwo\x1b]2;ti") == b"two"
+        assert stripper.feed(b"tle\x1b\\three") == b"three"
+
+    def test_runaway_escape_is_dropped(self):
+        """Test an unterminated escape beyond the limit is not carried"""
+        stripper = AnsiStripper(max_pending=16)
+
+        assert stripper.feed(b"a\x1b]" + b"x" * 32) == b"a"
+        assert stripper.feed(b"b") == b"b"
+
+
+class TestLineSplitter:
+    """Test suite for LineSplitter"""
+
+    def test_lines_across_chunks(self):
+        """Test lines split across chunks are joined and counted"""
+        splitter = LineSplitter()
+
+        assert splitter.feed(b"fir") == []
+        assert splitter.feed(b"st\nsec") == [b"first"]
+        assert splitter.feed(b"ond\n\nthird") == [b"second", b""]
+        assert splitter.line_count == 3
+        assert splitter.partial == b"third"
+
+    def test_column_counts_characters(self):
+        """Test the column counts characters rather than bytes"""
+        splitter = LineSplitter()
+
+        splitter.feed("x\nnaïve".encode())
+
+        assert splitter.column == 5
+
+    def test_carriage_return_restarts_line(self):
+        """Test progress output redrawn with CR keeps only its last state"""
+        splitter = LineSplitter()
+
+        for percent in range(1000):
+            splitter.feed(f"{percent}%\r".encode())
+        assert splitter.partial == b"999%"
+        assert splitter.feed(b"done\r") == []
+        assert splitter.feed(b"\nnext\r\n") == [b"done", b"next"]
+        assert splitter.line_count == 2
+
+    def test_partial_line_is_capped(self):
+        """Test a line that never ends does not grow without bound"""
+        splitter = LineSplitter(max_partial=8)
+
+        splitter.feed(b"x" * 100)
+        splitter.feed(b"abc")
+
+        assert splitter.partial == b"xxxxxabc"
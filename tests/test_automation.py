@@ -0,0 +1,171 @@
+"""
+Tests for driving a session from Python without a browser
+"""
+import time
+import asyncio
+import threading
+import pytest
+from viloxtermjs.server import TerminalServer
+
+
+@pytest.fixture
+def cat():
+    server = TerminalServer(command='cat')
+    server.spawn()
+    yield server
+    server.stop()
+
+
+class TestProgrammaticIO:
+    """Test suite for send(), wait_for(), resize() and output streams"""
+
+    def test_send_and_wait_for(self, cat):
+        """Test input is echoed back and matched"""
+        cat.send("hello\n")
+
+        match = cat.wait_for(rb"(h\w+)\r\n", timeout=5)
+
+        assert match.group(1) == b"hello"
+
+    def test_wait_for_does_not_rematch(self, cat):
+        """Test each wait_for() continues after the previous match"""
+        cat.send(b"one\n")
+
+        # Once echoed by the terminal, once printed by cat
+        cat.wait_for("one", timeout=5)
+        cat.wait_for("one", timeout=5)
+        with pytest.raises(TimeoutError):
+            cat.wait_for("one", timeout=0.1)
+
+    def test_many_round_trips(self, cat):
+        """Test thousands of interactions can be scripted"""
+        for i in range(2000):
+            cat.send(b"line %d\n" % i)
+            cat.wait_for(b"line %d\r\n" % i, timeout=5)
+
+        assert cat.output_bytes > 0
+
+    def test_wait_for_after_exit(self):
+        """Test wait_for() fails fast once the child is gone"""
+        server = TerminalServer(command='sh', cmd_args="-c 'echo done'")
+        server.spawn()
+        try:
+            server.wait_for("done", timeout=5)
+            with pytest.raises(EOFError):
+                server.wait_for("never", timeout=5)
+        finally:
+            server.stop()
+
+    def test_resize(self, cat):
+        """Test resize() changes the terminal size seen by the child"""
+        server = TerminalServer(command='sh')
+        server.spawn()
+        try:
+            server.resize(40, 132)
+            server.send("stty size\n")
+            server.wait_for(r"40 132", timeout=5)
+        finally:
+            server.stop()
+
+    def test_output_callback(self, cat):
+        """Test output callbacks receive the output chunks"""
+        chunks = []
+        cat.add_output_callback(lambda chunk: chunks.append(bytes(chunk)))
+
+        cat.send("ping\n")
+        cat.wait_for("ping\r\n", timeout=5)
+
+        assert b"ping" in b"".join(chunks)
+
+    def test_local_viewer(self, cat):
+        """Test an in-process viewer gets output and a snapshot when late"""
+        cat.send("early\n")
+        cat.wait_for("early\r\n", timeout=5)
+        batches = []
+        received = threading.Event()
+
+        def send(data):
+            batches.append(data)
+            received.set()
+
+        viewer = cat.add_viewer(send)
+
+        assert received.wait(5)
+        assert batches[0].startswith(b"\x1bc") and b"early" in batches[0]
+        viewer.acknowledge(len(batches[0]))
+        cat.remove_viewer(viewer)
+        assert viewer.closed
+        assert len(cat.viewers) == 0
+
+    def test_hidden_session_holds_viewer_output(self, cat):
+        """Test viewers get nothing while hidden and catch up when shown"""
+        received = []
+        cat.set_visible(False)
+        viewer = cat.add_viewer(received.append)
+
+        cat.send("while hidden\n")
+        cat.wait_for("while hidden\r\n", timeout=5)
+        time.sleep(0.1)
+        assert viewer.suspended
+        assert received == []
+
+        cat.set_visible(True)
+        for _ in range(100):
+            if received:
+                break
+            time.sleep(0.01)
+        assert b"while hidden" in b"".join(received)
+        cat.remove_viewer(viewer)
+
+    def test_flood_frames(self):
+        """Test a flood reaches a viewer as screenfuls instead of every line"""
+        server = TerminalServer(command='seq', cmd_args='1 300000', frame_rate=30)
+        received = []
+        done = threading.Event()
+
+        def send(data):
+            received.append(data)
+            viewer.acknowledge(len(data))
+            if data.endswith(b"300000\r\n"):
+                done.set()
+
+        viewer = server.add_viewer(send)
+        server.spawn()
+        try:
+            assert done.wait(10)
+        finally:
+            server.stop()
+
+        assert viewer.skipped_bytes > 0
+        assert sum(map(len, received)) < server.output_bytes // 10
+
+    def test_output_stream(self):
+        """Test async iteration over output until the child exits"""
+        server = TerminalServer(command='sh', cmd_args="-c 'echo a; echo b'")
+
+        async def collect():
+            stream = server.output_stream()
+            server.spawn()
+            return b"".join([chunk async for chunk in stream])
+
+        try:
+            output = asyncio.run(asyncio.wait_for(collect(), 10))
+        finally:
+            server.stop()
+
+        assert output == b"a\r\nb\r\n"
+
+    def test_output_stream_ends_on_stop(self):
+        """Test iteration ends when the server is stopped while the child runs"""
+        server = TerminalServer(command='cat')
+
+        async def collect():
+            stream = server.output_stream()
+            server.spawn()
+            asyncio.get_running_loop().call_later(0.2, server.stop)
+            return [chunk async for chunk in stream]
+
+        try:
+            assert asyncio.run(asyncio.wait_for(collect(), 10)) == []
+        finally:
+            server.stop()
@@ -0,0 +1,83 @@
+"""
+Tests for pty-output compression
+"""
+import zlib
+import pytest
+from viloxtermjs.compression import OutputEncoder
+from viloxtermjs.server import TerminalServer
+
+
+class TestOutputEncoder:
+    """Test suite for OutputEncoder"""
+
+    def test_disabled_by_default(self):
+        """Test frames are sent as-is without compression"""
+        encoder = OutputEncoder()
+
+        assert encoder.encode(b"x" * 4096) == {"output": b"x" * 4096, "n": 4096}
+
+    def test_small_frames_skip_compression(self):
+        """Test keystroke-sized frames are never compressed"""
+        encoder = OutputEncoder('deflate', threshold=512)
+
+        assert encoder.encode(b"l") == {"output": b"l", "n": 1}
+
+    def test_frames_share_one_stream(self):
+        """Test compressed frames decode in sequence from one zlib stream"""
+        encoder = OutputEncoder('deflate', threshold=16)
+        frames = [
+            b"".join(b"[build] compiling module %d\r\n" % i for i in range(200)),
+            b"$ ",
+            b"".join(b"[build] linking module %d\r\n" % i for i in range(200)),
+        ]
+        payloads = [encoder.encode(frame) for frame in frames]
+
+        assert "output" in payloads[1]
+        decompressor = zlib.decompressobj()
+        assert decompressor.decompress(payloads[0]["z"]) == frames[0]
+        assert decompressor.decompress(payloads[2]["z"]) == frames[2]
+        assert payloads[2]["n"] == len(frames[2])
+
+    def test_bandwidth_reduction(self):
+        """Test typical terminal output shrinks substantially"""
+        encoder = OutputEncoder('deflate')
+        for i in range(50):
+            encoder.encode(b"".join(
+                b"\x1b[32mINFO\x1b[0m 2024-01-01 12:00:%02d worker-%d processed item %d\r\n"
+                % (i % 60, j % 4, i * 100 + j) for j in range(100)
+            ))
+
+        assert encoder.bytes_out < encoder.bytes_in / 4
+
+    def test_invalid_compression(self):
+        """Test unknown compression names are rejected"""
+        with pytest.raises(ValueError):
+            OutputEncoder('brotli')
+        with pytest.raises(ValueError):
+            TerminalServer(compression='brotli')
+
+
+class TestServerCompression:
+    """Test compression negotiation in TerminalServer"""
+
+    def test_page_config(self):
+        """Test the page is told which compression to offer"""
+        server = TerminalServer(compression='deflate')
+
+        assert server._get_client_config()['compression'] == 'deflate'
+        assert 'DecompressionStream' in server._get_html_template()
+
+    def test_viewer_uses_negotiated_compression(self):
+        """Test a viewer compresses only when its page asked for it"""
+        server = TerminalServer(compression='deflate', compression_threshold=8)
+        sent = {}
+        server.socketio.emit = lambda event, payload, **kwargs: sent.update({kwargs['to']: payload})
+        server.socketio.start_background_task = lambda *args: None
+
+        plain = server._add_viewer('plain')
+        packed = server._add_viewer('packed', compression='deflate')
+        for viewer in (plain, packed):
+            viewer._send(b"0123456789" * 10)
+
+        assert sent['plain'] == {"output": b"0123456789" * 10, "n": 100}
+        assert zlib.decompressobj().decompress(sent['packed']["z"]) == b"0123456789" * 10
@@ -0,0 +1,153 @@
+"""
+Tests for the session daemon and attaching TerminalServer to it
+"""
+import os
+import time
+import socket
+import pytest
+from viloxtermjs.daemon import SessionDaemon, SessionDaemonClient
+from viloxtermjs.server import TerminalServer
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    client = SessionDaemonClient(socket_path=str(tmp_path / 'daemon.sock'), idle_timeout=30)
+    yield client
+    try:
+        client.shutdown()
+    except OSError:
+        pass
+
+
+def attach(daemon, session_id, command='sh'):
+    server = TerminalServer(command=command, session_id=session_id, daemon=daemon)
+    server.spawn()
+    return server
+
+
+class TestSessionDaemon:
+    """Test suite for daemon-owned sessions"""
+
+    def test_session_survives_detach(self, daemon):
+        """Test a detached session keeps running and replays its output on reattach"""
+        first = attach(daemon, 'build')
+        first.send("x=kept; echo started\n")
+        first.wait_for("started\r\n", timeout=5)
+        pid = first.child_pid
+
+        first.detach()
+
+        [info] = daemon.list_sessions()
+        assert info['alive'] and info['pid'] == pid
+        second = attach(daemon, 'build')
+        second.wait_for("started", timeout=5)
+        second.send("echo $x\n")
+        second.wait_for("kept\r\n", timeout=5)
+        assert second.child_pid == pid
+        second.stop()
+
+    def test_stop_ends_session(self, daemon):
+        """Test stop() kills the daemon's session"""
+        server = attach(daemon, 'tab', command='cat')
+
+        server.stop()
+
+        assert daemon.list_sessions() == []
+
+    def test_exit_code_and_resize(self, daemon):
+        """Test resize reaches the daemon's PTY and the exit code comes back"""
+        server = attach(daemon, 'shell')
+        exits = []
+        server.add_exit_callback(exits.append)
+
+        server.resize(40, 132)
+        server.send("stty size; exit 7\n")
+        server.wait_for("40 132", timeout=5)
+        deadline = time.monotonic() + 5
+        while not exits:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        assert exits == [7]
+        server.stop()
+
+    def test_many_sessions_reattach(self, daemon):
+        """Test several sessions can be reattached after their servers are gone"""
+        servers = [attach(daemon, f'tab{i}') for i in range(10)]
+        pids = [server.child_pid for server in servers]
+        for server in servers:
+            server.detach()
+
+        reattached = [attach(daemon, f'tab{i}') for i in range(10)]
+
+        assert [server.child_pid for server in reattached] == pids
+        for server in reattached:
+            server.send("echo alive\n")
+            server.wait_for("alive\r\n", timeout=5)
+            server.stop()
+
+    def test_attach_unknown_session(self, daemon):
+        """Test attaching to a session that does not exist fails"""
+        daemon.ensure_running()
+
+        with pytest.raises(RuntimeError):
+            daemon.attach('missing')
+
+    def test_refuses_shared_socket_dir(self, tmp_path):
+        """Test neither side uses a socket directory others could get into"""
+        shared = tmp_path / 'shared'
+        shared.mkdir(mode=0o755)
+        shared.chmod(0o755)
+        with pytest.raises(PermissionError):
+            SessionDaemon(socket_path=str(shared / 'daemon.sock')).listen()
+        with pytest.raises(PermissionError):
+            SessionDaemonClient(socket_path=str(shared / 'daemon.sock')).ensure_running()
+
+        private = tmp_path / 'private'
+        private.mkdir(mode=0o700)
+        link = tmp_path / 'link'
+        link.symlink_to(private)
+        with pytest.raises(PermissionError):
+            SessionDaemonClient(socket_path=str(link / 'daemon.sock'), autostart=False).list_sessions()
+        assert not (private / 'daemon.sock').exists()
+
+    def test_slow_client_holds_session_back(self, daemon):
+        """Test a client that stops reading pauses the session rather than being dropped"""
+        fd, info = daemon.open_session('flood', ['yes'])
+        try:
+            # Far more than MAX_CLIENT_BACKLOG is produced in this time if reads go on
+            time.sleep(2)
+            [status] = daemon.list_sessions()
+            assert status['alive'] and status['clients'] == 1
+
+            os.set_blocking(fd, False)
+            received = 0
+            deadline = time.monotonic() + 5
+            while received < 8 * 1024 * 1024 and time.monotonic() < deadline:
+                try:
+                    received += len(os.read(fd, 1024 * 1024))
+                except BlockingIOError:
+                    time.sleep(0.001)
+            assert received >= 8 * 1024 * 1024
+        finally:
+            os.close(fd)
+            daemon.kill('flood')
+
+    def test_lost_stream_reattaches(self, daemon):
+        """Test losing the daemon connection reattaches instead of reporting an exit"""
+        server = attach(daemon, 'tab', command='cat')
+        exits = []
+        server.add_exit_callback(exits.append)
+        try:
+            lost = server.fd
+            with socket.socket(fileno=os.dup(lost)) as stream:
+                stream.shutdown(socket.SHUT_RDWR)
+            deadline = time.monotonic() + 5
+            while server.fd in (lost, None) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            server.send("still here\n")
+            server.wait_for("still here\r\n", timeout=5)
+            assert exits == []
+            assert server.child_pid
+        finally:
+            server.stop()
@@ -0,0 +1,99 @@
+"""
+Tests for streaming files to and from a session's working directory
+"""
+import io
+import os
+import time
+import pytest
+from viloxtermjs.filetransfer import receive_file, file_chunks, session_cwd
+from viloxtermjs.server import TerminalServer
+
+
+@pytest.fixture
+def session(tmp_path):
+    server = TerminalServer(command='sh', cmd_args=f"-c 'cd {tmp_path} && exec cat'",
+                            file_transfer=True)
+    pid = server.spawn()
+    for _ in range(200):
+        if session_cwd(pid) == str(tmp_path):
+            break
+        time.sleep(0.01)
+    yield server
+    server.stop()
+
+
+class TestReceiveFile:
+    """Test suite for receive_file and file_chunks"""
+
+    def test_streams_to_disk(self, tmp_path):
+        """Test data is written in full and read back in chunks"""
+        data = os.urandom(3 * 1024 * 1024 + 5)
+        path = str(tmp_path / "upload.bin")
+
+        assert receive_file(io.BytesIO(data), path, length=len(data)) == len(data)
+        size, chunks = file_chunks(path)
+        assert size == len(data)
+        assert b"".join(chunks) == data
+
+    def test_short_upload_leaves_nothing(self, tmp_path):
+        """Test an upload that ends early neither creates nor replaces the file"""
+        path = tmp_path / "upload.bin"
+        path.write_bytes(b"old")
+
+        with pytest.raises(EOFError):
+            receive_file(io.BytesIO(b"new"), str(path), overwrite=True, length=10)
+
+        assert path.read_bytes() == b"old"
+        assert os.listdir(tmp_path) == ["upload.bin"]
+
+    def test_refuses_to_overwrite(self, tmp_path):
+        """Test existing files are kept unless overwriting was asked for"""
+        path = tmp_path / "upload.bin"
+        path.write_bytes(b"old")
+
+        with pytest.raises(FileExistsError):
+            receive_file(io.BytesIO(b"new"), str(path))
+        receive_file(io.BytesIO(b"new"), str(path), overwrite=True)
+
+        assert path.read_bytes() == b"new"
+
+
+class TestFileEndpoint:
+    """Test suite for the /files endpoint"""
+
+    def test_upload_and_download(self, session, tmp_path):
+        """Test files land in and are served from the shell's directory"""
+        client = session.app.test_client()
+        headers = {"X-Viloxterm-Token": session.file_token}
+
+        response = client.put("/files?name=my file.txt", data=b"contents", headers=headers)
+        assert response.status_code == 201
+        assert (tmp_path / "my file.txt").read_bytes() == b"contents"
+        assert client.put("/files?name=my file.txt", data=b"x", headers=headers).status_code == 409
+
+        response = client.get(f"/files?name=my file.txt&token={session.file_token}")
+        assert response.data == b"contents"
+        assert "filename*=UTF-8''my%20file.txt" in response.headers["Content-Disposition"]
+        assert client.get("/files?name=missing", headers=headers).status_code == 404
+
+    def test_requires_token(self, session):
+        """Test requests without the page's token are refused"""
+        client = session.app.test_client()
+
+        assert client.get("/files?name=x").status_code == 403
+        assert client.put("/files?name=x&token=guess", data=b"x").status_code == 403
+
+    def test_token_only_for_pages_that_can_type(self, session):
+        """Test read-only pages do not get the token"""
+        client = session.app.test_client()
+
+        assert session.file_token in client.get("/").get_data(as_text=True)
+        assert session.file_token not in client.get("/?readonly=1").get_data(as_text=True)
+
+    def test_disabled_by_default(self):
+        """Test the endpoint and the page's drop handler are off unless enabled"""
+        server = TerminalServer()
+        client = server.app.test_client()
+
+        assert client.get(f"/files?name=x&token={server.file_token}").status_code == 404
+        assert '"fileToken": null' in client.get("/").get_data(as_text=True)
@@ -0,0 +1,36 @@
+"""
+Tests for collapsing floods of output to the visible screen
+"""
+from viloxtermjs.frames import screen_tail
+
+
+class TestScreenTail:
+    """Test suite for screen_tail"""
+
+    def test_keeps_the_last_screenful(self):
+        """Test only the lines that fit on the screen are kept"""
+        data = b"".join(b"line %d\r\n" % i for i in range(100)) + b"partial"
+
+        tail = screen_tail(data, 3)
+
+        assert tail == b"\x1b[0mline 98\r\nline 99\r\npartial"
+
+    def test_carries_the_current_colours(self):
+        """Test the tail starts with the colours in effect where it begins"""
+        data = b"\x1b[31mred\n\x1b[1;32mgreen\nmore\nlast\n"
+
+        assert screen_tail(data, 3) == b"\x1b[0m\x1b[1;32mmore\nlast\n"
+
+    def test_refuses_cursor_movement(self):
+        """Test output that moves the cursor or switches screens is left alone"""
+        lines = b"a\nb\nc\nd\n"
+
+        assert screen_tail(lines, 2) is not None
+        assert screen_tail(b"\x1b[2J" + lines, 2) is None
+        assert screen_tail(lines + b"\x1b[5;1H", 2) is None
+        assert screen_tail(b"\x1b[?1049h" + lines, 2) is None
+        assert screen_tail(b"\x1b[K\x1b[0m" + lines, 2) is not None
+
+    def test_needs_a_screenful(self):
+        """Test output shorter than the screen cannot be cut"""
+        assert screen_tail(b"a\nb\n", 3) is None
@@ -0,0 +1,151 @@
+"""
+Tests for session lifecycle: child exit detection, reaping and server shutdown
+"""
+import gc
+import os
+import socket
+import threading
+import time
+import urllib.request
+import pytest
+from viloxtermjs.server import TerminalServer
+
+
+def zombie_children():
+    """PIDs of zombie processes whose parent is this process"""
+    zombies = []
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if fields[0] == 'Z' and int(fields[1]) == os.getpid():
+            zombies.append(int(pid))
+    return zombies
+
+
+def open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def spawn(command, cmd_args='', on_exit=None):
+    server = TerminalServer(command=command, cmd_args=cmd_args)
+    # Registered first: a child that fails at once can be reaped before spawn() returns
+    if on_exit:
+        server.add_exit_callback(on_exit)
+    server.running = True
+    server._spawn()
+    return server
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="needs /proc")
+class TestChildLifecycle:
+    """Test suite for child process lifecycle"""
+
+    def test_exit_is_detected(self):
+        """Test a child exiting by itself is reaped and reported"""
+        exits = []
+        server = spawn('sh', "-c 'exit 3'", on_exit=exits.append)
+
+        assert wait_until(lambda: exits)
+        assert exits == [3]
+        assert server.exit_code == 3
+        assert server.child_pid is None
+        assert server.fd is None
+        server.stop()
+
+    def test_exec_failure_exit_code(self):
+        """Test a command that cannot be executed exits with 127"""
+        exits = []
+        server = spawn('/nonexistent/command', on_exit=exits.append)
+
+        assert wait_until(lambda: exits)
+        assert exits == [127]
+        server.stop()
+
+    def test_stop_escalates_to_sigkill(self):
+        """Test stop() kills a child that ignores SIGTERM and SIGHUP"""
+        server = spawn('sh', "-c 'trap \"\" TERM HUP; echo ready; while :; do sleep 1; done'")
+        assert wait_until(lambda: server.scrollback.total_lines > 0)
+        server.KILL_TIMEOUT = 0.2
+        exits = []
+        server.add_exit_callback(exits.append)
+
+        server.stop()
+
+        assert server.exit_code == -9
+        assert exits == []
+        assert zombie_children() == []
+
+    def test_repeated_sessions_leave_nothing_behind(self):
+        """Test many spawn/stop cycles leak neither zombies nor descriptors"""
+        for command in ('cat', 'true'):
+            spawn(command).stop()
+        baseline = open_fds()
+
+        for i in range(100):
+            server = spawn('true' if i % 2 else 'cat')
+            if i % 2:
+                assert wait_until(lambda: server.child_pid is None)
+            server.stop()
+
+        assert zombie_children() == []
+        assert open_fds() <= baseline
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="needs /proc")
+class TestServerShutdown:
+    """Test stop() releases the HTTP server's thread and port"""
+
+    def test_stop_releases_port_and_thread(self):
+        """Test the port is closed and the server thread is gone after stop()"""
+        server = TerminalServer(command='cat')
+        port = server.start()
+        thread = server.server_thread
+        with urllib.request.urlopen(server.get_url(), timeout=5) as response:
+            assert response.status == 200
+
+        server.stop()
+
+        assert not thread.is_alive()
+        with pytest.raises(ConnectionRefusedError):
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+
+    def test_open_close_many_terminals(self):
+        """Test 500 terminals can be opened and closed without leaking resources"""
+        def cycle():
+            server = TerminalServer(command='cat')
+            server.start()
+            server._spawn()
+            with urllib.request.urlopen(server.get_url(), timeout=5) as response:
+                response.read()
+            server.stop()
+
+        for _ in range(20):
+            cycle()
+        gc.collect()
+        threads, fds, rss = threading.active_count(), open_fds(), rss_bytes()
+
+        for _ in range(500):
+            cycle()
+        gc.collect()
+
+        assert threading.active_count() <= threads
+        assert open_fds() <= fds
+        assert zombie_children() == []
+        assert rss_bytes() - rss < 16 * 1024 * 1024
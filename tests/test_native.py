@@ -0,0 +1,148 @@
+"""
+Tests for the QPainter-based NativeTerminalWidget
+"""
+import time
+import pytest
+from unittest.mock import Mock, patch
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QFont
+from PySide6.QtTest import QTest
+
+pytest.importorskip("pyte")
+
+
+def wait_until(qapp, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        qapp.processEvents()
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def screen_text(widget):
+    return "\n".join(widget._screen.display)
+
+
+class TestGlyphCache:
+    """Test suite for the glyph pixmap cache"""
+
+    def test_reuses_and_evicts_glyphs(self, qapp):
+        """Test a glyph is rendered once and the oldest glyphs are evicted"""
+        from viloxtermjs.native import GlyphCache
+
+        cache = GlyphCache(max_glyphs=2)
+        cache.set_font(QFont("monospace", 10), 8, 16, 12)
+        white = QColor("#ffffff")
+
+        first = cache.get("a", white)
+        assert cache.get("a", white) is first
+        cache.get("b", white)
+        cache.get("c", white)
+
+        assert (cache.hits, cache.misses, len(cache)) == (1, 3, 2)
+        assert cache.get("a", white) is not first
+
+    def test_wide_glyphs_span_two_cells(self, qapp):
+        """Test wide characters get a pixmap two cells wide"""
+        from viloxtermjs.native import GlyphCache
+
+        cache = GlyphCache()
+        cache.set_font(QFont("monospace", 10), 8, 16, 12)
+
+        assert cache.get("中", QColor("#ffffff"), wide=True).width() == 16
+
+
+class TestNativeTerminalWidget:
+    """Test suite for NativeTerminalWidget against real sessions"""
+
+    def test_renders_session_output(self, qapp):
+        """Test output reaches the screen and typed keys reach the session"""
+        from viloxtermjs.native import NativeTerminalWidget
+
+        widget = NativeTerminalWidget(command='cat')
+        widget.show()
+        try:
+            assert widget.terminal_server.child_pid
+            assert widget.terminal_server._http_server is None
+
+            QTest.keyClicks(widget, "hello")
+            QTest.keyClick(widget, Qt.Key_Return)
+            assert wait_until(qapp, lambda: screen_text(widget).count("hello") == 2)
+
+            widget.grab()
+            assert widget.glyphs.misses > 0
+        finally:
+            widget.close_terminal()
+
+    def test_resize_reaches_session(self, qapp):
+        """Test resizing the widget resizes the screen and the PTY"""
+        from viloxtermjs.native import NativeTerminalWidget
+
+        widget = NativeTerminalWidget(command='sh', cmd_args="-c 'read x; stty size'")
+        widget.show()
+        try:
+            cell_width, cell_height = widget._cell
+            widget.resize(50 * cell_width, 10 * cell_height)
+            widget.terminal_server.send("\r")
+
+            assert (widget._screen.columns, widget._screen.lines) == (50, 10)
+            assert wait_until(qapp, lambda: "10 50" in screen_text(widget))
+        finally:
+            widget.close_terminal()
+
+    def test_child_exit_closes_terminal(self, qapp):
+        """Test the widget closes and reports the code when the process exits"""
+        from viloxtermjs.native import NativeTerminalWidget
+
+        widget = NativeTerminalWidget(command='sh', cmd_args="-c 'exit 3'")
+        exited = []
+        widget.terminal_exited.connect(exited.append)
+
+        assert wait_until(qapp, lambda: exited)
+        assert exited == [3]
+        assert widget.terminal_server is None
+
+    def test_key_bytes(self, qapp):
+        """Test keys map to the bytes an xterm sends"""
+        from viloxtermjs.native import NativeTerminalWidget, DECCKM
+
+        with patch('viloxtermjs.native.TerminalServer'):
+            widget = NativeTerminalWidget()
+
+        assert widget._key_bytes(Qt.Key_A, "a", False, False, False) == b"a"
+        assert widget._key_bytes(Qt.Key_C, "", True, False, False) == b"\x03"
+        assert widget._key_bytes(Qt.Key_X, "x", False, False, True) == b"\x1bx"
+        assert widget._key_bytes(Qt.Key_Up, "", False, False, False) == b"\x1b[A"
+        assert widget._key_bytes(Qt.Key_Right, "", True, False, False) == b"\x1b[1;5C"
+        assert widget._key_bytes(Qt.Key_Shift, "", False, True, False) is None
+
+        widget._screen.mode.add(DECCKM)
+        assert widget._key_bytes(Qt.Key_Up, "", False, False, False) == b"\x1bOA"
+
+    def test_selection_and_bracketed_paste(self, qapp):
+        """Test selected text is read from the screen and pastes are bracketed"""
+        from viloxtermjs.native import NativeTerminalWidget, BRACKETED_PASTE
+
+        with patch('viloxtermjs.native.TerminalServer') as mock_server:
+            widget = NativeTerminalWidget()
+        widget._stream.feed(b"first line\r\nsecond")
+        widget._selection = ((1, 3), (0, 6))
+
+        assert widget.selected_text() == "line\nseco"
+
+        widget._screen.mode.add(BRACKETED_PASTE)
+        with patch('viloxtermjs.native.QGuiApplication.clipboard') as clipboard:
+            clipboard.return_value.text.return_value = "a\nb"
+            widget.paste()
+
+        mock_server.return_value.send.assert_called_with(b"\x1b[200~a\rb\x1b[201~")
+        assert widget._selection is None
+
+    def test_rejects_session_pool(self, qapp):
+        """Test a SessionPool is refused since output must reach this process"""
+        from viloxtermjs.native import NativeTerminalWidget
+
+        with pytest.raises(ValueError):
+            NativeTerminalWidget(session_pool=Mock())
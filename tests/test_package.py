@@ -0,0 +1,51 @@
+"""
+Tests for the package's lazy imports
+"""
+import os
+import sys
+import subprocess
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+
+
+class TestLazyImports:
+    """Test suite for the package's import behaviour"""
+
+    def test_import_is_light(self):
+        """Test importing the package loads neither Qt nor Flask"""
+        result = run_python(
+            "import sys, viloxtermjs\n"
+            "print(sorted(n for n in ('PySide6', 'flask', 'flask_socketio') if n in sys.modules))"
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    def test_server_without_qt(self):
+        """Test the server can be used when PySide6 is not installed"""
+        result = run_python(
+            "import sys\n"
+            "sys.modules['PySide6'] = None\n"
+            "from viloxtermjs import TerminalServer\n"
+            "print(TerminalServer().command)"
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "bash"
+
+    def test_lazy_attributes(self):
+        """Test public names resolve on access and unknown names still fail"""
+        import viloxtermjs
+        from viloxtermjs.server import TerminalServer
+
+        assert viloxtermjs.TerminalServer is TerminalServer
+        assert 'TerminalWidget' in dir(viloxtermjs)
+        with pytest.raises(AttributeError):
+            viloxtermjs.NotAThing
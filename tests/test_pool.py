@@ -0,0 +1,89 @@
+"""
+Tests for the SessionPool process-hosting option
+"""
+import os
+import pytest
+import urllib.request
+from viloxtermjs.pool import SessionPool
+
+
+class TestSessionPool:
+    """Test suite for SessionPool"""
+
+    @pytest.fixture
+    def pool(self):
+        pool = SessionPool(workers=2)
+        yield pool
+        pool.shutdown()
+
+    def test_sessions_are_sharded(self, pool):
+        """Test sessions are spread over the workers"""
+        first = pool.create_session(command='cat')
+        second = pool.create_session(command='cat')
+
+        first.start()
+        second.start()
+
+        assert first._worker is not second._worker
+        assert pool.session_count == 2
+        assert first.call('search_scrollback', 'x') == []
+
+        first.stop()
+        assert pool.session_count == 1
+
+    def test_session_is_served_from_worker(self, pool):
+        """Test the session's page is served by a worker process"""
+        session = pool.create_session(command='cat', session_id='pooled')
+
+        port = session.start()
+
+        assert port > 0
+        assert session.get_url() == f"http://127.0.0.1:{port}"
+        assert session.call('_get_client_config')['renderer'] == 'auto'
+        assert session._worker.process.pid != os.getpid()
+        with urllib.request.urlopen(session.get_url(), timeout=5) as response:
+            assert response.status == 200
+
+    def test_errors_are_raised_in_caller(self, pool):
+        """Test exceptions from the worker propagate to the caller"""
+        session = pool.create_session(renderer='vulkan')
+
+        with pytest.raises(ValueError):
+            session.start()
+        assert pool.session_count == 0
+
+    def test_call_before_start(self, pool):
+        """Test calling into a session that was never started raises a clear error"""
+        session = pool.create_session(command='cat')
+
+        with pytest.raises(RuntimeError, match="not started"):
+            session.call('search_scrollback', 'x')
+
+    @pytest.mark.skipif(not hasattr(os, "sched_getaffinity"), reason="needs CPU affinity")
+    def test_pinned_worker_shell_keeps_all_cpus(self):
+        """Test a shell forked by a pinned worker is not left on the worker's core"""
+        pool = SessionPool(workers=1, pin_cpus=True)
+        try:
+            session = pool.create_session(command='cat')
+            session.start()
+            worker_pid = session._worker.process.pid
+            shell_pid = session.call('spawn')
+
+            assert len(os.sched_getaffinity(worker_pid)) == 1
+            assert os.sched_getaffinity(shell_pid) == os.sched_getaffinity(0)
+        finally:
+            pool.shutdown()
+
+    def test_pinning_is_opt_in(self):
+        """Test workers are not pinned unless asked"""
+        assert SessionPool().pin_cpus is False
+
+    def test_shutdown_stops_workers(self):
+        """Test shutdown terminates the worker processes"""
+        pool = SessionPool(workers=1)
+        pool.create_session(command='cat').start()
+        process = pool._workers[0].process
+
+        pool.shutdown()
+
+        assert not process.is_alive()
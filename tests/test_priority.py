@@ -0,0 +1,89 @@
+"""
+Tests for lowering the priority of sessions that are not in front
+"""
+import os
+import time
+import logging
+import pytest
+from viloxtermjs import priority
+from viloxtermjs.priority import PriorityPolicy, session_processes
+from viloxtermjs.server import TerminalServer
+
+
+def autogroup_nice(pid):
+    with open(f"/proc/{pid}/autogroup") as f:
+        return int(f.read().split()[-1])
+
+
+@pytest.fixture
+def session():
+    server = TerminalServer(command='sh', cmd_args="-c 'sleep 30 & wait'", priority=True)
+    server.spawn()
+    yield server
+    server.stop()
+
+
+class TestPriorityPolicy:
+    """Test suite for PriorityPolicy"""
+
+    def test_finds_session_processes(self, session):
+        """Test the shell and the jobs it started are found"""
+        for _ in range(100):
+            pids = session_processes(session.child_pid)
+            if len(pids) >= 2:
+                break
+            time.sleep(0.01)
+
+        assert session.child_pid in pids
+        assert len(pids) >= 2
+
+    def test_levels_follow_visibility_and_focus(self, session):
+        """Test hidden sessions are reniced and focus raises them again"""
+        pid = session.child_pid
+        assert session.priority_level() == 'visible'
+        assert os.getpriority(os.PRIO_PROCESS, pid) == PriorityPolicy.DEFAULT_NICE['visible']
+
+        session.set_visible(False)
+        assert session.priority_level() == 'hidden'
+        assert os.getpriority(os.PRIO_PROCESS, pid) == 10
+
+        session.set_visible(True)
+        session.set_focused(True)
+        assert session.priority_level() == 'focused'
+        if session.priority.autogroup:
+            # Autogroup nice can be lowered again without privileges
+            assert autogroup_nice(pid) == 0
+
+    def test_no_renice_that_cannot_be_undone(self, monkeypatch, caplog):
+        """Test processes keep their nice value when it could not be lowered back"""
+        monkeypatch.setattr(priority, "can_lower_nice", lambda nice: False)
+        server = TerminalServer(command='cat', priority=True)
+        pid = server.spawn()
+        try:
+            with caplog.at_level(logging.WARNING):
+                server.set_visible(False)
+                server.set_visible(True)
+            assert os.getpriority(os.PRIO_PROCESS, pid) == 0
+            assert len([r for r in caplog.records if "not renicing" in r.message]) == 1
+        finally:
+            server.stop()
+
+    def test_cgroup_weight(self, tmp_path):
+        """Test each session gets a cgroup whose cpu.weight follows its level"""
+        policy = PriorityPolicy(cgroup=str(tmp_path))
+        server = TerminalServer(command='cat', priority=policy)
+        pid = server.spawn()
+        try:
+            cgroup = tmp_path / f"viloxterm-{pid}"
+            assert (cgroup / "cgroup.procs").read_text() == str(pid)
+            assert (cgroup / "cpu.weight").read_text() == "100"
+
+            server.set_visible(False)
+            assert (cgroup / "cpu.weight").read_text() == "20"
+        finally:
+            server.stop()
+
+    def test_rejects_unknown_level(self):
+        """Test only the known levels can be applied"""
+        with pytest.raises(ValueError):
+            PriorityPolicy().apply(os.getpid(), 'minimized')
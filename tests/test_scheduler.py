@@ -0,0 +1,135 @@
+"""
+Tests for sharing output fairly between sessions
+"""
+import time
+import threading
+import pytest
+from viloxtermjs.scheduler import OutputScheduler
+from viloxtermjs.server import TerminalServer
+
+
+def queue_up(scheduler, requests, order):
+    """Hold the scheduler busy, queue ``requests`` in order, then let them run"""
+    release = threading.Event()
+    holding = threading.Event()
+
+    def hold():
+        with scheduler.turn("holder", 1):
+            holding.set()
+            release.wait()
+
+    def request(key, nbytes, interactive):
+        with scheduler.turn(key, nbytes, interactive):
+            order.append(key)
+
+    threads = [threading.Thread(target=hold)]
+    threads[0].start()
+    holding.wait()
+    for key, nbytes, interactive in requests:
+        thread = threading.Thread(target=request, args=(key, nbytes, interactive))
+        thread.start()
+        threads.append(thread)
+        # Let each one reach the queue before the next
+        deadline = time.monotonic() + 1
+        while time.monotonic() < deadline:
+            with scheduler._cond:
+                waiting = len(scheduler._fast_lane) + sum(len(q) for q in scheduler._queues.values())
+            if waiting == len(threads) - 1:
+                break
+            time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+
+class TestOutputScheduler:
+    """Test suite for OutputScheduler"""
+
+    def test_uncontended_turn_does_not_wait(self):
+        """Test a turn is granted at once while nothing else is sending"""
+        scheduler = OutputScheduler()
+        with scheduler.turn("a", 100):
+            assert scheduler._busy == 1
+        assert scheduler._busy == 0
+
+    def test_fast_lane_goes_first(self):
+        """Test an echo queued behind a flood is sent before it"""
+        scheduler = OutputScheduler(quantum=100, turn_timeout=10)
+        order = []
+        queue_up(scheduler, [("flood", 100, False), ("flood", 100, False),
+                             ("echo", 1, True)], order)
+        assert order == ["echo", "flood", "flood"]
+        assert scheduler.fast_lane_grants == 1
+
+    def test_sessions_take_turns(self):
+        """Test a session with a lot queued does not starve one with little"""
+        scheduler = OutputScheduler(quantum=100, turn_timeout=10)
+        order = []
+        queue_up(scheduler, [("a", 100, False)] * 3 + [("b", 100, False)] * 2, order)
+        assert order == ["a", "b", "a", "b", "a"]
+
+    def test_shares_follow_bytes_and_weights(self):
+        """Test each round gives a session quantum times its weight in bytes"""
+        scheduler = OutputScheduler(quantum=100, turn_timeout=10)
+        scheduler.set_weight("a", 2)
+        order = []
+        queue_up(scheduler, [("a", 100, False)] * 4 + [("b", 50, False)] * 4, order)
+        assert order == ["a", "a", "b", "b", "a", "a", "b", "b"]
+
+    def test_rejects_non_positive_weight(self):
+        """Test a session cannot be given no share at all"""
+        scheduler = OutputScheduler()
+        for weight in (0, -1):
+            with pytest.raises(ValueError):
+                scheduler.set_weight("a", weight)
+
+    def test_stalled_turn_expires(self):
+        """Test a send stuck past turn_timeout does not hold up other sessions"""
+        scheduler = OutputScheduler(turn_timeout=0.05)
+        stalled = threading.Event()
+        release = threading.Event()
+
+        def stall():
+            with scheduler.turn("stalled", 1):
+                stalled.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=stall)
+        thread.start()
+        stalled.wait()
+        start = time.monotonic()
+        with scheduler.turn("other", 1):
+            waited = time.monotonic() - start
+        release.set()
+        thread.join()
+
+        assert waited < 1
+        assert scheduler.expired_turns == 1
+        assert scheduler._busy == 0
+
+    def test_split(self):
+        """Test output is cut into pieces no larger than the quantum"""
+        scheduler = OutputScheduler(quantum=4)
+        assert scheduler.split(b"abc") == [b"abc"]
+        assert scheduler.split(b"abcdefghij") == [b"abcd", b"efgh", b"ij"]
+
+    def test_server_sends_through_scheduler(self):
+        """Test viewer output reaches the viewer in pieces no larger than the quantum"""
+        scheduler = OutputScheduler(quantum=1024)
+        server = TerminalServer(command='cat', scheduler=scheduler)
+        server.spawn()
+        try:
+            sent = []
+            server.add_viewer(sent.append)
+            server.send("hello\n")
+            deadline = time.monotonic() + 5
+            while b"hello" not in b"".join(sent) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert b"hello" in b"".join(sent)
+
+            scheduled = server._scheduled(sent.append)
+            sent.clear()
+            scheduled(b"x" * 3000)
+            assert [len(piece) for piece in sent] == [1024, 1024, 952]
+        finally:
+            server.stop()
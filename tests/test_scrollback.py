@@ -0,0 +1,118 @@
+"""
+Tests for the server-side Scrollback
+"""
+from unittest.mock import Mock
+from viloxtermjs.scrollback import Scrollback
+from viloxtermjs.server import TerminalServer
+
+
+class TestScrollback:
+    """Test suite for Scrollback"""
+
+    def test_strips_escape_sequences(self):
+        """Test colors, titles and carriage returns are removed"""
+        scrollback = Scrollback()
+        scrollback.feed(b"\x1b[1;31merror\x1b[0m: bad\r\n\x1b]0;title\x07prompt$ ")
+
+        assert scrollback.lines(0, 10) == ["error: bad", "prompt$ "]
+
+    def test_escape_split_across_chunks(self):
+        """Test an escape sequence cut by a chunk boundary is still stripped"""
+        scrollback = Scrollback()
+        scrollback.feed(b"abc\x1b[3")
+        scrollback.feed(b"2mdef\x1b]0;ti")
+        scrollback.feed(b"tle\x07ghi\n")
+
+        assert scrollback.lines(0, 10) == ["abcdefghi"]
+
+    def test_utf8_split_across_chunks(self):
+        """Test multibyte characters cut by a chunk boundary survive"""
+        scrollback = Scrollback()
+        data = "café\n".encode()
+        scrollback.feed(data[:4])
+        scrollback.feed(data[4:])
+
+        assert scrollback.lines(0, 1) == ["café"]
+
+    def test_progress_output_keeps_last_state(self):
+        """Test output redrawn with carriage returns is held as it was left"""
+        scrollback = Scrollback()
+        scrollback.feed(b"".join(b"\x1b[K%d%%\r" % i for i in range(101)))
+        scrollback.feed(b"\r\ndone\r\n")
+
+        assert scrollback.lines(0, 10) == ["100%", "done"]
+
+    def test_bounded_with_absolute_line_numbers(self):
+        """Test old lines are dropped but line numbers stay absolute"""
+        scrollback = Scrollback(max_lines=3)
+        scrollback.feed(b"".join(b"line %d\n" % i for i in range(10)))
+
+        assert scrollback.first_line == 7
+        assert scrollback.total_lines == 10
+        assert scrollback.lines(0, 100) == ["line 7", "line 8", "line 9"]
+        assert scrollback.search("line 8") == [
+            {"line": 8, "column": 0, "end": 6, "text": "line 8"}
+        ]
+
+    def test_search_options(self):
+        """Test literal, regex, case and limit handling"""
+        scrollback = Scrollback()
+        scrollback.feed(b"a.b\naxb\nA.B\n")
+
+        assert [hit["line"] for hit in scrollback.search("a.b")] == [0, 2]
+        assert [hit["line"] for hit in scrollback.search("a.b", case_sensitive=True)] == [0]
+        assert [hit["line"] for hit in scrollback.search("a.b", regex=True)] == [0, 1, 2]
+        assert [hit["line"] for hit in scrollback.search("a.b", regex=True, limit=2)] == [1, 2]
+        assert scrollback.search("") == []
+        assert scrollback.search("a.b", limit=0) == []
+
+
+class TestServerScrollback:
+    """Test scrollback integration in TerminalServer"""
+
+    def test_output_feeds_scrollback(self):
+        """Test PTY output is indexed and searchable"""
+        server = TerminalServer()
+        server.socketio = Mock()
+
+        server._handle_output(b"\x1b[32mBUILD OK\x1b[0m\r\n")
+
+        hits = server.search_scrollback("build ok")
+        assert hits == [{"line": 0, "column": 0, "end": 8, "text": "BUILD OK"}]
+
+    def test_invalid_regex(self):
+        """Test an invalid pattern returns no hits instead of raising"""
+        server = TerminalServer()
+
+        assert server.search_scrollback("(", regex=True) == []
+
+    def test_page_search_bounds(self):
+        """Test page searches are capped and read-only pages search plain text"""
+        server = TerminalServer()
+        server.socketio = Mock()
+        server._handle_output(b"a.b\r\naxb\r\n")
+
+        def lines(read_only=False, **args):
+            result = server._answer_page("search", dict(args, regex=True), read_only)
+            return None if result is None else [hit["line"] for hit in result["hits"]]
+
+        assert lines(query="a.b") == [0, 1]
+        assert lines(query="a.b", read_only=True) == [0]
+        assert lines(query="a.b", limit=0) == []
+        assert lines(query="a" * (server.MAX_SEARCH_QUERY + 1)) is None
+        assert lines(query=["a"]) is None
+
+    def test_page_commands_bounds(self):
+        """Test a page's commands request needs integer start and stop"""
+        server = TerminalServer(shell_integration=True)
+
+        assert server._answer_page("commands", {"start": 0, "stop": None}) == []
+        for args in ({"start": "x"}, {"start": None}, {"start": True}, {"start": 0, "stop": 1.5}):
+            assert server._answer_page("commands", args) is None
+
+    def test_disabled(self):
+        """Test scrollback can be disabled"""
+        server = TerminalServer(scrollback_lines=0)
+
+        assert server.scrollback is None
+        assert server.search_scrollback("x") == []
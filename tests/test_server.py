@@ -74,6 +74,151 @@ class TestTerminalServer:
         assert 'pty-output' in html
         assert 'resize' in html
         
+    def test_renderer_option(self):
+        """Test renderer selection is validated and handed to the page"""
+        server = TerminalServer(renderer='webgl')
+        html = server.app.test_client().get('/').get_data(as_text=True)
+
+        assert server.renderer == 'webgl'
+        assert '"renderer": "webgl"' in html
+        assert 'addon-webgl' in html
+        assert 'willReadFrequently' not in html
+
+        with pytest.raises(ValueError):
+            TerminalServer(renderer='vulkan')
+
+    def test_dom_renderer_skips_webgl_addon(self):
+        """Test the WebGL addon is only loaded when it may be used"""
+        server = TerminalServer(renderer='dom')
+        html = server.app.test_client().get('/').get_data(as_text=True)
+
+        assert 'addon-webgl' not in html
+
+    def test_predictive_echo_option(self):
+        """Test predictive echo is off by default and handed to the page when enabled"""
+        assert TerminalServer()._get_client_config()['predictiveEcho'] is False
+
+        server = TerminalServer(predictive_echo=True)
+        html = server.app.test_client().get('/').get_data(as_text=True)
+
+        assert '"predictiveEcho": true' in html
+        assert 'class PredictiveEcho' in html
+
+    def test_websocket_transport_option(self):
+        """Test the page skips the socket.io client when it uses the raw WebSocket"""
+        server = TerminalServer(transport='websocket')
+        html = server.app.test_client().get('/').get_data(as_text=True)
+
+        assert '"transport": "websocket"' in html
+        assert 'class RawSocket' in html
+        assert 'socket.io.min.js' not in html
+
+        with pytest.raises(ValueError):
+            TerminalServer(transport='polling')
+
+    def test_benchmark_page(self):
+        """Test the render benchmark page is served"""
+        server = TerminalServer()
+        html = server.app.test_client().get('/benchmark').get_data(as_text=True)
+
+        assert 'benchmarkResults' in html
+        assert 'chooseRenderer' in html
+
+    def test_viewer_send_targets_client(self):
+        """Test a viewer's output is emitted only to its own client"""
+        server = TerminalServer()
+        server.socketio = Mock()
+        viewer = server._add_viewer('sid1')
+
+        server._handle_output(b"caf\xc3")
+        viewer._send(viewer.next_batch(server._snapshot, timeout=0))
+
+        server.socketio.emit.assert_called_once_with(
+            "pty-output", {"output": b"caf\xc3", "n": 4}, namespace="/pty", to='sid1'
+        )
+
+    def test_flow_control_pauses_and_resumes(self):
+        """Test reads pause above the high watermark until acks drain below the low one"""
+        server = TerminalServer()
+        server.socketio = Mock()
+        viewer = server._add_viewer('owner')
+
+        server._handle_output(b"x" * (server.FLOW_HIGH_WATERMARK + 1))
+        assert server._is_output_paused() is True
+
+        viewer.next_batch(server._snapshot, timeout=0)
+        viewer.acknowledge(server.FLOW_HIGH_WATERMARK - server.FLOW_LOW_WATERMARK)
+        assert server._is_output_paused() is True
+
+        viewer.acknowledge(server.FLOW_LOW_WATERMARK)
+        assert server._is_output_paused() is False
+
+    def test_flow_control_without_clients(self):
+        """Test output is not held back when no page is connected"""
+        server = TerminalServer()
+        server.socketio = Mock()
+
+        server._handle_output(b"x" * (server.FLOW_HIGH_WATERMARK + 1))
+
+        assert server._is_output_paused() is False
+
+    def test_flow_control_ignores_read_only_viewers(self):
+        """Test a lagging observer never pauses the session"""
+        server = TerminalServer()
+        server.socketio = Mock()
+        server._add_viewer('observer', read_only=True)
+
+        server._handle_output(b"x" * (server.FLOW_HIGH_WATERMARK + 1))
+
+        assert server._is_output_paused() is False
+        assert server._is_read_only('observer') is True
+
+    def test_flow_control_disabled(self):
+        """Test flow control can be turned off"""
+        server = TerminalServer(flow_control=False)
+        server.socketio = Mock()
+        server._add_viewer('owner')
+
+        server._handle_output(b"x" * (server.FLOW_HIGH_WATERMARK + 1))
+
+        assert server._is_output_paused() is False
+
+    def test_late_viewer_gets_snapshot(self):
+        """Test a client joining a running session starts from a snapshot"""
+        server = TerminalServer()
+        server.socketio = Mock()
+        server._handle_output(b"$ make\r\nok\r\n")
+
+        viewer = server._add_viewer('late')
+
+        assert viewer.next_batch(server._snapshot, timeout=0) == b"\x1bc$ make\r\nok\r\n"
+
+    def test_resync_keeps_output_of_overflowing_chunk(self):
+        """Test the chunk that overflows a viewer reaches it through the snapshot"""
+        server = TerminalServer()
+        server.socketio = Mock()
+        viewer = server._add_viewer('slow')
+        viewer.max_queued_bytes = 4
+        sent = []
+        push = viewer.push
+
+        def push_and_resync(data, end=None):
+            # The sender resyncs while the reader is still handling the chunk
+            push(data, end)
+            sent.append(viewer.next_batch(server._snapshot, timeout=0))
+
+        viewer.push = push_and_resync
+        server._handle_output(b"12345\r\nlast")
+
+        assert sent == [b"\x1bc12345\r\nlast"]
+        assert viewer.next_batch(server._snapshot, timeout=0) == b""
+
+    def test_read_only_url(self):
+        """Test the observer URL"""
+        server = TerminalServer(port=8080, host='localhost')
+
+        assert server.get_url(read_only=True) == "http://localhost:8080/?readonly=1"
+
     @patch('viloxtermjs.server.struct.pack')
     @patch('viloxtermjs.server.fcntl.ioctl')
     def test_set_winsize(self, mock_ioctl, mock_pack):
@@ -109,6 +254,7 @@ class TestTerminalServer:
         """Test starting an already running server"""
         server = TerminalServer(port=5000)
         server.running = True
+        server._http_server = Mock()
         
         port = server.start()
         
@@ -172,6 +318,32 @@ class TestTerminalServer:
         # Since the method runs forever, we test its components
         assert server.running is True
         
+    def test_read_available_coalesces(self):
+        """Test ready output is drained into one buffer, up to its size"""
+        read_fd, write_fd = os.pipe()
+        try:
+            for _ in range(3):
+                os.write(write_fd, b"x" * 1000)
+            buffer = memoryview(bytearray(2500))
+            
+            assert TerminalServer._read_available(read_fd, buffer) == 2500
+            assert TerminalServer._read_available(read_fd, buffer) == 500
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+            
+    def test_handle_output_accepts_memoryview(self):
+        """Test a view over the reader's buffer is copied before it is kept"""
+        server = TerminalServer()
+        buffer = bytearray(b"hello\n")
+        
+        server._handle_output(memoryview(buffer))
+        buffer[:] = b"XXXXX\n"
+        
+        assert server.scrollback.lines(0, 1) == ["hello"]
+        assert bytes(server._recent_output) == b"hello\n"
+        assert server.output_bytes == 6
+        
     def test_dynamic_port_allocation(self):
         """Test that port 0 gets dynamically allocated"""
         server = TerminalServer(port=0)
@@ -0,0 +1,102 @@
+"""
+Tests for the SessionLog store
+"""
+from unittest.mock import Mock
+from viloxtermjs.sessionlog import SessionLog
+from viloxtermjs.server import TerminalServer
+
+
+class TestSessionLog:
+    """Test suite for SessionLog"""
+
+    def test_lines_across_chunks(self, tmp_path):
+        """Test lines are indexed correctly when chunks split them"""
+        log = SessionLog(str(tmp_path), "abc")
+        log.append(b"first li")
+        log.append(b"ne\nsecond\nthi")
+        log.append(b"rd\n")
+
+        assert log.line_count == 3
+        assert log.lines(0, 3) == ["first line", "second", "third"]
+        assert log.lines(1, 2) == ["second"]
+        assert log.lines(2, 100) == ["third"]
+        assert log.lines(5, 10) == []
+
+    def test_partial_last_line(self, tmp_path):
+        """Test a trailing line without newline is readable"""
+        log = SessionLog(str(tmp_path), "abc")
+        log.append(b"one\ntwo")
+
+        assert log.line_count == 2
+        assert log.lines(0, 2) == ["one", "two"]
+
+    def test_large_slice(self, tmp_path):
+        """Test slicing deep into a large log"""
+        log = SessionLog(str(tmp_path), "big")
+        for block in range(100):
+            log.append(b"".join(b"line %d\n" % (block * 1000 + i) for i in range(1000)))
+
+        assert log.line_count == 100000
+        assert log.lines(54321, 54324) == ["line 54321", "line 54322", "line 54323"]
+
+    def test_search(self, tmp_path):
+        """Test regex search reports line numbers and offsets"""
+        log = SessionLog(str(tmp_path), "abc")
+        log.append(b"ok\nBUILD FAILED: x\nok\nBUILD FAILED: y\n")
+
+        hits = list(log.search(r"BUILD FAILED: (\w)"))
+
+        assert [(line, text) for line, _, text in hits] == [
+            (1, "BUILD FAILED: x"),
+            (3, "BUILD FAILED: y"),
+        ]
+        assert hits[0][1] == 3
+        assert len(list(log.search(b"FAILED", limit=1))) == 1
+        assert list(log.search("missing")) == []
+
+    def test_line_at_time(self, tmp_path):
+        """Test the time index maps timestamps to lines"""
+        log = SessionLog(str(tmp_path), "abc")
+        log.append(b"a\nb\n", timestamp=100.0)
+        log.append(b"c\n", timestamp=200.0)
+        log.append(b"d\n", timestamp=300.0)
+
+        assert log.line_at_time(50.0) == 0
+        assert log.line_at_time(150.0) == 2
+        assert log.line_at_time(300.0) == 3
+        assert log.line_at_time(400.0) == 4
+
+    def test_reopen_continues_index(self, tmp_path):
+        """Test reopening an existing log appends to it"""
+        log = SessionLog(str(tmp_path), "abc")
+        log.append(b"one\ntw")
+        log.close()
+
+        log = SessionLog(str(tmp_path), "abc")
+        log.append(b"o\nthree\n")
+
+        assert log.lines(0, 3) == ["one", "two", "three"]
+        assert log.read_bytes(4, 7) == b"two"
+
+
+class TestServerSessionLog:
+    """Test the TerminalServer session log API"""
+
+    def test_output_is_logged(self, tmp_path):
+        """Test PTY output is appended to the session log"""
+        server = TerminalServer(log_dir=str(tmp_path), session_id="s1")
+        server.socketio = Mock()
+        server.session_log = SessionLog(str(tmp_path), server.session_id)
+
+        server._handle_output(b"hello\nworld\n")
+
+        assert server.read_log_lines(0, 2) == ["hello", "world"]
+        assert [line for line, _, _ in server.search_log("wor")] == [1]
+
+    def test_no_log_configured(self):
+        """Test log API is empty when logging is disabled"""
+        server = TerminalServer()
+
+        assert server.session_log is None
+        assert server.read_log_lines(0, 10) == []
+        assert list(server.search_log("x")) == []
@@ -0,0 +1,96 @@
+"""
+Tests for OSC 133 shell integration
+"""
+import os
+import time
+import shutil
+import pytest
+from viloxtermjs.shellintegration import CommandTracker
+from viloxtermjs.server import TerminalServer
+
+A, B, C = b"\x1b]133;A\x07", b"\x1b]133;B\x07", b"\x1b]133;C\x07"
+
+
+def D(code):
+    return b"\x1b]133;D;%d\x07" % code
+
+
+class TestCommandTracker:
+    """Test suite for CommandTracker"""
+
+    def test_command_is_indexed(self):
+        """Test a command's text, exit code, timing and output offsets"""
+        tracker = CommandTracker()
+        stream = A + b"$ " + B + b"make\r\n" + C + b"error\r\n" + D(2) + A + b"$ " + B
+
+        tracker.feed(stream[:20], 0, timestamp=10.0)
+        tracker.feed(stream[20:], 20, timestamp=12.5)
+
+        [command] = tracker.commands()
+        assert command["command"] == "make"
+        assert command["exit_code"] == 2
+        assert command["start"] == 12.5
+        assert command["duration"] == 0.0
+        assert stream[command["output_start"]:command["output_end"]] == b"error\r\n"
+        assert tracker.running is None
+
+    def test_marks_split_across_chunks(self):
+        """Test marks split at every possible point are still recognised"""
+        stream = A + B + b"ls\r\n" + C + b"out\r\n" + D(0) + A + B + b"x\r\n" + C
+        for split in range(1, len(stream)):
+            tracker = CommandTracker()
+            tracker.feed(stream[:split], 0, timestamp=1.0)
+            tracker.feed(stream[split:], split, timestamp=2.0)
+
+            first, second = tracker.commands()
+            assert first["command"] == "ls", split
+            assert stream[first["output_start"]:first["output_end"]] == b"out\r\n"
+            assert second["command"] == "x"
+            assert tracker.running["index"] == 1
+
+    def test_history_is_bounded(self):
+        """Test old commands are dropped but indexes stay absolute"""
+        tracker = CommandTracker(max_commands=2)
+        for i in range(5):
+            tracker.feed(B + b"c%d\n" % i + C + D(0), 0)
+
+        assert [c["index"] for c in tracker.commands()] == [3, 4]
+        assert tracker.get(0) is None
+        assert tracker.get(4)["command"] == "c4"
+
+
+@pytest.mark.skipif(shutil.which('bash') is None, reason="needs bash")
+class TestServerShellIntegration:
+    """Test shell integration with a real bash"""
+
+    def test_commands_are_tracked(self, tmp_path, monkeypatch):
+        """Test bash reports commands, exit codes and output"""
+        monkeypatch.setenv('HOME', str(tmp_path))
+        server = TerminalServer(command='bash', shell_integration=True)
+        server.running = True
+        server._spawn()
+        rcfile = server._rcfile
+        try:
+            os.write(server.fd, b"echo hello\n")
+            os.write(server.fd, b"sh -c 'exit 4'\n")
+            deadline = time.monotonic() + 10
+            while len([c for c in server.commands() if c["end"]]) < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+
+            first, second = server.commands()[:2]
+            assert first["command"] == "echo hello"
+            assert first["exit_code"] == 0
+            assert server.command_output(0) == b"hello\r\n"
+            assert second["exit_code"] == 4
+        finally:
+            server.stop()
+        assert not os.path.exists(rcfile)
+
+    def test_disabled_by_default(self):
+        """Test no integration arguments are added unless requested"""
+        server = TerminalServer(command='bash')
+
+        assert server._shell_integration_args() == []
+        assert server.commands() == []
+        assert server.command_output(0) is None
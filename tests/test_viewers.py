@@ -0,0 +1,166 @@
+"""
+Tests for per-viewer output queues
+"""
+import threading
+from unittest.mock import Mock
+from viloxtermjs.viewers import Viewer, ViewerSet
+
+
+def snapshot():
+    return b"SNAPSHOT"
+
+
+class TestViewer:
+    """Test suite for Viewer"""
+
+    def test_batches_queued_output(self):
+        """Test queued chunks are sent as one batch"""
+        viewer = Viewer('a', Mock())
+        viewer.push(b"one ")
+        viewer.push(b"two")
+
+        assert viewer.backlog == 7
+        assert viewer.next_batch(snapshot, timeout=0) == b"one two"
+        assert viewer.next_batch(snapshot, timeout=0) == b""
+
+    def test_overflow_resyncs_from_snapshot(self):
+        """Test a viewer that falls behind skips to a snapshot"""
+        viewer = Viewer('a', Mock(), max_queued_bytes=10)
+        viewer.push(b"12345")
+        viewer.push(b"678901")
+        viewer.push(b"more")
+
+        assert viewer.dropped_bytes == 15
+        assert viewer.next_batch(snapshot, timeout=0) == b"SNAPSHOT"
+        viewer.push(b"after")
+        assert viewer.next_batch(snapshot, timeout=0) == b"after"
+
+    def test_snapshot_covers_output_pushed_later(self):
+        """Test output recorded before a snapshot but pushed after it is not sent twice"""
+        viewer = Viewer('a', Mock())
+        viewer.request_snapshot()
+
+        assert viewer.next_batch(lambda: (b"SNAPSHOT", 10), timeout=0) == b"SNAPSHOT"
+        viewer.push(b"in snapshot", end=10)
+        viewer.push(b"new", end=13)
+        assert viewer.next_batch(snapshot, timeout=0) == b"new"
+
+    def test_window_holds_back_until_ack(self):
+        """Test nothing is sent while the unacked window is full"""
+        viewer = Viewer('a', Mock(), window_bytes=4)
+        viewer.push(b"abcd")
+        assert viewer.next_batch(snapshot, timeout=0) == b"abcd"
+
+        viewer.push(b"ef")
+        assert viewer.next_batch(snapshot, timeout=0) == b""
+
+        viewer.acknowledge(4)
+        assert viewer.next_batch(snapshot, timeout=0) == b"ef"
+
+    def test_run_sends_until_closed(self):
+        """Test the sender loop delivers output and exits on close"""
+        sent = []
+        viewer = Viewer('a', sent.append, window_bytes=0)
+        sender = threading.Thread(target=viewer.run, args=(snapshot,))
+        sender.start()
+
+        viewer.push(b"hello")
+        for _ in range(100):
+            if sent:
+                break
+            threading.Event().wait(0.01)
+        viewer.close()
+        sender.join(1)
+
+        assert sent == [b"hello"]
+        assert not sender.is_alive()
+
+    def test_collapses_floods_into_paced_frames(self):
+        """Test a flood is cut down by the collapse hook and frames are paced"""
+        sent = []
+        first_frame = threading.Event()
+
+        def send(data):
+            sent.append(data)
+            first_frame.set()
+
+        viewer = Viewer('sid', send, collapse=lambda data: data[-10:], frame_interval=0.2)
+        viewer.push(b"x" * (Viewer.COLLAPSE_BYTES + 1))
+
+        assert viewer.backlog == 10
+        assert viewer.skipped_bytes == Viewer.COLLAPSE_BYTES - 9
+
+        thread = threading.Thread(target=viewer.run, args=(snapshot,))
+        thread.start()
+        assert first_frame.wait(1)
+        viewer.push(b"next")
+        thread.join(0.1)
+        assert sent == [b"x" * 10]
+
+        viewer.close()
+        thread.join(1)
+        assert not thread.is_alive()
+
+    def test_collapse_keeps_output_it_cannot_cut(self):
+        """Test output is passed through when the collapse hook declines"""
+        viewer = Viewer('sid', Mock(), collapse=lambda data: None)
+        data = b"y" * (Viewer.COLLAPSE_BYTES + 1)
+        viewer.push(data)
+
+        assert viewer.next_batch(snapshot) == data
+        assert viewer.skipped_bytes == 0
+
+    def test_suspended_viewer_catches_up_on_resume(self):
+        """Test output is held while suspended and sent in one batch after"""
+        viewer = Viewer('a', Mock())
+        viewer.suspend()
+        viewer.push(b"one ")
+        viewer.push(b"two")
+
+        assert viewer.next_batch(snapshot, timeout=0) == b""
+        viewer.resume()
+        assert viewer.next_batch(snapshot, timeout=0) == b"one two"
+
+    def test_suspended_viewer_resyncs_after_overflow(self):
+        """Test a viewer that was hidden through too much output gets a snapshot"""
+        viewer = Viewer('a', Mock(), max_queued_bytes=10)
+        viewer.suspend()
+        viewer.push(b"x" * 20)
+        viewer.resume()
+
+        assert viewer.next_batch(snapshot, timeout=0) == b"SNAPSHOT"
+
+
+class TestViewerSet:
+    """Test suite for ViewerSet"""
+
+    def test_fan_out_and_owner_backlog(self):
+        """Test output reaches every viewer but only owners count as backlog"""
+        viewers = ViewerSet()
+        owner = Viewer('owner', Mock())
+        observer = Viewer('observer', Mock(), read_only=True)
+        viewers.add(owner)
+        viewers.add(observer)
+
+        viewers.push(b"data")
+        observer.push(b"more")
+
+        assert owner.backlog == 4
+        assert observer.backlog == 8
+        assert viewers.owner_backlog() == 4
+
+        viewers.remove('owner')
+        assert owner.closed is True
+        assert viewers.owner_backlog() == 0
+        assert len(viewers) == 1
+
+    def test_suspended_owner_is_not_backlog(self):
+        """Test a hidden owner does not hold the PTY back"""
+        viewers = ViewerSet()
+        owner = Viewer('owner', Mock())
+        viewers.add(owner)
+        owner.suspend()
+        viewers.push(b"data")
+
+        assert owner.backlog == 4
+        assert viewers.owner_backlog() == 0
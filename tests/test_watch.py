@@ -0,0 +1,145 @@
+"""
+Tests for output pattern watches
+"""
+import re
+import threading
+from unittest.mock import Mock
+from viloxtermjs.watch import PatternWatcher
+from viloxtermjs.server import TerminalServer
+
+
+def collect(watcher, pattern, **kwargs):
+    found = []
+    watcher.watch(pattern, lambda match: found.append(match.group(0)), **kwargs)
+    return found
+
+
+class TestPatternWatcher:
+    """Test suite for PatternWatcher"""
+
+    def test_multiple_patterns(self):
+        """Test each pattern's callback gets its own matches"""
+        watcher = PatternWatcher()
+        failures = collect(watcher, r"BUILD FAILED: \w+")
+        prompts = collect(watcher, r"[Pp]assword:", flags=re.IGNORECASE)
+
+        watcher.feed(b"ok\nBUILD FAILED: core\n[sudo] PASSWORD: ")
+        watcher.close()
+
+        assert failures == [b"BUILD FAILED: core"]
+        assert prompts == [b"PASSWORD:"]
+
+    def test_match_straddles_chunks(self):
+        """Test a match split across chunks, and by escapes, is found once"""
+        watcher = PatternWatcher()
+        found = collect(watcher, "BUILD FAILED")
+
+        watcher.feed(b"x BUILD FA")
+        watcher.feed(b"\x1b[1;31mILED\x1b[0m")
+        watcher.feed(b" more output")
+        watcher.close()
+
+        assert found == [b"BUILD FAILED"]
+
+    def test_groups_belong_to_pattern(self):
+        """Test match groups are numbered as in the watched pattern"""
+        watcher = PatternWatcher()
+        codes = []
+        collect(watcher, r"(warn)")
+        watcher.watch(r"exit (\d+)", lambda match: codes.append(match.group(1)))
+
+        watcher.feed(b"warn exit 3\n")
+        watcher.close()
+
+        assert codes == [b"3"]
+
+    def test_overlapping_patterns_all_fire(self):
+        """Test a pattern matching inside another pattern's match still fires"""
+        watcher = PatternWatcher()
+        builds = collect(watcher, "BUILD FAILED")
+        failures = collect(watcher, "FAILED")
+
+        watcher.feed(b"BUILD FAILED\n")
+        watcher.close()
+
+        assert builds == [b"BUILD FAILED"]
+        assert failures == [b"FAILED"]
+
+    def test_numbered_backreference(self):
+        """Test backreferences keep their numbers next to other patterns with groups"""
+        watcher = PatternWatcher()
+        collect(watcher, r"(x)")
+        repeats = collect(watcher, r"(ab)\1")
+
+        watcher.feed(b"x abab")
+        watcher.close()
+
+        assert repeats == [b"abab"]
+
+    def test_greedy_match_reported_once(self):
+        """Test a match that grows into the next chunk is not reported again"""
+        watcher = PatternWatcher()
+        found = collect(watcher, r"\d+")
+
+        watcher.feed(b"x 12")
+        watcher.feed(b"34 y 5")
+        watcher.close()
+
+        assert found == [b"12", b"5"]
+
+    def test_inline_global_flags(self):
+        """Test a pattern starting with (?i) can be watched next to others"""
+        watcher = PatternWatcher()
+        builds = collect(watcher, "(?i)build failed")
+        errors = collect(watcher, "error")
+        handle = watcher.watch("x", Mock())
+
+        assert watcher.unwatch(handle) is True
+        watcher.feed(b"BUILD FAILED, error\n")
+        watcher.close()
+
+        assert builds == [b"BUILD FAILED"]
+        assert errors == [b"error"]
+
+    def test_unwatch(self):
+        """Test callbacks stop after unwatch"""
+        watcher = PatternWatcher()
+        callback = Mock()
+        handle = watcher.watch("x", callback)
+
+        assert watcher.unwatch(handle) is True
+        assert watcher.unwatch(handle) is False
+        watcher.feed(b"x")
+        watcher.close()
+
+        callback.assert_not_called()
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test feed() never blocks when the worker is stuck"""
+        watcher = PatternWatcher(max_queued_chunks=2)
+        release = threading.Event()
+        watcher.watch("x", lambda match: release.wait(5))
+
+        for _ in range(10):
+            watcher.feed(b"x")
+
+        assert watcher.dropped_chunks > 0
+        release.set()
+        watcher.close()
+
+
+class TestServerWatch:
+    """Test the TerminalServer watch API"""
+
+    def test_watch_output(self):
+        """Test watches see the output forwarded to viewers"""
+        server = TerminalServer()
+        server.socketio = Mock()
+        found = []
+        handle = server.watch("done", lambda match: found.append(match.group(0)))
+
+        server._handle_output(b"all done\n")
+        server._watcher.close()
+
+        assert found == [b"done"]
+        assert server.unwatch(handle) is True
@@ -84,6 +84,49 @@ class TestTerminalWidget:
         # Check signal was emitted
         assert len(signal_emitted) == 1
         
+    @patch('viloxtermjs.widget.TerminalServer')
+    def test_visibility_reaches_session(self, mock_server, qapp):
+        """Test the session hears when the widget is shown, hidden or focused"""
+        from viloxtermjs.widget import TerminalWidget
+        
+        mock_server_instance = Mock()
+        mock_server_instance.start.return_value = 12345
+        mock_server.return_value = mock_server_instance
+        
+        widget = TerminalWidget()
+        mock_server_instance.set_visible.assert_called_once_with(False)
+        
+        widget.show()
+        mock_server_instance.set_visible.assert_called_with(True)
+        
+        widget.hide()
+        mock_server_instance.set_visible.assert_called_with(False)
+        
+        widget._on_focus_changed(None, widget.web_view)
+        mock_server_instance.set_focused.assert_called_once_with(True)
+        widget._on_focus_changed(widget.web_view, None)
+        mock_server_instance.set_focused.assert_called_with(False)
+        widget.close_terminal()
+        
+    @patch('viloxtermjs.widget.TerminalServer')
+    def test_accepts_only_own_downloads(self, mock_server, qapp):
+        """Test downloads are saved only when they come from this terminal's page"""
+        from viloxtermjs.widget import TerminalWidget
+        
+        mock_server.return_value.start.return_value = 12345
+        widget = TerminalWidget()
+        
+        own = Mock()
+        own.page.return_value = widget.web_view.page()
+        widget._on_download_requested(own)
+        own.accept.assert_called_once()
+        
+        foreign = Mock()
+        foreign.page.return_value = object()
+        widget._on_download_requested(foreign)
+        foreign.accept.assert_not_called()
+        widget.close_terminal()
+        
     @patch('viloxtermjs.widget.TerminalServer')
     def test_get_command(self, mock_server, qapp):
         """Test getting the command"""
@@ -113,4 +156,54 @@ class TestTerminalWidget:
         # Layout should have error message
         layout = widget.layout()
         assert layout is not None
-        assert layout.count() > 1  # QWebEngineView + error label
\ No newline at end of file
+        assert layout.count() > 1  # QWebEngineView + error label
+
+    @patch('viloxtermjs.widget.TerminalServer')
+    def test_server_options_forwarded(self, mock_server, qapp):
+        """Test extra keyword arguments are passed to TerminalServer"""
+        from viloxtermjs.widget import TerminalWidget
+        
+        mock_server_instance = Mock()
+        mock_server_instance.start.return_value = 12345
+        mock_server.return_value = mock_server_instance
+        
+        TerminalWidget(renderer='webgl')
+        
+        assert mock_server.call_args.kwargs['renderer'] == 'webgl'
+        
+    @patch('viloxtermjs.widget.TerminalServer')
+    def test_session_pool(self, mock_server, qapp):
+        """Test the server is created through the session pool when given"""
+        from viloxtermjs.widget import TerminalWidget
+        
+        pool = Mock()
+        pool.create_session.return_value.start.return_value = 12345
+        
+        widget = TerminalWidget(command='zsh', session_pool=pool)
+        
+        mock_server.assert_not_called()
+        pool.create_session.assert_called_once_with(
+            port=0, host='127.0.0.1', command='zsh', cmd_args=''
+        )
+        assert widget.terminal_server is pool.create_session.return_value
+        
+    @patch('viloxtermjs.widget.TerminalServer')
+    def test_child_exit_closes_terminal(self, mock_server, qapp):
+        """Test the widget closes and reports the code when the process exits"""
+        from viloxtermjs.widget import TerminalWidget
+        
+        mock_server_instance = Mock()
+        mock_server_instance.start.return_value = 12345
+        mock_server.return_value = mock_server_instance
+        
+        widget = TerminalWidget()
+        exit_callback = mock_server_instance.add_exit_callback.call_args.args[0]
+        exited = []
+        widget.terminal_exited.connect(exited.append)
+        
+        exit_callback(3)
+        qapp.processEvents()
+        
+        assert exited == [3]
+        assert widget.terminal_server is None
+        mock_server_instance.stop.assert_called_once()
@@ -0,0 +1,103 @@
+"""
+Tests for the raw WebSocket terminal protocol
+"""
+import json
+import struct
+import pytest
+import simple_websocket
+from viloxtermjs import wsprotocol
+from viloxtermjs.server import TerminalServer
+
+
+class TestFraming:
+    """Test suite for encoding and decoding messages"""
+
+    def test_decodes_page_messages(self):
+        """Test each opcode from the page is decoded"""
+        assert wsprotocol.decode(b"\x00h\xc3\xa9") == (wsprotocol.INPUT, "hé")
+        assert wsprotocol.decode(b"\x01" + struct.pack(">HH", 24, 80)) == (wsprotocol.RESIZE, (24, 80))
+        assert wsprotocol.decode(b"\x02" + struct.pack(">I", 70000)) == (wsprotocol.ACK, 70000)
+        assert wsprotocol.decode(b'\x03{"id": 1}') == (wsprotocol.CALL, {"id": 1})
+
+    def test_rejects_malformed_messages(self):
+        """Test unknown opcodes, short payloads, non-object calls and text messages raise ValueError"""
+        for message in (b"\x7fx", b"\x01\x00", b"\x03[1,2]", b"\x03null", b"", "text"):
+            with pytest.raises(ValueError):
+                wsprotocol.decode(message)
+
+    def test_encodes_output(self):
+        """Test plain and compressed output frames"""
+        assert wsprotocol.encode_output({"output": b"hi", "n": 2}) == b"\x10hi"
+        assert wsprotocol.encode_output({"z": b"zz", "n": 300}) == b"\x11\x00\x00\x01\x2czz"
+        assert wsprotocol.encode_exit(None) == b"\x12null"
+
+
+class TestWebSocketEndpoint:
+    """Test suite for sessions served over /ws"""
+
+    def test_session_over_websocket(self):
+        """Test input, resize, output and calls over the raw WebSocket"""
+        server = TerminalServer(command='cat')
+        ws = simple_websocket.Client.connect(f"ws://127.0.0.1:{server.start()}/ws")
+        try:
+            ws.send(b"\x01" + struct.pack(">HH", 10, 40))
+            ws.send(b"\x00hello\n")
+            output = b""
+            while output.count(b"hello") < 2:
+                message = ws.receive(5)
+                assert message[0] == wsprotocol.OUTPUT
+                output += message[1:]
+            assert (server.rows, server.cols) == (10, 40)
+
+            ws.send(b"\x03" + json.dumps({"id": 7, "name": "commands", "args": {}}).encode())
+            assert ws.receive(5) == b'\x13{"id": 7, "result": []}'
+
+            # Malformed calls are answered or ignored without closing the connection
+            ws.send(b"\x03[1,2]")
+            ws.send(b"\x03" + json.dumps({"id": 8, "name": "commands", "args": [1]}).encode())
+            assert ws.receive(5) == b'\x13{"id": 8, "result": null}'
+        finally:
+            ws.close()
+            server.stop()
+
+    def test_read_only_websocket(self):
+        """Test a read-only page sees output but cannot type or resize"""
+        server = TerminalServer(command='cat')
+        port = server.start()
+        owner = simple_websocket.Client.connect(f"ws://127.0.0.1:{port}/ws")
+        observer = simple_websocket.Client.connect(f"ws://127.0.0.1:{port}/ws?readonly=1")
+        try:
+            observer.send(b"\x00ignored\n")
+            observer.send(b"\x01" + struct.pack(">HH", 5, 5))
+            owner.send(b"\x00typed\n")
+            output = b""
+            while b"typed\r\n" not in output:
+                output += observer.receive(5)[1:]
+
+            assert b"ignored" not in output
+            assert (server.rows, server.cols) != (5, 5)
+        finally:
+            owner.close()
+            observer.close()
+            server.stop()
+
+    def test_stop_closes_websocket(self):
+        """Test a raw WebSocket page sees the connection close when the server stops"""
+        server = TerminalServer(command='cat')
+        ws = simple_websocket.Client.connect(f"ws://127.0.0.1:{server.start()}/ws")
+        try:
+            ws.send(b"\x00hi\n")
+            while b"hi" not in ws.receive(5):
+                pass
+            server.stop()
+
+            with pytest.raises(simple_websocket.ConnectionClosed):
+                # None once nothing arrived for 5 s
+                while ws.receive(5) is not None:
+                    pass
+            assert not ws.connected
+            assert server._websockets == {}
+        finally:
+            if ws.connected:
+                ws.close()
+            server.stop()
@@ -0,0 +1,69 @@
+"""
+Tests for spawning sessions through the zygote process
+"""
+import os
+import time
+import pytest
+from viloxtermjs.server import TerminalServer
+from viloxtermjs.zygote import ZygoteClient
+
+
+@pytest.fixture(scope="module")
+def zygote():
+    client = ZygoteClient()
+    yield client
+    client.close()
+
+
+def parent_pid(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        return int(f.read().rsplit(")", 1)[1].split()[1])
+
+
+class TestZygote:
+    """Test suite for ZygoteClient and TerminalServer(zygote=...)"""
+
+    def test_session_is_forked_by_zygote(self, zygote):
+        """Test the child belongs to the zygote and its PTY works from here"""
+        server = TerminalServer(command='cat', zygote=zygote)
+        try:
+            pid = server.spawn(rows=10, cols=40)
+            assert parent_pid(pid) == zygote.pid
+
+            server.send("hello\n")
+            server.wait_for("hello\r\nhello\r\n", timeout=5)
+        finally:
+            server.stop()
+        assert server.child_pid is None
+
+    def test_exit_code_is_reported(self, zygote):
+        """Test exit codes and exec failures come back from the zygote"""
+        for cmd_args, expected in (("-c 'exit 3'", 3), ("-c 'exec /nonexistent'", 127)):
+            server = TerminalServer(command='sh', cmd_args=cmd_args, zygote=zygote)
+            codes = []
+            server.add_exit_callback(codes.append)
+            server.spawn()
+            deadline = time.monotonic() + 5
+            while not codes and time.monotonic() < deadline:
+                time.sleep(0.01)
+            server.stop()
+            assert codes == [expected]
+
+    def test_resize_reaches_session(self, zygote):
+        """Test the received master fd controls the window size"""
+        server = TerminalServer(command='sh', cmd_args="-c 'read x; stty size'", zygote=zygote)
+        try:
+            server.spawn(rows=10, cols=40)
+            server.resize(30, 100)
+            server.send("\r")
+            server.wait_for("30 100", timeout=5)
+        finally:
+            server.stop()
+
+    def test_zygote_exits_with_client(self):
+        """Test closing the client ends the zygote and removes its socket"""
+        client = ZygoteClient()
+        client.close()
+
+        assert client._process.poll() == 0
+        assert not os.path.exists(client.socket_path)
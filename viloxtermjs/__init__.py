@@ -20,28 +20,54 @@ __version__ = "0.1.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .widget import TerminalWidget
-from .server import TerminalServer
+import os
+import sys
+import importlib
+
+__all__ = ['TerminalWidget', 'NativeTerminalWidget', 'TerminalServer', 'SessionPool']
+
+# Public classes are imported on first access (PEP 562), so `import viloxtermjs`
+# stays cheap and server-only users never load PySide6/QtWebEngine
+_LAZY_ATTRIBUTES = {
+    'TerminalWidget': '.widget',
+    'NativeTerminalWidget': '.native',
+    'TerminalServer': '.server',
+    'SessionPool': '.pool',
+}
+
 
-__all__ = ['TerminalWidget', 'TerminalServer']
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 # Environment setup for WSL/VM compatibility
-import os
-import sys
 
-def setup_environment():
-    """Setup environment variables for better compatibility in WSL/VM"""
+def setup_environment(use_gpu=False):
+    """Setup environment variables for better compatibility in WSL/VM
+
+    With use_gpu=True the software rendering overrides are skipped so that
+    QtWebEngine can use the GPU, which the WebGL terminal renderer needs.
+    """
     # Only set if not already set by user
-    if 'QT_OPENGL' not in os.environ:
+    if not use_gpu and 'QT_OPENGL' not in os.environ:
         os.environ['QT_OPENGL'] = 'software'
-    if 'QT_QUICK_BACKEND' not in os.environ:
+    if not use_gpu and 'QT_QUICK_BACKEND' not in os.environ:
         os.environ['QT_QUICK_BACKEND'] = 'software'
     if 'QTWEBENGINE_DISABLE_SANDBOX' not in os.environ:
         os.environ['QTWEBENGINE_DISABLE_SANDBOX'] = '1'
-    if 'QTWEBENGINE_CHROMIUM_FLAGS' not in os.environ:
+    if not use_gpu and 'QTWEBENGINE_CHROMIUM_FLAGS' not in os.environ:
         os.environ['QTWEBENGINE_CHROMIUM_FLAGS'] = '--use-angle=swiftshader --disable-gpu-driver-bug-workarounds'
 
 # Auto-setup environment on import for better out-of-box experience
-# Users can disable by setting VILOXTERMJS_NO_AUTO_SETUP=1
+# Users can disable by setting VILOXTERMJS_NO_AUTO_SETUP=1, or keep GPU
+# rendering enabled by setting VILOXTERMJS_GPU=1
 if os.environ.get('VILOXTERMJS_NO_AUTO_SETUP') != '1':
-    setup_environment()
\ No newline at end of file
+    setup_environment(use_gpu=os.environ.get('VILOXTERMJS_GPU') == '1')
\ No newline at end of file
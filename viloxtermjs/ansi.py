@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+ANSI Stream Processing
+Bytes-level escape stripping and line splitting for raw PTY output
+
+Everything here works on whole chunks of bytes using the regex engine and
+bytes methods, so it can run inline on every chunk a session reads.
+"""
+import re
+
+# CSI, OSC, DCS/SOS/PM/APC strings and two/three byte escapes
+ANSI_ESCAPE = re.compile(
+    rb"\x1b(?:"
+    rb"\[[0-?]*[ -/]*[@-~]"
+    rb"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    rb"|[PX^_][^\x1b]*\x1b\\"
+    rb"|[ -/]*[0-OQ-WYZ\\`a-~]"
+    rb")"
+)
+# C0 controls and DEL, except tab and newline
+CONTROL_BYTES = bytes(range(0x00, 0x09)) + bytes(range(0x0b, 0x20)) + b"\x7f"
+CONTROL_BYTES_BUT_CR = CONTROL_BYTES.replace(b"\r", b"")
+# Unterminated escape sequences longer than this are dropped rather than carried
+MAX_PENDING_ESCAPE = 4096
+# An unterminated line is cut down to its last this many bytes
+MAX_PARTIAL_LINE = 64 * 1024
+
+
+def strip_ansi(data, keep_cr=False):
+    """Remove escape sequences and control characters from a complete chunk"""
+    if b"\x1b" in data:
+        data = ANSI_ESCAPE.sub(b"", data)
+    return data.translate(None, CONTROL_BYTES_BUT_CR if keep_cr else CONTROL_BYTES)
+
+
+class AnsiStripper:
+    """Incremental strip_ansi() that carries escapes split across chunks"""
+
+    def __init__(self, max_pending=MAX_PENDING_ESCAPE, keep_cr=False):
+        self.max_pending = max_pending
+        self.keep_cr = keep_cr
+        self._pending = b""
+
+    def feed(self, data):
+        """Return the printable text in ``data``, holding back a trailing partial escape"""
+        if self._pending:
+            data = self._pending + data
+            self._pending = b""
+        start = data.rfind(b"\x1b")
+        if start != -1 and not ANSI_ESCAPE.match(data, start):
+            if len(data) - start < self.max_pending:
+                self._pending = data[start:]
+            data = data[:start]
+        return strip_ansi(data, self.keep_cr)
+
+
+class LineSplitter:
+    """Splits a byte stream into lines, tracking line numbers and the current column
+
+    A carriage return starts the line over, as progress bars redraw it, so
+    a line keeps only what follows its last one. The unterminated line is
+    cut down to its last ``max_partial`` bytes.
+    """
+
+    def __init__(self, max_partial=MAX_PARTIAL_LINE):
+        self.max_partial = max_partial
+        self.line_count = 0
+        self._partial = bytearray()
+
+    @property
+    def partial(self):
+        """The current unterminated line"""
+        return bytes(self._partial).rstrip(b"\r")
+
+    @property
+    def column(self):
+        """Character column at the end of the current line"""
+        return len(self.partial.decode("utf-8", "replace"))
+
+    def feed(self, data):
+        """Return the lines completed by ``data``, without their newlines"""
+        if b"\n" not in data:
+            self._partial += data
+            self._trim()
+            return []
+        lines = data.split(b"\n")
+        if self._partial:
+            self._partial += lines[0]
+            lines[0] = bytes(self._partial)
+        self._partial = bytearray(lines.pop())
+        self._trim()
+        self.line_count += len(lines)
+        if b"\r" in data or b"\r" in lines[0]:
+            lines = [self._overwritten(line) for line in lines]
+        return lines
+
+    def _trim(self):
+        # A trailing CR is kept, it may be the first half of a CRLF
+        start = self._partial.rfind(b"\r", 0, len(self._partial) - 1) + 1
+        start = max(start, len(self._partial) - self.max_partial)
+        if start > 0:
+            del self._partial[:start]
+
+    @staticmethod
+    def _overwritten(line):
+        return line.rstrip(b"\r").rpartition(b"\r")[2]
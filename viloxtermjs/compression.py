@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Output Compression
+Per-viewer streaming zlib compression of pty-output frames
+"""
+import zlib
+
+COMPRESSIONS = (None, 'deflate')
+
+
+class OutputEncoder:
+    """Builds pty-output payloads, compressing frames above a size threshold
+
+    Compressed frames share one zlib stream per viewer, flushed with
+    Z_SYNC_FLUSH after every frame, so repeated output (prompts, log
+    prefixes) compresses against everything sent before it. Frames below
+    ``threshold`` - typically keystroke echoes - are sent as-is so they pay
+    no compression latency. Every payload carries ``n``, the uncompressed
+    size, which the page uses to keep both kinds of frame in order.
+    """
+
+    def __init__(self, compression=None, threshold=512, level=6):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}, not {compression!r}")
+        self.compression = compression
+        self.threshold = threshold
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._compressor = zlib.compressobj(level) if compression else None
+
+    def encode(self, data):
+        """Return the payload for one frame of output"""
+        self.bytes_in += len(data)
+        if self._compressor and len(data) >= self.threshold:
+            compressed = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.bytes_out += len(compressed)
+            return {"z": compressed, "n": len(data)}
+        self.bytes_out += len(data)
+        return {"output": data, "n": len(data)}
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+Session Daemon
+A standalone process that owns PTY sessions so they outlive the application
+displaying them, and the client used to create, attach to and manage them
+
+Every request is one connection: the client sends a JSON line and reads a
+JSON line back. After a successful ``open`` or ``attach`` the connection
+stays open as the session's byte stream - the recent output is replayed
+unless an attach asks not to, then live output follows, and anything the client writes is typed into the
+session.
+
+Usage:
+    python -m viloxtermjs.daemon [--socket PATH] [--idle-timeout 60]
+"""
+import os
+import sys
+import pty
+import json
+import stat
+import time
+import fcntl
+import signal
+import socket
+import struct
+import termios
+import logging
+import argparse
+import tempfile
+import selectors
+import subprocess
+
+# Output replayed to a client that attaches
+DEFAULT_BUFFER_BYTES = 256 * 1024
+# A client this far behind pauses its session's output until it catches up
+MAX_CLIENT_BACKLOG = 4 * 1024 * 1024
+# Seconds between SIGTERM and SIGKILL for a killed session
+KILL_TIMEOUT = 2.0
+# Seconds an exited session's status stays available
+EXITED_TTL = 60.0
+
+
+def default_socket_path():
+    """Per-user socket path, under $XDG_RUNTIME_DIR when it is set"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "viloxtermjs", "daemon.sock")
+    return os.path.join(tempfile.gettempdir(), f"viloxtermjs-{os.getuid()}", "daemon.sock")
+
+
+def check_socket_dir(directory):
+    """Raise PermissionError unless ``directory`` is a real directory private to this user
+
+    The socket is only as private as its directory; a directory someone else
+    created first, e.g. in a shared /tmp, could let them listen in.
+    """
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{directory} is not a directory")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{directory} is not owned by the current user")
+    if stat.S_IMODE(st.st_mode) != 0o700:
+        raise PermissionError(f"{directory} must have mode 0700, not {stat.S_IMODE(st.st_mode):04o}")
+
+
+def _set_winsize(fd, rows, cols):
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+
+
+class _Session:
+    """A PTY and child process owned by the daemon"""
+
+    def __init__(self, session_id, argv, rows, cols, env, cwd, buffer_bytes):
+        pid, fd = pty.fork()
+        if pid == 0:
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                os.execvpe(argv[0], argv, env if env is not None else os.environ)
+            except OSError as e:
+                sys.stderr.write(f"{argv[0]}: {e.strerror}\r\n")
+            os._exit(127)
+        _set_winsize(fd, rows, cols)
+        os.set_blocking(fd, False)
+        self.session_id = session_id
+        self.argv = argv
+        self.pid = pid
+        self.fd = fd
+        self.started = time.time()
+        self.exited = None
+        self.exit_code = None
+        self.buffer_bytes = buffer_bytes
+        self.buffer = bytearray()
+        self.pending_input = bytearray()
+        self.clients = []
+        # Selector events the PTY is registered for, 0 while unregistered
+        self.events = 0
+
+    @property
+    def alive(self):
+        return self.exited is None
+
+    def record(self, data):
+        self.buffer += data
+        if len(self.buffer) > self.buffer_bytes:
+            del self.buffer[:-self.buffer_bytes]
+
+    def info(self):
+        return {
+            "session_id": self.session_id,
+            "argv": self.argv,
+            "pid": self.pid,
+            "started": self.started,
+            "alive": self.alive,
+            "exit_code": self.exit_code,
+            "clients": len(self.clients),
+        }
+
+
+class _Client:
+    """One connection to the daemon"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.session = None
+        self.closing = False
+
+
+class SessionDaemon:
+    """Owns PTY sessions and serves them over a Unix domain socket
+
+    A single-threaded selector loop: PTYs and client sockets are all
+    non-blocking, and each client has its own outgoing buffer so a slow
+    client never holds up the other sessions. A client more than
+    MAX_CLIENT_BACKLOG behind stops reads from its session's PTY, so the
+    command blocks on a full terminal as it would without the daemon.
+    """
+
+    def __init__(self, socket_path=None, buffer_bytes=DEFAULT_BUFFER_BYTES, idle_timeout=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.buffer_bytes = buffer_bytes
+        self.idle_timeout = idle_timeout
+        self.running = False
+        self._sessions = {}
+        self._clients = set()
+        self._dying = {}
+        self._exit_codes = {}
+        self._selector = selectors.DefaultSelector()
+        self._listener = None
+
+    def listen(self):
+        """Bind the socket, replacing a stale one left by a dead daemon"""
+        directory = os.path.dirname(self.socket_path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        check_socket_dir(directory)
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f"a session daemon is already listening on {self.socket_path}")
+            finally:
+                probe.close()
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._listener.listen(64)
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ, ("listen", None))
+
+    def serve_forever(self):
+        if self._listener is None:
+            self.listen()
+        self.running = True
+        idle_since = time.monotonic()
+        try:
+            while self.running:
+                for key, events in self._selector.select(timeout=0.5):
+                    kind, target = key.data
+                    if kind == "listen":
+                        self._accept()
+                    elif kind == "client":
+                        self._service_client(target, events)
+                    else:
+                        self._service_pty(target, events)
+                self._reap_children()
+                if self._sessions or self._clients:
+                    idle_since = time.monotonic()
+                elif self.idle_timeout is not None and time.monotonic() - idle_since > self.idle_timeout:
+                    logging.info("session daemon idle, exiting")
+                    break
+        finally:
+            self.close()
+
+    def close(self):
+        for session in list(self._sessions.values()):
+            self._kill(session)
+        for client in list(self._clients):
+            self._drop_client(client)
+        if self._listener is not None:
+            self._selector.unregister(self._listener)
+            self._listener.close()
+            self._listener = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        self._reap_children(wait=True)
+
+    # Clients
+
+    def _accept(self):
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock)
+        self._clients.add(client)
+        self._selector.register(sock, selectors.EVENT_READ, ("client", client))
+
+    def _update_client(self, client):
+        if client not in self._clients:
+            return
+        events = 0 if client.closing else selectors.EVENT_READ
+        if client.outbox:
+            events |= selectors.EVENT_WRITE
+        if not events:
+            self._drop_client(client)
+        else:
+            self._selector.modify(client.sock, events, ("client", client))
+
+    def _drop_client(self, client):
+        if client not in self._clients:
+            return
+        self._clients.discard(client)
+        if client.session and client in client.session.clients:
+            client.session.clients.remove(client)
+            # The session may have been held back for this client
+            self._update_pty(client.session)
+        self._selector.unregister(client.sock)
+        client.sock.close()
+
+    def _send(self, client, data):
+        if client not in self._clients:
+            return
+        client.outbox += data
+        self._update_client(client)
+
+    def _reply(self, client, close=True, **response):
+        client.closing = close
+        self._send(client, json.dumps(response).encode() + b"\n")
+
+    def _service_client(self, client, events):
+        if events & selectors.EVENT_WRITE and client.outbox:
+            try:
+                sent = client.sock.send(client.outbox)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._drop_client(client)
+                return
+            del client.outbox[:sent]
+            self._update_client(client)
+            if client.session:
+                self._update_pty(client.session)
+        if not events & selectors.EVENT_READ or client not in self._clients:
+            return
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop_client(client)
+        elif client.session:
+            self._type(client.session, data)
+        else:
+            client.inbox += data
+            newline = client.inbox.find(b"\n")
+            if newline != -1:
+                line, rest = bytes(client.inbox[:newline]), bytes(client.inbox[newline + 1:])
+                client.inbox.clear()
+                self._handle_request(client, line, rest)
+
+    def _handle_request(self, client, line, rest):
+        try:
+            request = json.loads(line)
+            op = request["op"]
+            handler = getattr(self, f"_op_{op}")
+        except (ValueError, KeyError, AttributeError):
+            self._reply(client, ok=False, error="bad request")
+            return
+        try:
+            handler(client, request)
+        except Exception as e:
+            logging.exception(f"session daemon {op} failed")
+            self._reply(client, ok=False, error=str(e))
+            return
+        if client.session and rest:
+            self._type(client.session, rest)
+
+    # Requests
+
+    def _op_open(self, client, request):
+        session = self._sessions.get(request["session_id"])
+        created = session is None or not session.alive
+        if created:
+            session = _Session(request["session_id"], request["argv"], request.get("rows", 24),
+                               request.get("cols", 80), request.get("env"), request.get("cwd"),
+                               self.buffer_bytes)
+            self._sessions[session.session_id] = session
+            self._update_pty(session)
+            logging.info(f"created session {session.session_id} with pid {session.pid}")
+        self._attach(client, session, created)
+
+    def _op_attach(self, client, request):
+        session = self._sessions.get(request["session_id"])
+        if session is None or not session.alive:
+            self._reply(client, ok=False, error=f"no running session {request['session_id']}")
+            return
+        self._attach(client, session, False, request.get("replay", True))
+
+    def _attach(self, client, session, created, replay=True):
+        client.session = session
+        session.clients.append(client)
+        self._reply(client, close=False, ok=True, created=created, **session.info())
+        if session.buffer and replay:
+            self._send(client, bytes(session.buffer))
+
+    def _op_resize(self, client, request):
+        session = self._sessions.get(request["session_id"])
+        if session and session.alive:
+            _set_winsize(session.fd, request["rows"], request["cols"])
+        self._reply(client, ok=bool(session))
+
+    def _op_status(self, client, request):
+        session = self._sessions.get(request["session_id"])
+        if session is None:
+            self._reply(client, ok=False, error=f"no session {request['session_id']}")
+        else:
+            self._reply(client, ok=True, **session.info())
+
+    def _op_list(self, client, request):
+        self._reply(client, ok=True, sessions=[session.info() for session in self._sessions.values()])
+
+    def _op_kill(self, client, request):
+        session = self._sessions.pop(request["session_id"], None)
+        if session:
+            self._kill(session)
+        self._reply(client, ok=True)
+
+    def _op_shutdown(self, client, request):
+        self._reply(client, ok=True)
+        # The loop ends before it would get to sending the reply
+        try:
+            client.sock.setblocking(True)
+            client.sock.sendall(client.outbox)
+        except OSError:
+            pass
+        client.outbox.clear()
+        self.running = False
+
+    # Sessions
+
+    def _type(self, session, data):
+        if not session.alive:
+            return
+        session.pending_input += data
+        self._service_pty(session, selectors.EVENT_WRITE)
+
+    def _update_pty(self, session):
+        if session.fd is None:
+            return
+        backed_up = any(len(client.outbox) > MAX_CLIENT_BACKLOG for client in session.clients)
+        events = 0 if backed_up else selectors.EVENT_READ
+        if session.pending_input:
+            events |= selectors.EVENT_WRITE
+        if events == session.events:
+            return
+        if not session.events:
+            self._selector.register(session.fd, events, ("pty", session))
+        elif not events:
+            self._selector.unregister(session.fd)
+        else:
+            self._selector.modify(session.fd, events, ("pty", session))
+        session.events = events
+
+    def _service_pty(self, session, events):
+        if not session.alive:
+            return
+        if events & selectors.EVENT_WRITE and session.pending_input:
+            try:
+                written = os.write(session.fd, session.pending_input)
+                del session.pending_input[:written]
+            except BlockingIOError:
+                pass
+            except OSError:
+                session.pending_input.clear()
+            self._update_pty(session)
+        if not events & selectors.EVENT_READ:
+            return
+        try:
+            data = os.read(session.fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            # EIO once every process holding the terminal has gone
+            data = b""
+        if not data:
+            self._session_ended(session)
+            return
+        session.record(data)
+        for client in list(session.clients):
+            self._send(client, data)
+        self._update_pty(session)
+
+    def _close_pty(self, session):
+        if session.fd is None:
+            return
+        if session.events:
+            self._selector.unregister(session.fd)
+            session.events = 0
+        os.close(session.fd)
+        session.fd = None
+
+    def _session_ended(self, session):
+        self._close_pty(session)
+        # The child is normally already gone when its terminal is
+        deadline = time.monotonic() + 0.5
+        while session.pid not in self._exit_codes and time.monotonic() < deadline:
+            if not self._reap_children():
+                time.sleep(0.01)
+        session.exit_code = self._exit_codes.pop(session.pid, None)
+        session.exited = time.monotonic()
+        logging.info(f"session {session.session_id} exited with code {session.exit_code}")
+        for client in list(session.clients):
+            client.closing = True
+            self._update_client(client)
+
+    def _kill(self, session):
+        for client in list(session.clients):
+            self._drop_client(client)
+        if not session.alive:
+            return
+        # Closing the master hangs up the terminal; escalate in _reap_children
+        self._close_pty(session)
+        session.exited = time.monotonic()
+        try:
+            os.kill(session.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        self._dying[session.pid] = time.monotonic() + KILL_TIMEOUT
+
+    def _reap_children(self, wait=False):
+        """Collect exited children; returns whether any were reaped"""
+        now = time.monotonic()
+        for pid, deadline in list(self._dying.items()):
+            if now >= deadline or wait:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self._dying[pid] = float("inf")
+        reaped = False
+        while True:
+            try:
+                pid, status = os.waitpid(-1, 0 if wait else os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            reaped = True
+            if self._dying.pop(pid, None) is None:
+                self._exit_codes[pid] = os.waitstatus_to_exitcode(status)
+        for session_id, session in list(self._sessions.items()):
+            if not session.alive and now - session.exited > EXITED_TTL:
+                del self._sessions[session_id]
+        return reaped
+
+
+class SessionDaemonClient:
+    """Talks to a SessionDaemon, starting one when none is running"""
+
+    def __init__(self, socket_path=None, autostart=True, idle_timeout=60, connect_timeout=5.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.autostart = autostart
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+
+    def _connect(self):
+        check_socket_dir(os.path.dirname(self.socket_path))
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def ensure_running(self):
+        """Start a daemon if none is listening and wait until it accepts connections"""
+        try:
+            self._connect().close()
+            return
+        except PermissionError:
+            raise
+        except OSError:
+            if not self.autostart:
+                raise
+        command = [sys.executable, "-m", "viloxtermjs.daemon", "--socket", self.socket_path]
+        if self.idle_timeout is not None:
+            command += ["--idle-timeout", str(self.idle_timeout)]
+        # The launcher forks the daemon off once it is listening and exits, so
+        # the daemon is not our child and never lingers as our zombie
+        launcher = subprocess.Popen(command + ["--daemonize"], stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                    start_new_session=True, close_fds=True)
+        launcher.wait(self.connect_timeout)
+        self._connect().close()
+
+    def _exchange(self, op, **fields):
+        try:
+            sock = self._connect()
+        except OSError:
+            self.ensure_running()
+            sock = self._connect()
+        try:
+            sock.sendall(json.dumps(dict(fields, op=op)).encode() + b"\n")
+            # Byte by byte, so nothing after the reply is consumed from the stream
+            line = bytearray()
+            while not line.endswith(b"\n"):
+                byte = sock.recv(1)
+                if not byte:
+                    raise ConnectionError("session daemon closed the connection")
+                line += byte
+            response = json.loads(line)
+        except Exception:
+            sock.close()
+            raise
+        if not response.pop("ok"):
+            sock.close()
+            raise RuntimeError(response.get("error", f"session daemon {op} failed"))
+        return sock, response
+
+    def request(self, op, **fields):
+        sock, response = self._exchange(op, **fields)
+        sock.close()
+        return response
+
+    def open_session(self, session_id, argv, rows=24, cols=80, env=None, cwd=None):
+        """Attach to ``session_id``, first creating it with ``argv`` if it is not running
+
+        Returns the connected socket's file descriptor, now owned by the
+        caller, and the session's info.
+        """
+        sock, info = self._exchange("open", session_id=session_id, argv=list(argv), rows=rows,
+                                    cols=cols, env=env, cwd=cwd)
+        return sock.detach(), info
+
+    def attach(self, session_id, replay=True):
+        """Attach to a running session; see open_session()
+
+        With ``replay`` false only output from now on is sent, not the
+        recent output first.
+        """
+        sock, info = self._exchange("attach", session_id=session_id, replay=replay)
+        return sock.detach(), info
+
+    def resize(self, session_id, rows, cols):
+        self.request("resize", session_id=session_id, rows=rows, cols=cols)
+
+    def status(self, session_id):
+        return self.request("status", session_id=session_id)
+
+    def kill(self, session_id):
+        self.request("kill", session_id=session_id)
+
+    def list_sessions(self):
+        return self.request("list")["sessions"]
+
+    def shutdown(self):
+        """Stop the daemon and every session it owns"""
+        self.request("shutdown")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs session daemon")
+    parser.add_argument("--socket", default=None, help="Unix socket path")
+    parser.add_argument("--buffer-bytes", type=int, default=DEFAULT_BUFFER_BYTES)
+    parser.add_argument("--idle-timeout", type=float, default=None,
+                        help="exit after this many seconds without sessions or clients")
+    parser.add_argument("--daemonize", action="store_true",
+                        help="fork into the background once the socket is listening")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    daemon = SessionDaemon(args.socket, args.buffer_bytes, args.idle_timeout)
+    try:
+        daemon.listen()
+    except RuntimeError as e:
+        # Lost a race with another launcher; its daemon serves us just as well
+        logging.info(str(e))
+        return
+    if args.daemonize and os.fork():
+        os._exit(0)
+    signal.signal(signal.SIGTERM, lambda signum, frame: setattr(daemon, "running", False))
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
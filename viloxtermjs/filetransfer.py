@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+File Transfer
+Streams files between the page and a session's working directory over
+HTTP, next to the terminal rather than through the PTY
+"""
+import os
+import uuid
+import logging
+
+# Read and write in large blocks so multi-GB files move at disk speed
+CHUNK_BYTES = 1024 * 1024
+
+
+def session_cwd(pid):
+    """Working directory of process ``pid``, or ours if it cannot be read"""
+    if pid:
+        try:
+            return os.readlink(f"/proc/{pid}/cwd")
+        except OSError:
+            pass
+    return os.getcwd()
+
+
+def resolve(cwd, name):
+    """Path of ``name`` relative to ``cwd``; ``~`` and absolute names are kept"""
+    return os.path.join(cwd, os.path.expanduser(name))
+
+
+def receive_file(stream, path, overwrite=False, length=None):
+    """Write ``stream`` to ``path`` and return the number of bytes written
+
+    The data goes to a hidden partial file next to ``path`` that replaces it
+    only once complete, so an interrupted upload leaves nothing behind.
+    Raises FileExistsError if ``path`` exists and ``overwrite`` is false, and
+    EOFError if the stream ends before ``length`` bytes.
+    """
+    if not overwrite and os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    directory, filename = os.path.split(path)
+    partial = os.path.join(directory, f".{filename}.{uuid.uuid4().hex[:8]}.part")
+    received = 0
+    fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(fd, "wb", buffering=0) as f:
+            while True:
+                chunk = stream.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                f.write(chunk)
+                received += len(chunk)
+        if length is not None and received != length:
+            raise EOFError(f"upload ended after {received} of {length} bytes")
+        os.replace(partial, path)
+    except BaseException:
+        try:
+            os.unlink(partial)
+        except OSError:
+            pass
+        raise
+    logging.info(f"received {received} bytes into {path}")
+    return received
+
+
+def file_chunks(path):
+    """Open ``path`` and return its size and an iterator over its contents
+
+    Raises OSError, e.g. FileNotFoundError, before anything is read.
+    """
+    f = open(path, "rb")
+    try:
+        size = os.fstat(f.fileno()).st_size
+    except OSError:
+        f.close()
+        raise
+
+    def chunks():
+        with f:
+            while True:
+                chunk = f.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+
+    return size, chunks()
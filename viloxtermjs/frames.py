@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Flood Frames
+Cuts a flood of line-oriented output down to what is left on screen, so a
+viewer can skip the lines that would scroll past faster than anyone reads
+"""
+import re
+
+# Escape sequences that move the cursor, clear or switch screens, or set
+# scroll regions: CSI with any final byte but SGR (m) and erase in line (K),
+# and the single-character ESC 7, 8, D, E, M and c
+CURSOR_CONTROL = re.compile(rb"\x1b(?:\[[0-?]*[ -/]*[@-JL-ln-~]|[78DEMc])")
+SGR = re.compile(rb"\x1b\[[0-9;:]*m")
+
+
+def screen_tail(data, rows):
+    """Return the end of ``data`` that fills a ``rows`` high screen, or None
+
+    Only plain scrolling output can be cut: None is returned when ``data``
+    holds fewer than ``rows`` lines or moves the cursor around. The tail
+    starts on a line boundary with the colours that were in effect there.
+    """
+    position = len(data)
+    for _ in range(rows):
+        position = data.rfind(b"\n", 0, position)
+        if position == -1:
+            return None
+    if CURSOR_CONTROL.search(data):
+        return None
+    start = position + 1
+    style = b"\x1b[0m"
+    last_sgr = data.rfind(b"\x1b[", 0, start)
+    while last_sgr != -1:
+        found = SGR.match(data, last_sgr)
+        if found and found.end() <= start:
+            style += found.group()
+            break
+        last_sgr = data.rfind(b"\x1b[", 0, last_sgr)
+    return style + data[start:]
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Native Terminal Widget
+Draws the terminal with QPainter instead of embedding QtWebEngine, for apps
+that want a terminal without a Chromium process behind it
+"""
+import logging
+import threading
+from collections import OrderedDict, deque
+from PySide6.QtCore import Qt, Signal, QRect, QSize
+from PySide6.QtGui import QClipboard, QColor, QFont, QFontMetrics, QGuiApplication, QPainter, QPixmap
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from .server import TerminalServer
+
+try:
+    import pyte
+except ImportError:
+    pyte = None
+
+# pyte keeps private modes shifted left by 5 to tell them from ANSI modes
+DECCKM = 1 << 5
+BRACKETED_PASTE = 2004 << 5
+
+# xterm.js' default palette, so both widgets look the same; pyte calls yellow brown
+PALETTE = {
+    "black": "#2e3436", "red": "#cc0000", "green": "#4e9a06", "brown": "#c4a000",
+    "blue": "#3465a4", "magenta": "#75507b", "cyan": "#06989a", "white": "#d3d7cf",
+    "brightblack": "#555753", "brightred": "#ef2929", "brightgreen": "#8ae234",
+    "brightbrown": "#fce94f", "brightblue": "#729fcf", "brightmagenta": "#ad7fa8",
+    "brightcyan": "#34e2e2", "brightwhite": "#eeeeec",
+}
+
+KEYS = {
+    Qt.Key_Return: b"\r", Qt.Key_Enter: b"\r", Qt.Key_Backspace: b"\x7f",
+    Qt.Key_Tab: b"\t", Qt.Key_Backtab: b"\x1b[Z", Qt.Key_Escape: b"\x1b",
+    Qt.Key_Insert: b"\x1b[2~", Qt.Key_Delete: b"\x1b[3~",
+    Qt.Key_PageUp: b"\x1b[5~", Qt.Key_PageDown: b"\x1b[6~",
+    Qt.Key_F1: b"\x1bOP", Qt.Key_F2: b"\x1bOQ", Qt.Key_F3: b"\x1bOR", Qt.Key_F4: b"\x1bOS",
+    Qt.Key_F5: b"\x1b[15~", Qt.Key_F6: b"\x1b[17~", Qt.Key_F7: b"\x1b[18~",
+    Qt.Key_F8: b"\x1b[19~", Qt.Key_F9: b"\x1b[20~", Qt.Key_F10: b"\x1b[21~",
+    Qt.Key_F11: b"\x1b[23~", Qt.Key_F12: b"\x1b[24~",
+}
+# Final bytes of the keys that follow cursor key mode (DECCKM)
+CURSOR_KEYS = {
+    Qt.Key_Up: b"A", Qt.Key_Down: b"B", Qt.Key_Right: b"C", Qt.Key_Left: b"D",
+    Qt.Key_Home: b"H", Qt.Key_End: b"F",
+}
+
+
+class GlyphCache:
+    """Pre-rendered glyphs keyed by character, colour and style
+
+    A glyph is laid out and drawn once; after that painting a cell is a
+    pixmap blit. The least recently used glyphs are dropped beyond
+    ``max_glyphs``.
+    """
+
+    def __init__(self, max_glyphs=4096):
+        self.max_glyphs = max_glyphs
+        self.hits = 0
+        self.misses = 0
+        self._glyphs = OrderedDict()
+        self._fonts = {}
+        self._cell = (1, 1)
+        self._ascent = 0
+        self._ratio = 1.0
+
+    def __len__(self):
+        return len(self._glyphs)
+
+    def set_font(self, font, cell_width, cell_height, ascent, device_pixel_ratio=1.0):
+        """Use a new font or cell size; drops every cached glyph"""
+        self._fonts = {}
+        for bold in (False, True):
+            for italic in (False, True):
+                variant = QFont(font)
+                variant.setBold(bold)
+                variant.setItalic(italic)
+                self._fonts[bold, italic] = variant
+        self._cell = (cell_width, cell_height)
+        self._ascent = ascent
+        self._ratio = device_pixel_ratio
+        self._glyphs.clear()
+
+    def get(self, text, color, bold=False, italic=False, underline=False,
+            strikethrough=False, wide=False):
+        """Return the pixmap for ``text`` drawn in one cell, or two if ``wide``"""
+        key = (text, color.rgba(), bold, italic, underline, strikethrough, wide)
+        pixmap = self._glyphs.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self._glyphs.move_to_end(key)
+            return pixmap
+        self.misses += 1
+        pixmap = self._render(text, color, bold, italic, underline, strikethrough, wide)
+        self._glyphs[key] = pixmap
+        if len(self._glyphs) > self.max_glyphs:
+            self._glyphs.popitem(last=False)
+        return pixmap
+
+    def _render(self, text, color, bold, italic, underline, strikethrough, wide):
+        width, height = self._cell
+        width *= 2 if wide else 1
+        pixmap = QPixmap(round(width * self._ratio), round(height * self._ratio))
+        pixmap.setDevicePixelRatio(self._ratio)
+        pixmap.fill(Qt.transparent)
+        font = QFont(self._fonts[bold, italic])
+        font.setUnderline(underline)
+        font.setStrikeOut(strikethrough)
+        painter = QPainter(pixmap)
+        painter.setFont(font)
+        painter.setPen(color)
+        painter.drawText(0, self._ascent, text)
+        painter.end()
+        return pixmap
+
+
+class NativeTerminalWidget(QWidget):
+    """A terminal widget that paints the session itself, without QtWebEngine
+
+    A drop-in alternative to TerminalWidget with the same arguments, signals
+    and methods. The session runs in an in-process TerminalServer that never
+    starts its HTTP server; output is interpreted by pyte and painted with
+    QPainter from a GlyphCache. Needs the ``native`` extra (pyte).
+    """
+
+    # Signal emitted when terminal is closed
+    terminal_closed = Signal()
+    # Signal emitted with the exit code when the terminal's process exits on its own
+    terminal_exited = Signal(int)
+    # Carry the exit code and new output from server threads to the GUI thread
+    _child_exited = Signal(object)
+    _output_ready = Signal()
+
+    BACKGROUND = "#1e1e1e"
+    FOREGROUND = "#d4d4d4"
+    # Output interpreted per event loop turn, so floods cannot freeze the GUI
+    MAX_FEED_BYTES = 64 * 1024
+
+    def __init__(self, command='bash', cmd_args='', parent=None, session_pool=None,
+                 **server_options):
+        """Extra keyword arguments are passed on to TerminalServer. The
+        session needs to call back into this process, so ``session_pool``
+        is not supported."""
+        if pyte is None:
+            raise ImportError("NativeTerminalWidget needs pyte: pip install viloxtermjs[native]")
+        if session_pool is not None:
+            raise ValueError("NativeTerminalWidget cannot run its session in a SessionPool")
+        super().__init__(parent)
+        self.command = command
+        self.cmd_args = cmd_args
+        self.session_pool = None
+        self.server_options = server_options
+        self.terminal_server = None
+        self.glyphs = GlyphCache()
+        self._viewer = None
+        self._pending = deque()
+        self._pending_lock = threading.Lock()
+        self._feed_queued = False
+        self._selection = None
+        self._colors = {}
+        self._background = QColor(self.BACKGROUND)
+        self._foreground = QColor(self.FOREGROUND)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setAttribute(Qt.WA_InputMethodEnabled)
+        self.setCursor(Qt.IBeamCursor)
+        self._child_exited.connect(self._on_child_exited, Qt.QueuedConnection)
+        self._output_ready.connect(self._feed_pending, Qt.QueuedConnection)
+
+        font = QFont("monospace", 10)
+        font.setStyleHint(QFont.Monospace)
+        self.set_font(font)
+        columns, lines = self._grid_size()
+        self._screen = pyte.Screen(columns, lines)
+        # Replies to terminal queries (device attributes, cursor position) go to the PTY
+        self._screen.write_process_input = self._reply
+        self._stream = pyte.ByteStream(self._screen)
+        self._start_terminal_session()
+
+    def _start_terminal_session(self):
+        """Spawn the command in an in-process session and attach to its output"""
+        try:
+            self.terminal_server = TerminalServer(
+                command=self.command,
+                cmd_args=self.cmd_args,
+                **self.server_options
+            )
+            self.terminal_server.add_exit_callback(self._child_exited.emit)
+            # Output is held back until the widget is first shown
+            self.terminal_server.set_visible(self.isVisible())
+            self._viewer = self.terminal_server.add_viewer(self._on_output)
+            self.terminal_server.spawn(self._screen.lines, self._screen.columns)
+        except Exception as e:
+            logging.error(f"Failed to start terminal session: {e}")
+            self._show_error(f"Terminal session failed to start:\n{str(e)}")
+
+    def _show_error(self, message):
+        """Display error message in the widget"""
+        error_label = QLabel(message)
+        error_label.setWordWrap(True)
+        error_label.setStyleSheet("QLabel { color: red; padding: 10px; }")
+        layout = self.layout() or QVBoxLayout(self)
+        layout.addWidget(error_label)
+
+    def set_font(self, font):
+        """Render with ``font``, which should be monospaced"""
+        metrics = QFontMetrics(font)
+        self._cell = (max(1, metrics.horizontalAdvance("M")), max(1, metrics.height()))
+        self.glyphs.set_font(font, *self._cell, metrics.ascent(), self.devicePixelRatioF())
+        self.setFont(font)
+        if hasattr(self, "_screen"):
+            self._resize_screen()
+            self.update()
+
+    def _grid_size(self):
+        cell_width, cell_height = self._cell
+        return max(2, self.width() // cell_width), max(1, self.height() // cell_height)
+
+    def sizeHint(self):
+        cell_width, cell_height = self._cell
+        return QSize(80 * cell_width, 24 * cell_height)
+
+    # Output
+
+    def _on_output(self, data):
+        """Viewer callback on the server's sender thread"""
+        with self._pending_lock:
+            self._pending.append(data)
+            queued, self._feed_queued = self._feed_queued, True
+        if not queued:
+            self._output_ready.emit()
+
+    def _feed_pending(self):
+        """Interpret queued output and repaint the lines it changed"""
+        chunks, size = [], 0
+        with self._pending_lock:
+            while self._pending and size < self.MAX_FEED_BYTES:
+                data = self._pending.popleft()
+                if size + len(data) > self.MAX_FEED_BYTES:
+                    split = self.MAX_FEED_BYTES - size
+                    self._pending.appendleft(data[split:])
+                    data = data[:split]
+                chunks.append(data)
+                size += len(data)
+            more = self._feed_queued = bool(self._pending)
+        if chunks:
+            cursor_line = self._screen.cursor.y
+            self._stream.feed(b"".join(chunks))
+            if self._viewer:
+                self._viewer.acknowledge(size)
+            self._screen.dirty.update((cursor_line, self._screen.cursor.y))
+            self._update_dirty_lines()
+        if more:
+            self._output_ready.emit()
+
+    def _update_dirty_lines(self):
+        cell_height = self._cell[1]
+        for line in self._screen.dirty:
+            self.update(QRect(0, line * cell_height, self.width(), cell_height))
+        self._screen.dirty.clear()
+
+    def _reply(self, data):
+        if self.terminal_server:
+            self.terminal_server.send(data)
+
+    # Painting
+
+    def _color(self, name, default, bold=False):
+        if name == "default":
+            return default
+        if bold and name in PALETTE and not name.startswith("bright"):
+            name = "bright" + name
+        color = self._colors.get(name)
+        if color is None:
+            color = self._colors[name] = QColor(PALETTE.get(name, "#" + name))
+        return color
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = event.rect()
+        painter.fillRect(rect, self._background)
+        cell_height = self._cell[1]
+        first = max(0, rect.top() // cell_height)
+        last = min(self._screen.lines - 1, rect.bottom() // cell_height)
+        selection = self._ordered_selection()
+        for y in range(first, last + 1):
+            self._paint_line(painter, y, selection)
+        self._paint_cursor(painter)
+        painter.end()
+
+    def _paint_line(self, painter, y, selection):
+        cell_width, cell_height = self._cell
+        top = y * cell_height
+        line = self._screen.buffer[y]
+        columns = self._screen.columns
+        for x in range(columns):
+            char = line[x]
+            if not char.data:
+                # Right half of a wide character
+                continue
+            wide = x + 1 < columns and not line[x + 1].data
+            width = cell_width * 2 if wide else cell_width
+            foreground = self._color(char.fg, self._foreground, char.bold)
+            background = self._color(char.bg, self._background)
+            if char.reverse != self._is_selected(selection, y, x):
+                foreground, background = background, foreground
+            if background is not self._background:
+                painter.fillRect(x * cell_width, top, width, cell_height, background)
+            if char.data != " " or char.underscore or char.strikethrough:
+                painter.drawPixmap(x * cell_width, top, self.glyphs.get(
+                    char.data, foreground, char.bold, char.italics,
+                    char.underscore, char.strikethrough, wide))
+
+    def _paint_cursor(self, painter):
+        cursor = self._screen.cursor
+        if cursor.hidden or cursor.y >= self._screen.lines:
+            return
+        cell_width, cell_height = self._cell
+        x = min(cursor.x, self._screen.columns - 1)
+        rect = QRect(x * cell_width, cursor.y * cell_height, cell_width, cell_height)
+        if not self.hasFocus():
+            painter.setPen(self._foreground)
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+            return
+        painter.fillRect(rect, self._foreground)
+        char = self._screen.buffer[cursor.y][x]
+        if char.data.strip():
+            painter.drawPixmap(rect.topLeft(), self.glyphs.get(
+                char.data, self._background, char.bold, char.italics))
+
+    def resizeEvent(self, event):
+        self._resize_screen()
+        super().resizeEvent(event)
+
+    def _resize_screen(self):
+        columns, lines = self._grid_size()
+        if (columns, lines) == (self._screen.columns, self._screen.lines):
+            return
+        self._screen.resize(lines, columns)
+        self._selection = None
+        if self.terminal_server:
+            self.terminal_server.resize(lines, columns)
+
+    # Input
+
+    def keyPressEvent(self, event):
+        key, modifiers = event.key(), event.modifiers()
+        ctrl = bool(modifiers & Qt.ControlModifier)
+        shift = bool(modifiers & Qt.ShiftModifier)
+        alt = bool(modifiers & Qt.AltModifier)
+        if ctrl and shift and key in (Qt.Key_C, Qt.Key_X):
+            self.copy()
+            return
+        if ctrl and shift and key == Qt.Key_V:
+            self.paste()
+            return
+        data = self._key_bytes(key, event.text(), ctrl, shift, alt)
+        if data is None:
+            super().keyPressEvent(event)
+            return
+        self._send_input(data)
+
+    def _key_bytes(self, key, text, ctrl, shift, alt):
+        """Bytes an xterm sends for a key press, or None if it sends nothing"""
+        if key in CURSOR_KEYS:
+            modifier = 1 + shift + 2 * alt + 4 * ctrl
+            if modifier > 1:
+                return b"\x1b[1;%d%s" % (modifier, CURSOR_KEYS[key])
+            prefix = b"\x1bO" if DECCKM in self._screen.mode else b"\x1b["
+            return prefix + CURSOR_KEYS[key]
+        if key in KEYS:
+            data = KEYS[key]
+        elif ctrl and Qt.Key_A <= key <= Qt.Key_Z:
+            data = bytes([key - Qt.Key_A + 1])
+        elif ctrl and key == Qt.Key_Space:
+            data = b"\x00"
+        elif text:
+            data = text.encode()
+        else:
+            return None
+        return b"\x1b" + data if alt else data
+
+    def inputMethodEvent(self, event):
+        if event.commitString():
+            self._send_input(event.commitString().encode())
+        event.accept()
+
+    def focusNextPrevChild(self, next):
+        # Tab belongs to the shell
+        return False
+
+    def focusInEvent(self, event):
+        self._update_cursor()
+        if self.terminal_server:
+            self.terminal_server.set_focused(True)
+        super().focusInEvent(event)
+
+    def focusOutEvent(self, event):
+        self._update_cursor()
+        if self.terminal_server:
+            self.terminal_server.set_focused(False)
+        super().focusOutEvent(event)
+
+    def _update_cursor(self):
+        self._screen.dirty.add(self._screen.cursor.y)
+        self._update_dirty_lines()
+
+    def _send_input(self, data):
+        if self._selection:
+            self._selection = None
+            self.update()
+        if self.terminal_server:
+            self.terminal_server.send(data)
+
+    # Selection and clipboard
+
+    def _cell_at(self, pos):
+        cell_width, cell_height = self._cell
+        return (min(self._screen.lines - 1, max(0, pos.y() // cell_height)),
+                min(self._screen.columns - 1, max(0, pos.x() // cell_width)))
+
+    def _ordered_selection(self):
+        if not self._selection or self._selection[0] == self._selection[1]:
+            return None
+        return tuple(sorted(self._selection))
+
+    @staticmethod
+    def _is_selected(selection, y, x):
+        return selection is not None and selection[0] <= (y, x) <= selection[1]
+
+    def selected_text(self):
+        """Text of the current mouse selection, one line per screen row"""
+        selection = self._ordered_selection()
+        if selection is None:
+            return ""
+        (first_line, first_column), (last_line, last_column) = selection
+        lines = []
+        for y in range(first_line, last_line + 1):
+            line = self._screen.buffer[y]
+            start = first_column if y == first_line else 0
+            stop = last_column + 1 if y == last_line else self._screen.columns
+            lines.append("".join(line[x].data for x in range(start, stop)).rstrip())
+        return "\n".join(lines)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            cell = self._cell_at(event.position().toPoint())
+            self._selection = (cell, cell)
+            self.update()
+        elif event.button() == Qt.MiddleButton:
+            self.paste(QClipboard.Selection)
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._selection and event.buttons() & Qt.LeftButton:
+            self._selection = (self._selection[0], self._cell_at(event.position().toPoint()))
+            self.update()
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        clipboard = QGuiApplication.clipboard()
+        text = self.selected_text()
+        if text and clipboard.supportsSelection():
+            clipboard.setText(text, QClipboard.Selection)
+        super().mouseReleaseEvent(event)
+
+    def copy(self):
+        """Copy the selection to the clipboard"""
+        text = self.selected_text()
+        if text:
+            QGuiApplication.clipboard().setText(text)
+
+    def paste(self, mode=QClipboard.Clipboard):
+        """Type the clipboard's text into the terminal"""
+        text = QGuiApplication.clipboard().text(mode)
+        if not text:
+            return
+        data = text.replace("\r\n", "\r").replace("\n", "\r").encode()
+        if BRACKETED_PASTE in self._screen.mode:
+            data = b"\x1b[200~" + data + b"\x1b[201~"
+        self._send_input(data)
+
+    # Lifecycle, as in TerminalWidget
+
+    def _on_child_exited(self, exit_code):
+        """Close the terminal once its process has exited"""
+        if self.terminal_server is None:
+            return
+        self.terminal_exited.emit(-1 if exit_code is None else exit_code)
+        self.close_terminal()
+
+    def close_terminal(self):
+        """Close the terminal and cleanup"""
+        if self.terminal_server:
+            self.terminal_server.stop()
+            self.terminal_server = None
+            self._viewer = None
+        self.terminal_closed.emit()
+
+    def detach_terminal(self):
+        """Release the terminal but leave a daemon-owned session running
+
+        Used when the application quits but wants to reattach to its shells
+        on the next start; without a session daemon this is close_terminal().
+        """
+        if self.terminal_server:
+            self.terminal_server.detach()
+            self.terminal_server = None
+            self._viewer = None
+        self.terminal_closed.emit()
+
+    def closeEvent(self, event):
+        """Handle widget close event"""
+        self.close_terminal()
+        super().closeEvent(event)
+
+    def showEvent(self, event):
+        """Resume output once the terminal is on screen"""
+        if self.terminal_server:
+            self.terminal_server.set_visible(True)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """Hold output back while the terminal is hidden, e.g. in a background tab"""
+        if self.terminal_server:
+            self.terminal_server.set_visible(False)
+        super().hideEvent(event)
+
+    def get_command(self):
+        """Get the command being run in this terminal"""
+        return self.command
+
+    def set_focus(self):
+        """Set focus to the terminal"""
+        self.setFocus()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Session Pool
+Runs TerminalServer sessions in worker processes so that busy sessions do not
+compete with each other or with the Qt GUI for one interpreter's GIL
+"""
+import os
+import uuid
+import types
+import logging
+import threading
+import multiprocessing
+
+
+def _worker_main(conn, cpu):
+    """Worker process loop: host TerminalServers and answer requests from the pool"""
+    from .server import TerminalServer
+
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            allowed = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {cpu})
+        except OSError:
+            pass
+        else:
+            # Shells forked by the worker get back every CPU the pool was allowed
+            os.register_at_fork(after_in_child=lambda: _restore_affinity(allowed))
+    servers = {}
+    while True:
+        try:
+            op, session_id, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            if op == "start":
+                server = TerminalServer(*args, **kwargs)
+                servers[session_id] = server
+                result = server.start()
+            elif op == "stop":
+                server = servers.pop(session_id, None)
+                result = server.stop() if server else None
+            elif op == "call":
+                name, call_args = args[0], args[1:]
+                result = getattr(servers[session_id], name)(*call_args, **kwargs)
+                if isinstance(result, (types.GeneratorType, map, filter)):
+                    result = list(result)
+            elif op == "shutdown":
+                break
+            else:
+                raise ValueError(f"unknown pool operation {op!r}")
+            conn.send((True, result))
+        except Exception as e:
+            conn.send((False, e))
+    for server in servers.values():
+        server.stop()
+    conn.close()
+
+
+def _restore_affinity(cpus):
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError:
+        pass
+
+
+class _Worker:
+    """Parent-side handle for one worker process"""
+
+    def __init__(self, context, cpu):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, cpu), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+        self.sessions = set()
+
+    def request(self, op, session_id, args=(), kwargs=None):
+        with self.lock:
+            self.conn.send((op, session_id, args, kwargs or {}))
+            ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+
+class SessionPool:
+    """Shards terminal sessions across worker processes, one per core by default
+
+    The GUI process only brokers: each session's Flask/socket.io server and
+    PTY reader live in a worker, and the browser connects to the worker's port
+    directly. Workers are started with the ``spawn`` method, so forking a
+    multithreaded Qt process is avoided.
+
+    With ``pin_cpus`` each worker is kept on one core. Shells it forks are
+    given back the full CPU set, but helpers it starts through subprocess,
+    such as a zygote or session daemon, stay on the worker's core.
+    """
+
+    def __init__(self, workers=None, pin_cpus=False):
+        self.size = workers or os.cpu_count() or 1
+        self.pin_cpus = pin_cpus
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def _start_workers(self):
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        for i in range(self.size):
+            cpu = cpus[i % len(cpus)] if self.pin_cpus and cpus else None
+            self._workers.append(_Worker(self._context, cpu))
+        logging.info(f"started session pool with {self.size} workers")
+
+    def _pick_worker(self):
+        with self._lock:
+            if not self._workers:
+                self._start_workers()
+            return min(self._workers, key=lambda worker: len(worker.sessions))
+
+    def create_session(self, *args, **kwargs):
+        """Return a RemoteSession; arguments are those of TerminalServer"""
+        return RemoteSession(self, *args, **kwargs)
+
+    @property
+    def session_count(self):
+        return sum(len(worker.sessions) for worker in self._workers)
+
+    def shutdown(self, timeout=5):
+        """Stop every session and worker process"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            try:
+                worker.request("shutdown", None)
+            except (EOFError, OSError):
+                pass
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.conn.close()
+
+
+class RemoteSession:
+    """A TerminalServer hosted in a SessionPool worker
+
+    Exposes the parts of the TerminalServer API that make sense across a
+    process boundary: start(), stop(), get_url() and call() for any other
+    method (generators are returned as lists).
+    """
+
+    def __init__(self, pool, *args, **kwargs):
+        self.pool = pool
+        self.session_id = kwargs.setdefault("session_id", uuid.uuid4().hex)
+        self.host = kwargs.get("host", "127.0.0.1")
+        self.port = None
+        self.running = False
+        self._args = args
+        self._kwargs = kwargs
+        self._worker = None
+
+    def start(self):
+        """Start the session in a worker and return its port"""
+        if self.running:
+            return self.port
+        self._worker = self.pool._pick_worker()
+        self._worker.sessions.add(self.session_id)
+        try:
+            self.port = self._worker.request("start", self.session_id, self._args, self._kwargs)
+        except Exception:
+            self._worker.sessions.discard(self.session_id)
+            raise
+        self.running = True
+        return self.port
+
+    def call(self, name, *args, **kwargs):
+        """Call a TerminalServer method in the worker and return its result"""
+        if not self.running:
+            raise RuntimeError("session not started")
+        return self._worker.request("call", self.session_id, (name,) + args, kwargs)
+
+    def stop(self):
+        """Stop the session in its worker"""
+        self.running = False
+        if not self._worker:
+            return
+        self._worker.sessions.discard(self.session_id)
+        try:
+            self._worker.request("stop", self.session_id)
+        except (EOFError, OSError):
+            pass
+
+    def get_url(self):
+        """Get the URL for the terminal server"""
+        return f"http://{self.host}:{self.port}"
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Session Priority
+Lowers the CPU and I/O priority of sessions whose terminal is not in front,
+so a build in a background tab does not slow down the shell being typed in
+"""
+import os
+import ctypes
+import logging
+import resource
+import platform
+
+LEVELS = ('focused', 'visible', 'hidden')
+
+IOPRIO_CLASS_NONE = 0
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+
+# ioprio_set has no libc wrapper
+SYS_IOPRIO_SET = {'x86_64': 251, 'i686': 289, 'aarch64': 30, 'riscv64': 30, 'armv7l': 314}
+
+_libc = None
+
+
+def ioprio_set(pid, io_class, level=0):
+    """Set the I/O scheduling class and level of one process (Linux only)"""
+    global _libc
+    number = SYS_IOPRIO_SET.get(platform.machine())
+    if number is None:
+        raise OSError(f"ioprio_set is not known on {platform.machine()}")
+    if _libc is None:
+        _libc = ctypes.CDLL(None, use_errno=True)
+    value = (io_class << IOPRIO_CLASS_SHIFT) | level
+    if _libc.syscall(number, IOPRIO_WHO_PROCESS, pid, value) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def session_processes(sid):
+    """Pids of all processes in session ``sid``, from /proc"""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after the command name: state ppid pgrp session
+                if int(f.read().rsplit(")", 1)[1].split()[3]) == sid:
+                    pids.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return pids
+
+
+def autogroup_enabled():
+    try:
+        with open("/proc/sys/kernel/sched_autogroup_enabled") as f:
+            return f.read().strip() == "1"
+    except OSError:
+        return False
+
+
+def can_lower_nice(nice):
+    """Whether this process may set nice values back down to ``nice``"""
+    if os.geteuid() == 0:
+        return True
+    # RLIMIT_NICE allows nice values down to 20 - limit; nothing else is undone
+    soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+    return soft == resource.RLIM_INFINITY or 20 - soft <= nice
+
+
+class PriorityPolicy:
+    """Nice value, I/O priority and cgroup CPU weight per terminal state
+
+    A session is 'focused' while its widget has keyboard focus, 'visible'
+    while it is on screen and 'hidden' otherwise (e.g. a background tab).
+    ``nice`` maps each level to a nice value and ``io`` to an (I/O class,
+    level) pair; both are applied to every process in the session, and new
+    processes inherit them from the shell. With autogroup scheduling, the
+    default on most desktop kernels, the CPU is shared between sessions
+    before nice values are compared, so the session's autogroup nice is set
+    too; unlike a process's nice value, that can be lowered again without
+    privileges. Processes are only reniced when their nice value could be
+    lowered back for focus, i.e. with CAP_SYS_NICE or a sufficient
+    RLIMIT_NICE; otherwise only the autogroup, cgroup and I/O priorities
+    change.
+
+    ``cgroup`` is an optional cgroup v2 directory delegated to this user
+    with the cpu controller enabled for its children. Each session is moved
+    into a child cgroup of its own whose cpu.weight follows ``cpu_weight``.
+    One policy can be shared by all sessions of an application.
+    """
+
+    DEFAULT_NICE = {'focused': 0, 'visible': 4, 'hidden': 10}
+    DEFAULT_IO = {
+        'focused': (IOPRIO_CLASS_NONE, 0),
+        'visible': (IOPRIO_CLASS_BE, 5),
+        'hidden': (IOPRIO_CLASS_BE, 7),
+    }
+    DEFAULT_CPU_WEIGHT = {'focused': 400, 'visible': 100, 'hidden': 20}
+
+    def __init__(self, nice=None, io=None, cgroup=None, cpu_weight=None):
+        self.nice = dict(self.DEFAULT_NICE, **(nice or {}))
+        self.io = dict(self.DEFAULT_IO, **(io or {}))
+        self.cgroup = cgroup
+        self.cpu_weight = dict(self.DEFAULT_CPU_WEIGHT, **(cpu_weight or {}))
+        self.autogroup = autogroup_enabled()
+        self.renice = can_lower_nice(min(self.nice.values()))
+        self._warned = False
+        self._cgroups = {}
+
+    def attach(self, pid):
+        """Give a newly started session its own cgroup, if a cgroup was given"""
+        if not self.cgroup:
+            return
+        path = os.path.join(self.cgroup, f"viloxterm-{pid}")
+        try:
+            os.makedirs(path, exist_ok=True)
+            for process in session_processes(pid):
+                self._write(os.path.join(path, "cgroup.procs"), process)
+        except OSError as e:
+            logging.warning(f"could not move session {pid} into {path}: {e}")
+            return
+        self._cgroups[pid] = path
+
+    def apply(self, pid, level):
+        """Set the priority of session ``pid`` for ``level``, one of LEVELS"""
+        if level not in LEVELS:
+            raise ValueError(f"level must be one of {', '.join(LEVELS)}, not {level!r}")
+        nice = self.nice[level]
+        io_class, io_level = self.io[level]
+        if self.autogroup:
+            try:
+                self._write(f"/proc/{pid}/autogroup", nice)
+            except OSError as e:
+                logging.debug(f"could not set autogroup nice of {pid}: {e}")
+        if not self.renice and not self._warned:
+            self._warned = True
+            logging.warning("not renicing session processes: their nice value could not be "
+                            "lowered again without CAP_SYS_NICE or RLIMIT_NICE")
+        for process in session_processes(pid):
+            if self.renice:
+                try:
+                    os.setpriority(os.PRIO_PROCESS, process, nice)
+                except OSError as e:
+                    logging.debug(f"could not renice {process} to {nice}: {e}")
+            try:
+                ioprio_set(process, io_class, io_level)
+            except OSError as e:
+                logging.debug(f"could not set I/O priority of {process}: {e}")
+        path = self._cgroups.get(pid)
+        if path:
+            try:
+                self._write(os.path.join(path, "cpu.weight"), self.cpu_weight[level])
+            except OSError as e:
+                logging.debug(f"could not set cpu.weight of {path}: {e}")
+
+    def release(self, pid):
+        """Remove the cgroup of a session that has ended"""
+        path = self._cgroups.pop(pid, None)
+        if path:
+            try:
+                os.rmdir(path)
+            except OSError as e:
+                logging.debug(f"could not remove {path}: {e}")
+
+    @staticmethod
+    def _write(path, value):
+        with open(path, "w") as f:
+            f.write(str(value))
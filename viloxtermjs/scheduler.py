@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Output Scheduler
+Shares the output path of a process between its sessions, so one session
+flooding its viewers cannot hold up keystroke echoes in the others
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+
+class _Ticket:
+    __slots__ = ("key", "nbytes", "granted", "deadline")
+
+    def __init__(self, key, nbytes):
+        self.key = key
+        self.nbytes = nbytes
+        self.granted = False
+        self.deadline = None
+
+
+class OutputScheduler:
+    """Deficit round robin over sessions, with a fast lane for echoes
+
+    Viewers take a turn() for every piece of output they send, and at most
+    ``concurrency`` pieces are sent at once. When senders have to wait,
+    sessions are served in turn: each round a session may send up to
+    ``quantum`` bytes times its weight, carrying what it did not use over to
+    the next round while it has output waiting. Small pieces that follow
+    input, typically the echo of a keystroke, skip the queue.
+
+    Sending is split into pieces of at most ``quantum`` bytes by split(), so
+    an echo never waits behind more than one piece of someone else's flood.
+    A turn held longer than ``turn_timeout`` seconds, e.g. by a send blocked
+    on a stalled remote viewer, stops counting so the others can go on.
+    One scheduler is meant to be shared by all sessions of a process.
+    """
+
+    def __init__(self, quantum=4 * 1024, concurrency=1, turn_timeout=0.05):
+        self.quantum = quantum
+        self.concurrency = concurrency
+        self.turn_timeout = turn_timeout
+        self.fast_lane_grants = 0
+        self.expired_turns = 0
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._active = set()
+        self._fast_lane = deque()
+        self._queues = OrderedDict()
+        self._deficit = {}
+        self._weights = {}
+        self._visited = False
+
+    def set_weight(self, key, weight):
+        """Give session ``key`` ``weight`` times the default share"""
+        if not weight > 0:
+            raise ValueError(f"weight must be positive, not {weight!r}")
+        with self._cond:
+            if weight == 1:
+                self._weights.pop(key, None)
+            else:
+                self._weights[key] = weight
+
+    def forget(self, key):
+        """Drop the weight of a session that has ended"""
+        with self._cond:
+            self._weights.pop(key, None)
+
+    def split(self, data):
+        """Cut ``data`` into pieces of at most ``quantum`` bytes"""
+        if len(data) <= self.quantum:
+            return [data]
+        view = memoryview(data)
+        return [bytes(view[i:i + self.quantum]) for i in range(0, len(data), self.quantum)]
+
+    @contextmanager
+    def turn(self, key, nbytes, interactive=False):
+        """Block until session ``key`` may send ``nbytes``, for the duration of the block"""
+        ticket = _Ticket(key, nbytes)
+        with self._cond:
+            if self._busy < self.concurrency and not self._fast_lane and not self._queues:
+                self._grant(ticket)
+            else:
+                if interactive:
+                    self._fast_lane.append(ticket)
+                else:
+                    self._queues.setdefault(key, deque()).append(ticket)
+                    self._deficit.setdefault(key, 0)
+                self._dispatch()
+                while not ticket.granted:
+                    self._cond.wait(self._until_expiry())
+                    self._expire()
+                if interactive:
+                    self.fast_lane_grants += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                # An expired turn was already given back
+                if ticket in self._active:
+                    self._active.remove(ticket)
+                    self._busy -= 1
+                    self._dispatch()
+
+    def _grant(self, ticket):
+        ticket.granted = True
+        ticket.deadline = time.monotonic() + self.turn_timeout
+        self._active.add(ticket)
+        self._busy += 1
+
+    def _until_expiry(self):
+        if not self._active:
+            return None
+        return max(0, min(ticket.deadline for ticket in self._active) - time.monotonic())
+
+    def _expire(self):
+        now = time.monotonic()
+        for ticket in [ticket for ticket in self._active if ticket.deadline <= now]:
+            logging.debug(f"output turn of {ticket.key} took over {self.turn_timeout}s, moving on")
+            self._active.remove(ticket)
+            self._busy -= 1
+            self.expired_turns += 1
+        self._dispatch()
+
+    def _dispatch(self):
+        granted = False
+        while self._busy < self.concurrency and (self._fast_lane or self._queues):
+            self._grant(self._fast_lane.popleft() if self._fast_lane else self._next_in_round())
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _next_in_round(self):
+        while True:
+            key, queue = next(iter(self._queues.items()))
+            if not self._visited:
+                # A session's quantum is added once per visit
+                self._deficit[key] += self.quantum * self._weights.get(key, 1)
+                self._visited = True
+            ticket = queue[0]
+            if ticket.nbytes <= self._deficit[key]:
+                self._deficit[key] -= ticket.nbytes
+                queue.popleft()
+                if not queue:
+                    # Nothing waiting: the unused deficit is not kept
+                    del self._queues[key]
+                    del self._deficit[key]
+                    self._visited = False
+                return ticket
+            self._queues.move_to_end(key)
+            self._visited = False
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler():
+    """The scheduler shared by every TerminalServer(scheduler=True) in this process"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = OutputScheduler()
+        return _default_scheduler
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Server-side Scrollback
+Keeps a plain-text, line-oriented copy of a session's output for searching
+"""
+import re
+import threading
+from collections import deque
+from .ansi import AnsiStripper, LineSplitter
+
+
+class Scrollback:
+    """Bounded line buffer of ANSI-stripped output, updated incrementally"""
+
+    def __init__(self, max_lines=10000):
+        self.max_lines = max_lines
+        self._lines = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._stripper = AnsiStripper(keep_cr=True)
+        self._splitter = LineSplitter()
+        self._lock = threading.Lock()
+
+    @property
+    def first_line(self):
+        """Absolute number of the oldest line still held"""
+        return self._dropped
+
+    @property
+    def total_lines(self):
+        """Number of lines seen so far, including the current partial line"""
+        return self._dropped + len(self._lines) + (1 if self._splitter.partial else 0)
+
+    def feed(self, data):
+        """Add a chunk of raw PTY output"""
+        text = self._stripper.feed(data)
+        if not text:
+            return
+        with self._lock:
+            completed = self._splitter.feed(text)
+            if not completed:
+                return
+            # Lines are only decoded once complete, so no character is split
+            parts = b"\n".join(completed).decode("utf-8", "replace").split("\n")
+            overflow = len(self._lines) + len(parts) - self.max_lines
+            if overflow > 0:
+                self._dropped += overflow
+            self._lines.extend(parts)
+
+    def _snapshot(self):
+        snapshot = list(self._lines)
+        partial = self._splitter.partial
+        if partial:
+            snapshot.append(partial.decode("utf-8", "replace"))
+        return snapshot
+
+    def lines(self, start, stop):
+        """Return held lines between absolute line numbers ``start`` and ``stop``"""
+        with self._lock:
+            snapshot = self._snapshot()
+            first = self._dropped
+        return snapshot[max(0, start - first) : max(0, stop - first)]
+
+    def search(self, query, regex=False, case_sensitive=False, limit=100):
+        """Return up to ``limit`` of the most recent hits for ``query``
+
+        Each hit is a dict with the absolute ``line`` number, the ``column``
+        and ``end`` of the match within the line, and the line ``text``.
+        Hits are returned oldest first.
+        """
+        if not query or limit <= 0:
+            return []
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        with self._lock:
+            snapshot = self._snapshot()
+            first = self._dropped
+        hits = []
+        for index in range(len(snapshot) - 1, -1, -1):
+            line = snapshot[index]
+            matches = list(pattern.finditer(line))
+            for match in reversed(matches):
+                hits.append({
+                    "line": first + index,
+                    "column": match.start(),
+                    "end": match.end(),
+                    "text": line,
+                })
+                if len(hits) >= limit:
+                    break
+            if len(hits) >= limit:
+                break
+        hits.reverse()
+        return hits
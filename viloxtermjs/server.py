@@ -10,27 +10,392 @@ import struct
 import fcntl
 import termios
 import shlex
+import signal
+import re
 import logging
 import threading
 import time
-from flask import Flask, render_template_string
+import uuid
+import hmac
+import secrets
+from urllib.parse import quote
+from flask import Flask, Response, render_template_string, request
 from flask_socketio import SocketIO
+from werkzeug.serving import WSGIRequestHandler, make_server
+import simple_websocket
 import sys
+from .sessionlog import SessionLog
+from .scrollback import Scrollback
+from .viewers import Viewer, ViewerSet
+from .compression import OutputEncoder, COMPRESSIONS
+from .watch import PatternWatcher
+from .shellintegration import CommandTracker, write_bash_rcfile
+from .stream import OutputStream
+from .frames import screen_tail
+from .priority import PriorityPolicy
+from .filetransfer import session_cwd, resolve, receive_file, file_chunks
+from .zygote import default_zygote
+from .scheduler import default_scheduler
+from .wsprotocol import (TRANSPORTS, INPUT, RESIZE, ACK, CALL, decode as decode_message,
+                         encode_output, encode_exit, encode_result)
 
 logging.getLogger("werkzeug").setLevel(logging.ERROR)
 
+RENDERERS = ('auto', 'webgl', 'canvas', 'dom')
+
+# Shared by the terminal page and the benchmark page. 'auto' only picks WebGL
+# when the GPU is real: WebGL on SwiftShader/llvmpipe is slower than canvas.
+RENDERER_SCRIPT = """
+        function hasHardwareWebgl() {
+            try {
+                const gl = document.createElement('canvas').getContext('webgl2');
+                if (!gl) return false;
+                const info = gl.getExtension('WEBGL_debug_renderer_info');
+                const name = info ? gl.getParameter(info.UNMASKED_RENDERER_WEBGL) : '';
+                return !/swiftshader|llvmpipe|softpipe|software/i.test(name);
+            } catch (e) {
+                return false;
+            }
+        }
+        
+        function chooseRenderer(requested) {
+            if (requested === 'auto') {
+                return hasHardwareWebgl() ? 'webgl' : 'canvas';
+            }
+            return requested;
+        }
+        
+        function loadCanvasRenderer(term) {
+            if (typeof CanvasAddon === 'undefined') return 'dom';
+            try {
+                term.loadAddon(new CanvasAddon.CanvasAddon());
+                return 'canvas';
+            } catch (e) {
+                console.warn('Canvas renderer unavailable, using DOM', e);
+                return 'dom';
+            }
+        }
+        
+        // Load the renderer addon (if any) after term.open(); returns the renderer in use.
+        // xterm.js 5 renders with the DOM unless a renderer addon is loaded.
+        function loadRenderer(term, renderer) {
+            if (renderer === 'canvas') return loadCanvasRenderer(term);
+            if (renderer !== 'webgl') return 'dom';
+            if (typeof WebglAddon === 'undefined') return loadCanvasRenderer(term);
+            try {
+                const webgl = new WebglAddon.WebglAddon();
+                webgl.onContextLoss(() => {
+                    webgl.dispose();
+                    window.terminalRenderer = loadCanvasRenderer(term);
+                });
+                term.loadAddon(webgl);
+                return 'webgl';
+            } catch (e) {
+                console.warn('WebGL renderer unavailable, using canvas', e);
+                return loadCanvasRenderer(term);
+            }
+        }
+"""
+
+# Lets the terminal page talk the raw WebSocket protocol (see wsprotocol.py)
+# through the same emit()/on() calls it makes on a socket.io client. Output,
+# input, resize and acks are one-byte opcodes; search and commands are CALLs.
+RAW_SOCKET_SCRIPT = r"""
+        class RawSocket {
+            constructor(path, params) {
+                const url = new URL(path, window.location.href);
+                url.protocol = url.protocol === "https:" ? "wss:" : "ws:";
+                for (const [name, value] of Object.entries(params)) {
+                    if (value) url.searchParams.set(name, value);
+                }
+                this.handlers = {};
+                this.calls = new Map();
+                this.nextCall = 0;
+                this.encoder = new TextEncoder();
+                this.decoder = new TextDecoder();
+                this.ws = new WebSocket(url);
+                this.ws.binaryType = "arraybuffer";
+                this.ws.onopen = () => this.dispatch("connect");
+                this.ws.onmessage = (event) => this.receive(new Uint8Array(event.data));
+            }
+
+            on(event, handler) {
+                (this.handlers[event] = this.handlers[event] || []).push(handler);
+            }
+
+            dispatch(event, data) {
+                for (const handler of this.handlers[event] || []) handler(data);
+            }
+
+            send(opcode, payload) {
+                if (this.ws.readyState !== WebSocket.OPEN) return;
+                const message = new Uint8Array(1 + payload.length);
+                message[0] = opcode;
+                message.set(payload, 1);
+                this.ws.send(message);
+            }
+
+            emit(event, data, callback) {
+                if (event === "pty-input") {
+                    this.send(0x00, this.encoder.encode(data.input));
+                } else if (event === "resize") {
+                    const payload = new Uint8Array(4);
+                    const view = new DataView(payload.buffer);
+                    view.setUint16(0, data.rows);
+                    view.setUint16(2, data.cols);
+                    this.send(0x01, payload);
+                } else if (event === "ack") {
+                    const payload = new Uint8Array(4);
+                    new DataView(payload.buffer).setUint32(0, data.bytes);
+                    this.send(0x02, payload);
+                } else {
+                    const id = this.nextCall++;
+                    this.calls.set(id, callback);
+                    const call = JSON.stringify({ id: id, name: event, args: data });
+                    this.send(0x03, this.encoder.encode(call));
+                }
+            }
+
+            receive(message) {
+                const payload = message.subarray(1);
+                if (message[0] === 0x10) {
+                    this.dispatch("pty-output", { output: payload, n: payload.length });
+                } else if (message[0] === 0x11) {
+                    const size = new DataView(payload.buffer, payload.byteOffset).getUint32(0);
+                    this.dispatch("pty-output", { z: payload.subarray(4), n: size });
+                } else if (message[0] === 0x12) {
+                    this.dispatch("pty-exit", { code: JSON.parse(this.decoder.decode(payload)) });
+                } else if (message[0] === 0x13) {
+                    const reply = JSON.parse(this.decoder.decode(payload));
+                    const callback = this.calls.get(reply.id);
+                    this.calls.delete(reply.id);
+                    if (callback) callback(reply.result);
+                }
+            }
+        }
+"""
+
+# Mosh-style local echo for the terminal page. Printable keys typed at the end
+# of a line are drawn at once, underlined, and replaced by the real echo when
+# it arrives. Other keys, output that disagrees with a prediction and keys the
+# server never echoes (password prompts) pause prediction until the output
+# settles; repeated misses turn it off. Full-screen apps are never predicted.
+PREDICTIVE_ECHO_SCRIPT = r"""
+        class PredictiveEcho {
+            constructor(term) {
+                this.term = term;
+                this.enabled = true;
+                this.frozen = false;
+                this.pending = [];
+                this.drawn = 0;
+                this.misses = 0;
+                this.timer = null;
+                this.decoder = new TextDecoder();
+                this.stats = { predicted: 0, confirmed: 0, mispredicted: 0, rtt: null };
+            }
+            // Called for every key sent to the server
+            input(data) {
+                if (!/^[\x20-\x7e]+$/.test(data)) {
+                    // Enter, editing and cursor keys move things the page cannot predict
+                    this.frozen = true;
+                    return;
+                }
+                const buffer = this.term.buffer.active;
+                if (!this.enabled || this.frozen || buffer.type !== "normal"
+                        || buffer.cursorX + data.length >= this.term.cols - 1) {
+                    return;
+                }
+                // Typing into the middle of a line inserts; only predict at its end
+                const line = buffer.getLine(buffer.baseY + buffer.cursorY);
+                if (line && line.translateToString(true).length > buffer.cursorX + this.drawn) {
+                    return;
+                }
+                const now = performance.now();
+                for (const char of data) this.pending.push({ char: char, time: now });
+                this.drawn += data.length;
+                this.stats.predicted += data.length;
+                this.term.write("\x1b[4m" + data + "\x1b[24m");
+                this.armTimeout();
+            }
+            // Erase drawn predictions so output lands where the server put the cursor
+            undo() {
+                if (this.drawn) {
+                    this.term.write("\x1b[" + this.drawn + "D\x1b[" + this.drawn + "X");
+                    this.drawn = 0;
+                }
+            }
+            // Match the output against pending predictions and redraw the rest
+            reconcile(bytes) {
+                const text = this.decoder.decode(bytes, { stream: true })
+                    .replace(/\x1b(\[[0-?]*[ -\/]*[@-~]|\][^\x07\x1b]*(\x07|\x1b\\)|[^\[\]])/g, "");
+                if (!text) return;
+                if (!this.pending.length) {
+                    // Output with nothing in flight: the screen is settled again
+                    this.frozen = false;
+                    return;
+                }
+                let confirmed = 0;
+                while (confirmed < this.pending.length && confirmed < text.length
+                        && text[confirmed] === this.pending[confirmed].char) {
+                    confirmed++;
+                }
+                if (confirmed < Math.min(this.pending.length, text.length)) {
+                    this.mispredict();
+                    return;
+                }
+                const now = performance.now();
+                for (const prediction of this.pending.splice(0, confirmed)) {
+                    const sample = now - prediction.time;
+                    this.stats.rtt = this.stats.rtt === null ? sample : 0.875 * this.stats.rtt + 0.125 * sample;
+                }
+                this.stats.confirmed += confirmed;
+                this.misses = 0;
+                if (!this.pending.length && text.length > confirmed) this.frozen = false;
+                this.redraw();
+            }
+            redraw() {
+                if (this.pending.length) {
+                    const chars = this.pending.map((p) => p.char).join("");
+                    this.term.write("\x1b[4m" + chars + "\x1b[24m");
+                    this.drawn = chars.length;
+                    this.armTimeout();
+                } else {
+                    clearTimeout(this.timer);
+                }
+            }
+            mispredict() {
+                this.stats.mispredicted += this.pending.length;
+                this.pending = [];
+                this.frozen = true;
+                if (++this.misses >= PredictiveEcho.MAX_MISSES) this.enabled = false;
+                clearTimeout(this.timer);
+            }
+            // Predictions the server never echoes are taken back
+            armTimeout() {
+                clearTimeout(this.timer);
+                const wait = Math.max(PredictiveEcho.MIN_TIMEOUT_MS, 4 * (this.stats.rtt || 0));
+                this.timer = setTimeout(() => {
+                    this.undo();
+                    this.mispredict();
+                }, wait);
+            }
+        }
+        PredictiveEcho.MAX_MISSES = 3;
+        PredictiveEcho.MIN_TIMEOUT_MS = 500;
+"""
+
+
+class _NoDelayRequestHandler(WSGIRequestHandler):
+    """Request handler that sets TCP_NODELAY on every connection"""
+    # socket.io writes a binary event as two frames; with Nagle the second one
+    # waits until the page acks the first, up to 40 ms with delayed acks
+    disable_nagle_algorithm = True
+
+
+class _WebSocketClosed(Response):
+    """Ends a request whose connection was taken over by a WebSocket"""
+
+    def __call__(self, environ, start_response):
+        # werkzeug drops the connection quietly instead of writing a response
+        raise ConnectionError()
+
+
 class TerminalServer:
-    def __init__(self, port=0, host='127.0.0.1', command='bash', cmd_args=''):
+    # Output flow control: the page acks every ACK_BYTES it has parsed, and the
+    # PTY is not read while more than the high watermark is unacknowledged.
+    ACK_BYTES = 32 * 1024
+    FLOW_HIGH_WATERMARK = 512 * 1024
+    FLOW_LOW_WATERMARK = 128 * 1024
+    # Per-viewer output queue; a viewer that falls this far behind is resynced
+    # from a snapshot of the most recent SNAPSHOT_BYTES of output
+    VIEWER_QUEUE_BYTES = 1024 * 1024
+    SNAPSHOT_BYTES = 64 * 1024
+    # Longest the reader blocks in select() before checking whether to stop
+    READ_TIMEOUT = 0.05
+    # Smallest PTY read; reads grow towards max_read_bytes during floods
+    MIN_READ_BYTES = 4 * 1024
+    # Seconds stop() waits for the child after SIGTERM before sending SIGKILL
+    KILL_TIMEOUT = 2.0
+    # Largest message accepted on the raw WebSocket, e.g. a big paste
+    MAX_WEBSOCKET_MESSAGE = 1024 * 1024
+    # Bounds on scrollback searches asked for by pages
+    MAX_SEARCH_QUERY = 256
+    MAX_SEARCH_HITS = 1000
+    # Output sent this soon after input, and no larger, is taken as an echo
+    FAST_LANE_BYTES = 512
+    FAST_LANE_WINDOW = 0.25
+
+    def __init__(self, port=0, host='127.0.0.1', command='bash', cmd_args='',
+                 session_id=None, log_dir=None, scrollback_lines=10000, renderer='auto',
+                 flow_control=True, compression=None, compression_threshold=512,
+                 shell_integration=False, max_read_bytes=256 * 1024, daemon=None,
+                 predictive_echo=False, frame_rate=None, priority=None, transport='socketio',
+                 file_transfer=False, zygote=None, scheduler=None):
+        if renderer not in RENDERERS:
+            raise ValueError(f"renderer must be one of {', '.join(RENDERERS)}, not {renderer!r}")
+        if transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {', '.join(TRANSPORTS)}, not {transport!r}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}, not {compression!r}")
         self.port = port
         self.host = host
         self.command = command
         self.cmd_args = shlex.split(cmd_args) if cmd_args else []
+        self.session_id = session_id or uuid.uuid4().hex
+        self.log_dir = log_dir
+        self.session_log = None
+        self.scrollback = Scrollback(scrollback_lines) if scrollback_lines else None
+        self.renderer = renderer
+        self.flow_control = flow_control
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.command_tracker = CommandTracker() if shell_integration else None
+        self.max_read_bytes = max_read_bytes
+        self.daemon = daemon
+        self.predictive_echo = predictive_echo
+        self.frame_rate = frame_rate
+        self.transport = transport
+        self.file_transfer = file_transfer
+        # True shares one zygote between all sessions of the process
+        self.zygote = default_zygote() if zygote is True else zygote
+        # True shares one output scheduler between all sessions of the process
+        self.scheduler = default_scheduler() if scheduler is True else scheduler
+        # Handed only to pages that may type, so read-only viewers cannot transfer files
+        self.file_token = secrets.token_urlsafe(24)
+        self.rows = 24
+        self.cols = 80
+        self.visible = True
+        self.focused = False
+        # True picks the default policy; sessions can share one policy
+        self.priority = PriorityPolicy() if priority is True else priority
+        self.viewers = ViewerSet()
+        # Raw WebSocket connections, closed by stop() like socket.io clients
+        self._websockets = {}
+        self.output_bytes = 0
+        self._log_base = 0
+        self._rcfile = None
+        self._recent_output = bytearray()
+        self._output_paused = False
         self.app = None
         self.socketio = None
         self.server_thread = None
+        self._http_server = None
         self.fd = None
         self.child_pid = None
+        self._zygote_child = None
+        self._last_input = 0.0
+        self.exit_code = None
         self.running = False
+        self._reader = None
+        self._wakeup = None
+        self._exit_callbacks = []
+        self._output_callbacks = []
+        # Called by stop() and detach(), e.g. to end output streams
+        self._stop_callbacks = []
+        self._output_cond = threading.Condition()
+        self._expect_offset = 0
+        self._watcher = None
+        self._lifecycle_lock = threading.Lock()
         self._setup_flask_app()
         
     def _setup_flask_app(self):
@@ -38,61 +403,776 @@ class TerminalServer:
         self.app.config["SECRET_KEY"] = "terminal_secret!"
         self.app.config["fd"] = None
         self.app.config["child_pid"] = None
-        self.socketio = SocketIO(self.app, cors_allowed_origins="*")
+        # The HTTP server is a threaded werkzeug server and the PTY reader blocks
+        # in select(), so pin socket.io to plain threads
+        self.socketio = SocketIO(self.app, cors_allowed_origins="*", async_mode="threading")
         
         @self.app.route("/")
         def index():
-            return self._get_html_template()
+            return render_template_string(
+                self._get_html_template(),
+                config=self._get_client_config(read_only="readonly" in request.args),
+                renderer_script=RENDERER_SCRIPT,
+                predictive_echo_script=PREDICTIVE_ECHO_SCRIPT,
+                raw_socket_script=RAW_SOCKET_SCRIPT,
+            )
+
+        @self.app.route("/files", methods=["GET", "PUT"])
+        def files():
+            if not self.file_transfer:
+                return {"error": "file transfer is disabled"}, 404
+            token = request.headers.get("X-Viloxterm-Token") or request.args.get("token", "")
+            if not hmac.compare_digest(token, self.file_token):
+                return {"error": "invalid token"}, 403
+            name = request.args.get("name")
+            if not name:
+                return {"error": "no file name given"}, 400
+            path = self.session_path(name)
+            if request.method == "PUT":
+                return self._upload(path, overwrite=bool(request.args.get("overwrite")))
+            return self._download(path)
+
+        @self.app.route("/ws", websocket=True)
+        def websocket():
+            # Runs alongside socket.io; pages use it with transport='websocket'
+            read_only = bool(request.args.get("readonly"))
+            compression = request.args.get("compression")
+            self._serve_websocket(request.environ, read_only,
+                                  self.compression if compression == self.compression else None)
+            return _WebSocketClosed()
+
+        @self.app.route("/benchmark")
+        def benchmark():
+            return render_template_string(
+                self._get_benchmark_template(),
+                config=self._get_client_config(),
+                renderer_script=RENDERER_SCRIPT,
+            )
             
         @self.socketio.on("pty-input", namespace="/pty")
         def pty_input(data):
-            if self.app.config["fd"]:
-                logging.debug("received input from browser: %s" % data["input"])
-                os.write(self.app.config["fd"], data["input"].encode())
+            if self._is_read_only(request.sid):
+                return
+            logging.debug("received input from browser: %s" % data["input"])
+            self.send(data["input"])
                 
         @self.socketio.on("resize", namespace="/pty")
         def resize(data):
-            if self.app.config["fd"]:
-                logging.debug(f"Resizing window to {data['rows']}x{data['cols']}")
-                self._set_winsize(self.app.config["fd"], data["rows"], data["cols"])
+            if self._is_read_only(request.sid):
+                return
+            logging.debug(f"Resizing window to {data['rows']}x{data['cols']}")
+            self.resize(data["rows"], data["cols"])
                 
+        @self.socketio.on("search", namespace="/pty")
+        def search(data):
+            return self._answer_page("search", data, self._is_read_only(request.sid))
+
+        @self.socketio.on("commands", namespace="/pty")
+        def commands(data=None):
+            return self._answer_page("commands", data, self._is_read_only(request.sid))
+
+        @self.socketio.on("ack", namespace="/pty")
+        def ack(data):
+            viewer = self.viewers.get(request.sid)
+            if viewer:
+                viewer.acknowledge(data.get("bytes", 0))
+
+        @self.socketio.on("disconnect", namespace="/pty")
+        def disconnect():
+            self.viewers.remove(request.sid)
+
         @self.socketio.on("connect", namespace="/pty")
-        def connect():
-            logging.info("new client connected")
+        def connect(auth=None):
+            auth = auth or {}
+            read_only = bool(auth.get("readOnly"))
+            # Only compress for pages that said they can decompress
+            compression = self.compression if auth.get("compression") == self.compression else None
+            logging.info(f"new {'read-only ' if read_only else ''}client connected")
+            self._add_viewer(request.sid, read_only, compression)
             if self.app.config["child_pid"]:
                 return
-                
+            self._spawn()
+
+    def _spawn(self, rows=24, cols=80):
+        """Fork the command on a new PTY and start forwarding its output"""
+        self.rows, self.cols = rows, cols
+        subprocess_cmd = [self.command] + self._shell_integration_args() + self.cmd_args
+        if self.daemon:
+            # The daemon owns the PTY; the attached socket stands in for its fd
+            fd, info = self.daemon.open_session(self.session_id, subprocess_cmd, rows, cols,
+                                                env=dict(os.environ), cwd=os.getcwd())
+            child_pid = info["pid"]
+        elif self.zygote:
+            # Forked by the small zygote process instead of this one
+            self._zygote_child = self.zygote.spawn(subprocess_cmd, rows, cols,
+                                                   env=dict(os.environ), cwd=os.getcwd())
+            child_pid, fd = self._zygote_child.pid, self._zygote_child.fd
+        else:
             (child_pid, fd) = pty.fork()
             if child_pid == 0:
-                subprocess_cmd = [self.command] + self.cmd_args
-                os.execvp(subprocess_cmd[0], subprocess_cmd)
+                try:
+                    os.execvp(subprocess_cmd[0], subprocess_cmd)
+                except OSError as e:
+                    sys.stderr.write(f"{subprocess_cmd[0]}: {e.strerror}\r\n")
+                os._exit(127)
+            self._set_winsize(fd, rows, cols)
+        self.app.config["fd"] = fd
+        self.app.config["child_pid"] = child_pid
+        self.fd = fd
+        self.child_pid = child_pid
+        self.exit_code = None
+        if self.priority:
+            self.priority.attach(child_pid)
+            self._apply_priority()
+        if self.log_dir and not self.session_log:
+            self.session_log = SessionLog(self.log_dir, self.session_id)
+            self._log_base = self.session_log.size - self.output_bytes
+        if self._wakeup is None:
+            # Written to by stop() so the reader does not sit out its select() timeout
+            self._wakeup = os.pipe()
+        self._reader = self.socketio.start_background_task(target=self._read_and_forward_pty_output)
+        logging.info(f"child pid is {child_pid}")
+
+    def session_path(self, name):
+        """Resolve ``name`` against the working directory of the session's shell"""
+        return resolve(session_cwd(self.child_pid), name)
+
+    def _upload(self, path, overwrite=False):
+        """Stream a PUT body to ``path``, on the request's own thread"""
+        try:
+            size = receive_file(request.stream, path, overwrite, request.content_length)
+        except FileExistsError as e:
+            return {"error": str(e)}, 409
+        except (OSError, EOFError) as e:
+            logging.warning(f"upload to {path} failed: {e}")
+            return {"error": str(e)}, 400 if isinstance(e, EOFError) else 403
+        return {"path": path, "bytes": size}, 201
+
+    def _download(self, path):
+        try:
+            size, chunks = file_chunks(path)
+        except OSError as e:
+            return {"error": str(e)}, 404
+        response = Response(chunks, mimetype="application/octet-stream", direct_passthrough=True)
+        response.headers["Content-Length"] = str(size)
+        response.headers["Content-Disposition"] = (
+            f"attachment; filename*=UTF-8''{quote(os.path.basename(path))}")
+        return response
+
+    def _answer_page(self, name, data, read_only=False):
+        """_page_request(), answering malformed requests with None"""
+        try:
+            return self._page_request(name, data, read_only)
+        except ValueError as e:
+            logging.debug(str(e))
+            return None
+
+    def _page_request(self, name, data, read_only=False):
+        """Answer a page's search or commands request; ValueError if it is malformed
+
+        Queries are limited to MAX_SEARCH_QUERY characters and MAX_SEARCH_HITS
+        hits, and read-only pages can only search for plain text, so an
+        observer cannot tie up the session with an expensive pattern.
+        """
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{name} request arguments must be an object")
+        if name == "search":
+            query = data.get("query", "")
+            limit = data.get("limit", 100)
+            if not isinstance(query, str) or len(query) > self.MAX_SEARCH_QUERY:
+                raise ValueError(f"search query must be at most {self.MAX_SEARCH_QUERY} characters")
+            if not isinstance(limit, int) or isinstance(limit, bool):
+                raise ValueError("search limit must be an integer")
+            return {
+                "query": query,
+                "hits": self.search_scrollback(
+                    query,
+                    regex=bool(data.get("regex", False)) and not read_only,
+                    case_sensitive=bool(data.get("caseSensitive", False)),
+                    limit=min(limit, self.MAX_SEARCH_HITS),
+                ),
+            }
+        if name == "commands":
+            start, stop = data.get("start", 0), data.get("stop")
+            if not self._is_index(start) or not (stop is None or self._is_index(stop)):
+                raise ValueError("commands start must be an integer and stop an integer or null")
+            return self.commands(start, stop)
+        raise ValueError(f"unknown request {name!r}")
+
+    @staticmethod
+    def _is_index(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def _serve_websocket(self, environ, read_only=False, compression=None):
+        """Serve one page over the raw WebSocket protocol until it disconnects"""
+        ws = simple_websocket.Server(environ, max_message_size=self.MAX_WEBSOCKET_MESSAGE)
+        encoder = OutputEncoder(compression, self.compression_threshold)
+        # The viewer, the reader thread (exit) and this thread all send
+        send_lock = threading.Lock()
+        self._websockets[ws] = send_lock
+
+        def send(message):
+            with send_lock:
+                try:
+                    ws.send(message)
+                except (simple_websocket.ConnectionClosed, ConnectionError):
+                    # The page went away; the receive loop notices and cleans up
+                    pass
+
+        def on_exit(code):
+            send(encode_exit(code))
+
+        viewer = self.add_viewer(lambda data: send(encode_output(encoder.encode(data))),
+                                 read_only=read_only, sid=f"ws-{uuid.uuid4().hex}")
+        self.add_exit_callback(on_exit)
+        logging.info(f"new {'read-only ' if read_only else ''}WebSocket client connected")
+        if not self.app.config["child_pid"]:
+            self._spawn()
+        try:
+            while True:
+                try:
+                    opcode, value = decode_message(ws.receive())
+                except ValueError as e:
+                    logging.debug(f"ignoring WebSocket message: {e}")
+                    continue
+                if opcode == ACK:
+                    viewer.acknowledge(value)
+                elif opcode == CALL:
+                    result = self._answer_page(value.get("name"), value.get("args"), read_only)
+                    send(encode_result(value.get("id"), result))
+                elif read_only:
+                    continue
+                elif opcode == INPUT:
+                    self.send(value)
+                elif opcode == RESIZE:
+                    self.resize(*value)
+        except simple_websocket.ConnectionClosed:
+            pass
+        finally:
+            self._websockets.pop(ws, None)
+            self.remove_exit_callback(on_exit)
+            self.remove_viewer(viewer)
+
+    def _add_viewer(self, sid, read_only=False, compression=None):
+        """Attach a browser client to the session"""
+        encoder = OutputEncoder(compression, self.compression_threshold)
+
+        def send(data):
+            self.socketio.emit("pty-output", encoder.encode(data), namespace="/pty", to=sid)
+
+        return self.add_viewer(send, read_only=read_only, sid=sid)
+
+    def add_viewer(self, send, read_only=False, sid=None):
+        """Attach a viewer with its own output queue and sender, and return it
+
+        ``send(data)`` is called with batches of output on the viewer's own
+        thread. With flow control, batches stop once FLOW_HIGH_WATERMARK bytes
+        are unacknowledged until ``viewer.acknowledge(nbytes)`` credits them.
+        Detach with remove_viewer().
+
+        With ``frame_rate`` set, floods of scrolling output reach the viewer
+        as at most that many frames per second, each holding only the lines
+        left on screen; other output is passed through unchanged.
+
+        With a ``scheduler``, batches are sent in pieces of at most its
+        quantum, each waiting for this session's turn.
+        """
+        if self.scheduler:
+            send = self._scheduled(send)
+        viewer = Viewer(
+            sid or f"local-{uuid.uuid4().hex}", send, read_only=read_only,
+            max_queued_bytes=self.VIEWER_QUEUE_BYTES,
+            window_bytes=self.FLOW_HIGH_WATERMARK if self.flow_control else 0,
+            collapse=self._screen_tail if self.frame_rate else None,
+            frame_interval=1 / self.frame_rate if self.frame_rate else 0,
+        )
+        if self._recent_output:
+            # Late joiners start from the current state rather than a blank screen
+            viewer.request_snapshot()
+        if not self.visible:
+            viewer.suspend()
+        self.viewers.add(viewer)
+        self.socketio.start_background_task(viewer.run, self._snapshot)
+        return viewer
+
+    def _scheduled(self, send):
+        """Wrap a viewer's send so it shares the output path fairly with other sessions"""
+        scheduler = self.scheduler
+
+        def scheduled_send(data):
+            # Small output right after a keystroke is most likely its echo
+            interactive = (len(data) <= self.FAST_LANE_BYTES and
+                           time.monotonic() - self._last_input < self.FAST_LANE_WINDOW)
+            for piece in scheduler.split(data):
+                with scheduler.turn(self.session_id, len(piece), interactive):
+                    send(piece)
+
+        return scheduled_send
+
+    def _screen_tail(self, data):
+        return screen_tail(data, self.rows)
+
+    def remove_viewer(self, viewer):
+        """Detach a viewer returned by add_viewer()"""
+        self.viewers.remove(viewer.sid)
+
+    def set_visible(self, visible):
+        """Hold output back from viewers while the terminal is not on screen
+
+        Called by the widgets when they are hidden or shown, e.g. in a
+        background tab. Hidden viewers queue up to VIEWER_QUEUE_BYTES and
+        catch up in one batch when shown again, or get a snapshot if more
+        arrived. The command itself keeps running, at a lower priority if a
+        priority policy was given.
+        """
+        self.visible = visible
+        for viewer in self.viewers:
+            if visible:
+                viewer.resume()
             else:
-                self.app.config["fd"] = fd
-                self.app.config["child_pid"] = child_pid
-                self.fd = fd
-                self.child_pid = child_pid
-                self._set_winsize(fd, 24, 80)
-                self.socketio.start_background_task(target=self._read_and_forward_pty_output)
-                logging.info(f"child pid is {child_pid}")
-                
+                viewer.suspend()
+        self._apply_priority()
+
+    def set_focused(self, focused):
+        """Record whether the terminal has keyboard focus, for the priority policy"""
+        self.focused = focused
+        self._apply_priority()
+
+    def priority_level(self):
+        """'focused', 'visible' or 'hidden', as used by the priority policy"""
+        if not self.visible:
+            return 'hidden'
+        return 'focused' if self.focused else 'visible'
+
+    def _apply_priority(self):
+        pid = self.child_pid
+        if self.priority and pid:
+            self.priority.apply(pid, self.priority_level())
+
+    def _is_read_only(self, sid):
+        viewer = self.viewers.get(sid)
+        return viewer is not None and viewer.read_only
+
+    def _snapshot(self):
+        """Terminal reset followed by the most recent output, starting on a line boundary
+
+        Returned with the stream offset it covers, so the viewer can skip
+        output that was recorded before the snapshot but pushed after it.
+        """
+        with self._output_cond:
+            recent = bytes(self._recent_output)
+            end = self.output_bytes
+        if len(recent) >= self.SNAPSHOT_BYTES:
+            newline = recent.find(b"\n")
+            if newline != -1:
+                recent = recent[newline + 1:]
+        return b"\x1bc" + recent, end
+
     def _set_winsize(self, fd, row, col, xpix=0, ypix=0):
         winsize = struct.pack("HHHH", row, col, xpix, ypix)
         fcntl.ioctl(fd, termios.TIOCSWINSZ, winsize)
         
+    def _shell_integration_args(self):
+        """Arguments that make the shell emit OSC 133 command marks"""
+        if not self.command_tracker:
+            return []
+        if os.path.basename(self.command) != "bash":
+            logging.warning(f"shell integration is only available for bash, not {self.command}")
+            return []
+        if not self._rcfile:
+            self._rcfile = write_bash_rcfile()
+        return ["--rcfile", self._rcfile]
+
     def _read_and_forward_pty_output(self):
-        max_read_bytes = 1024 * 20
+        # Reads go straight into one buffer per session. The read size starts
+        # small for interactive use and doubles while reads keep filling it
+        buffer = memoryview(bytearray(self.max_read_bytes))
+        read_size = min(self.MIN_READ_BYTES, self.max_read_bytes)
+        idle_polls = 0
         while self.running:
-            self.socketio.sleep(0.01)
-            if self.app.config["fd"]:
-                timeout_sec = 0
-                (data_ready, _, _) = select.select([self.app.config["fd"]], [], [], timeout_sec)
-                if data_ready:
-                    try:
-                        output = os.read(self.app.config["fd"], max_read_bytes).decode(errors="ignore")
-                        self.socketio.emit("pty-output", {"output": output}, namespace="/pty")
-                    except OSError:
-                        break
-                        
+            fd = self.app.config["fd"]
+            if not fd or self._is_output_paused():
+                self.socketio.sleep(0.01)
+                continue
+            try:
+                # Block until output arrives so it is forwarded without a polling delay
+                (data_ready, _, _) = select.select([fd, self._wakeup[0]], [], [], self.READ_TIMEOUT)
+                # EIO or EOF once the child and everything else holding the PTY are gone
+                nbytes = self._read_available(fd, buffer[:read_size]) if fd in data_ready else None
+            except (OSError, ValueError):
+                nbytes = 0
+            if nbytes:
+                idle_polls = 0
+                self._handle_output(buffer[:nbytes])
+                if nbytes == read_size:
+                    read_size = min(read_size * 2, self.max_read_bytes)
+                elif nbytes < read_size // 4:
+                    read_size = max(read_size // 2, self.MIN_READ_BYTES)
+                continue
+            if nbytes == 0 and self.daemon and self.running and self._reattach_daemon():
+                continue
+            idle_polls += 1
+            # Background jobs can keep the PTY open after the shell exits, so
+            # also poll for the child itself now and then
+            if nbytes == 0 or (idle_polls % 10 == 0 and not self.daemon and self._reap()):
+                if self.running:
+                    self._handle_child_exit()
+                break
+
+    @staticmethod
+    def _read_available(fd, buffer):
+        """Fill ``buffer`` with whatever output is ready; returns the byte count
+
+        A PTY hands out at most a few KB per read, so keep reading while more
+        is ready rather than passing each small read on separately.
+        """
+        nbytes = os.readv(fd, [buffer])
+        while nbytes and nbytes < len(buffer):
+            try:
+                if not select.select([fd], [], [], 0)[0]:
+                    break
+                more = os.readv(fd, [buffer[nbytes:]])
+            except OSError:
+                # Reported by the next read, once this output is forwarded
+                break
+            if not more:
+                break
+            nbytes += more
+        return nbytes
+
+    def _reap(self, timeout=0):
+        """Collect the child's exit status without blocking longer than ``timeout``
+
+        Returns True once the child has been reaped (or is not our child);
+        ``timeout=None`` waits indefinitely.
+        """
+        pid = self.child_pid
+        if not pid:
+            return True
+        if self._zygote_child:
+            # The zygote reaps the child and reports its exit code
+            if not self._zygote_child.wait(timeout):
+                return False
+            self.exit_code = self._zygote_child.exit_code
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                reaped, status = os.waitpid(pid, 0 if timeout is None else os.WNOHANG)
+            except ChildProcessError:
+                return True
+            if reaped:
+                self.exit_code = os.waitstatus_to_exitcode(status)
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def _close_pty(self):
+        fd, self.fd = self.fd, None
+        self.app.config["fd"] = None
+        if fd:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _handle_child_exit(self):
+        """The child went away on its own: reap it, release the PTY and report its status"""
+        with self._lifecycle_lock:
+            if not self.child_pid:
+                return
+            if self.daemon:
+                self.exit_code = self._daemon_exit_code()
+            else:
+                self._reap(timeout=self.KILL_TIMEOUT)
+            self._close_pty()
+            if self.priority:
+                self.priority.release(self.child_pid)
+            self.child_pid = None
+            self._zygote_child = None
+            self.app.config["child_pid"] = None
+        with self._output_cond:
+            self._output_cond.notify_all()
+        logging.info(f"child exited with code {self.exit_code}")
+        self.socketio.emit("pty-exit", {"code": self.exit_code}, namespace="/pty")
+        for callback in list(self._exit_callbacks):
+            try:
+                callback(self.exit_code)
+            except Exception:
+                logging.exception("terminal exit callback failed")
+
+    def add_exit_callback(self, callback):
+        """Call ``callback(exit_code)`` from the reader thread when the child exits by itself"""
+        self._exit_callbacks.append(callback)
+
+    def remove_exit_callback(self, callback):
+        if callback in self._exit_callbacks:
+            self._exit_callbacks.remove(callback)
+
+    def add_output_callback(self, callback):
+        """Call ``callback(chunk)`` from the reader thread with every chunk of output
+
+        ``chunk`` is a memoryview over the reader's buffer, valid only until
+        the callback returns; use ``bytes(chunk)`` to keep it. Callbacks run
+        before the output is logged, so they should return quickly.
+        """
+        self._output_callbacks.append(callback)
+
+    def remove_output_callback(self, callback):
+        if callback in self._output_callbacks:
+            self._output_callbacks.remove(callback)
+
+    def output_stream(self):
+        """Async iterator over output chunks from now on, until the child exits or stop()
+
+        Must be called from a running event loop::
+
+            async for chunk in server.output_stream():
+                ...
+        """
+        return OutputStream(self)
+
+    def spawn(self, rows=24, cols=80):
+        """Start the command without waiting for a browser; returns the child's pid
+
+        For driving a session from Python with send(), wait_for() and the
+        output callbacks. start() is only needed to also serve the page.
+        """
+        with self._lifecycle_lock:
+            self.running = True
+            if not self.child_pid:
+                self._spawn(rows, cols)
+        return self.child_pid
+
+    def send(self, data):
+        """Write input to the session as if it was typed; str is encoded as UTF-8"""
+        if isinstance(data, str):
+            data = data.encode()
+        fd = self.fd
+        if not fd:
+            return
+        self._last_input = time.monotonic()
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    def resize(self, rows, cols):
+        """Set the session's terminal size"""
+        if not self.fd:
+            return
+        self.rows, self.cols = rows, cols
+        if self.daemon:
+            self.daemon.resize(self.session_id, rows, cols)
+        else:
+            self._set_winsize(self.fd, rows, cols)
+
+    def wait_for(self, pattern, timeout=None):
+        """Block until the output matches ``pattern`` and return the match
+
+        ``pattern`` is a str or bytes regular expression matched against raw
+        output. The search starts where the previous wait_for() match ended,
+        so output that arrives before the call, e.g. right after send(), is
+        not missed as long as it is within the last SNAPSHOT_BYTES. Raises
+        TimeoutError, or EOFError once the child has exited without a match.
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode()
+        compiled = re.compile(pattern)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._output_cond:
+            while True:
+                recent_start = self.output_bytes - len(self._recent_output)
+                start = max(self._expect_offset, recent_start)
+                # Search a copy; the buffer changes once the lock is released
+                window = bytes(self._recent_output[start - recent_start:])
+                match = compiled.search(window)
+                if match:
+                    self._expect_offset = start + match.end()
+                    return match
+                if not self.child_pid:
+                    raise EOFError(f"session ended before output matched {compiled.pattern!r}")
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"no output matched {compiled.pattern!r} within {timeout}s")
+                self._output_cond.wait(remaining)
+
+    def _reattach_daemon(self):
+        """Attach again after the daemon closed our stream; False once the session has ended
+
+        Output sent while detached is not replayed, so the screen never
+        shows the same output twice.
+        """
+        try:
+            if not self.daemon.status(self.session_id).get("alive"):
+                return False
+            fd, _ = self.daemon.attach(self.session_id, replay=False)
+        except (OSError, RuntimeError):
+            return False
+        with self._lifecycle_lock:
+            if not self.running or not self.child_pid:
+                os.close(fd)
+                return False
+            self._close_pty()
+            self.app.config["fd"] = fd
+            self.fd = fd
+        logging.warning(f"reattached to daemon session {self.session_id} after losing its stream")
+        return True
+
+    def _daemon_exit_code(self):
+        try:
+            return self.daemon.status(self.session_id).get("exit_code")
+        except (OSError, RuntimeError):
+            return None
+
+    def _terminate_child(self):
+        """Hang up the PTY, then SIGTERM, then SIGKILL after KILL_TIMEOUT; always reaps"""
+        if self.daemon:
+            # The daemon escalates and reaps for sessions it owns
+            self._close_pty()
+            try:
+                self.daemon.kill(self.session_id)
+            except (OSError, RuntimeError):
+                logging.warning(f"could not end daemon session {self.session_id}")
+            return
+        # Closing the master hangs up the terminal, which interactive shells
+        # honour even though they ignore SIGTERM
+        self._close_pty()
+        try:
+            os.kill(self.child_pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        if not self._reap(timeout=self.KILL_TIMEOUT):
+            logging.info(f"child {self.child_pid} ignored SIGTERM, killing it")
+            try:
+                os.kill(self.child_pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self._reap(timeout=None)
+
+    def _handle_output(self, data):
+        """Record a chunk of PTY output, then forward it to the browser
+
+        ``data`` may be a memoryview over the reader's buffer. It is copied
+        once, and only if something keeps the output beyond this call.
+        Recording comes first so a viewer resyncing from a snapshot in
+        between gets the chunk in the snapshot rather than not at all.
+        """
+        with self._output_cond:
+            start = self.output_bytes
+            self.output_bytes += len(data)
+            self._recent_output += data
+            if len(self._recent_output) > self.SNAPSHOT_BYTES:
+                del self._recent_output[:-self.SNAPSHOT_BYTES]
+        keeps_output = len(self.viewers) or self._watcher or self.command_tracker or self.scrollback
+        chunk = bytes(data) if keeps_output else None
+        if chunk is not None:
+            self.viewers.push(chunk, start + len(chunk))
+            if self._watcher:
+                self._watcher.feed(chunk)
+            if self.command_tracker:
+                self.command_tracker.feed(chunk, start)
+        for callback in self._output_callbacks:
+            try:
+                callback(data)
+            except Exception:
+                logging.exception("terminal output callback failed")
+        if self.session_log:
+            self.session_log.append(data)
+        if self.scrollback:
+            self.scrollback.feed(chunk)
+        with self._output_cond:
+            self._output_cond.notify_all()
+
+    def _is_output_paused(self):
+        """Whether PTY reads are held back until the session's owners catch up
+
+        Only viewers that can type count; read-only observers that fall
+        behind are resynced from a snapshot instead of slowing the session.
+        """
+        if not self.flow_control:
+            return False
+        limit = self.FLOW_LOW_WATERMARK if self._output_paused else self.FLOW_HIGH_WATERMARK
+        self._output_paused = self.viewers.owner_backlog() > limit
+        return self._output_paused
+
+    def watch(self, pattern, callback, flags=0):
+        """Call ``callback(match)`` whenever the output matches ``pattern``
+
+        Matching runs on a separate thread against the output with escape
+        sequences removed, so watches never delay the output itself. Returns
+        a handle for unwatch().
+        """
+        if self._watcher is None:
+            self._watcher = PatternWatcher()
+        return self._watcher.watch(pattern, callback, flags)
+
+    def unwatch(self, handle):
+        """Remove a watch added with watch()"""
+        if self._watcher is None:
+            return False
+        return self._watcher.unwatch(handle)
+
+    def commands(self, start=0, stop=None):
+        """Commands recorded by shell integration, oldest first; see CommandTracker"""
+        if not self.command_tracker:
+            return []
+        return self.command_tracker.commands(start, stop)
+
+    def command_output(self, index):
+        """Raw output of command ``index``, or None if it is no longer available
+
+        Output is read from the session log when there is one, otherwise only
+        recent output is still held.
+        """
+        command = self.command_tracker.get(index) if self.command_tracker else None
+        if not command:
+            return None
+        start = command["output_start"]
+        end = command["output_end"] if command["output_end"] is not None else self.output_bytes
+        if self.session_log:
+            return self.session_log.read_bytes(self._log_base + start, self._log_base + end)
+        recent_start = self.output_bytes - len(self._recent_output)
+        if start < recent_start:
+            return None
+        return bytes(self._recent_output[start - recent_start:end - recent_start])
+
+    def search_scrollback(self, query, regex=False, case_sensitive=False, limit=100):
+        """Return the most recent scrollback hits for ``query`` with their positions"""
+        if not self.scrollback:
+            return []
+        try:
+            return self.scrollback.search(query, regex=regex, case_sensitive=case_sensitive,
+                                          limit=limit)
+        except re.error as e:
+            logging.debug(f"Invalid scrollback search pattern {query!r}: {e}")
+            return []
+
+    def read_log_lines(self, start, stop):
+        """Return lines ``start`` to ``stop`` of the session log"""
+        if not self.session_log:
+            return []
+        return self.session_log.lines(start, stop)
+
+    def search_log(self, pattern, limit=None):
+        """Yield ``(line_number, offset, line)`` for regex matches in the session log"""
+        if not self.session_log:
+            return iter(())
+        return self.session_log.search(pattern, limit=limit)
+
+    def _get_client_config(self, read_only=False):
+        """Options handed to the page as ``config``"""
+        return {
+            "renderer": self.renderer,
+            "flowControl": self.flow_control,
+            "ackBytes": self.ACK_BYTES,
+            "compression": self.compression,
+            "predictiveEcho": self.predictive_echo,
+            "transport": self.transport,
+            "fileToken": self.file_token if self.file_transfer and not read_only else None,
+        }
+
     def _get_html_template(self):
         return '''
 <!DOCTYPE html>
@@ -133,28 +1213,27 @@ class TerminalServer:
             scrollbar-color: #464647 #1e1e1e !important;
         }
     </style>
-    <link rel="stylesheet" href="https://unpkg.com/xterm@4.11.0/css/xterm.css" />
+    <link rel="stylesheet" href="https://unpkg.com/@xterm/xterm@5.5.0/css/xterm.css" />
 </head>
 <body>
     <div id="terminal"></div>
-    <script src="https://unpkg.com/xterm@4.11.0/lib/xterm.js"></script>
-    <script src="https://unpkg.com/xterm-addon-fit@0.5.0/lib/xterm-addon-fit.js"></script>
+    <script src="https://unpkg.com/@xterm/xterm@5.5.0/lib/xterm.js"></script>
+    <script src="https://unpkg.com/@xterm/addon-fit@0.10.0/lib/addon-fit.js"></script>
+    {% if config.renderer in ('webgl', 'auto') %}
+    <script src="https://unpkg.com/@xterm/addon-webgl@0.18.0/lib/addon-webgl.js"></script>
+    {% endif %}
+    {% if config.renderer in ('canvas', 'webgl', 'auto') %}
+    <script src="https://unpkg.com/@xterm/addon-canvas@0.7.0/lib/addon-canvas.js"></script>
+    {% endif %}
+    {% if config.transport == 'socketio' %}
     <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.min.js"></script>
+    {% endif %}
     <script>
-        // Patch canvas getContext to always use willReadFrequently for 2D contexts
-        // This fixes the Chrome warning about getImageData performance
-        (function() {
-            const originalGetContext = HTMLCanvasElement.prototype.getContext;
-            HTMLCanvasElement.prototype.getContext = function(contextType, ...args) {
-                if (contextType === '2d') {
-                    // Ensure willReadFrequently is set for 2D contexts
-                    let contextAttributes = args[0] || {};
-                    contextAttributes.willReadFrequently = true;
-                    return originalGetContext.call(this, contextType, contextAttributes);
-                }
-                return originalGetContext.apply(this, arguments);
-            };
-        })();
+        const config = {{ config|tojson }};
+{{ renderer_script|safe }}
+{{ predictive_echo_script|safe }}
+{% if config.transport == 'websocket' %}{{ raw_socket_script|safe }}{% endif %}
+        const renderer = chooseRenderer(config.renderer);
         
         const term = new Terminal({
             cursorBlink: true,
@@ -169,6 +1248,7 @@ class TerminalServer:
         const fit = new FitAddon.FitAddon();
         term.loadAddon(fit);
         term.open(document.getElementById("terminal"));
+        window.terminalRenderer = loadRenderer(term, renderer);
         
         // Custom fit function that calculates exact dimensions
         function customFit() {
@@ -181,9 +1261,11 @@ class TerminalServer:
                 return;
             }
             
+            // xterm.js 5 reports cell size under dimensions.css.cell, 4.x used actualCell*
             const dims = core._renderService.dimensions;
-            const cellHeight = dims.actualCellHeight || 17;
-            const cellWidth = dims.actualCellWidth || 9;
+            const cell = dims.css ? dims.css.cell : {};
+            const cellHeight = cell.height || dims.actualCellHeight || 17;
+            const cellWidth = cell.width || dims.actualCellWidth || 9;
             
             // Get container dimensions
             const containerHeight = terminalElement.offsetHeight;
@@ -222,14 +1304,108 @@ class TerminalServer:
             }
         }
         
+        // Open the page with ?readonly to watch the session without typing into it
+        const readOnly = new URLSearchParams(window.location.search).has("readonly");
+        if (readOnly) {
+            term.options.disableStdin = true;
+        }
+        const predictor = config.predictiveEcho && !readOnly ? new PredictiveEcho(term) : null;
+        window.predictiveEcho = predictor;
+        
         term.onData((data) => {
             socket.emit("pty-input", { input: data });
+            if (predictor) predictor.input(data);
         });
+        const canDecompress = Boolean(config.compression) && typeof DecompressionStream !== "undefined";
+        const compression = canDecompress ? config.compression : null;
+        const socket = config.transport === "websocket"
+            ? new RawSocket("/ws", { readonly: readOnly ? "1" : "", compression: compression })
+            : io.connect("/pty", { auth: { readOnly: readOnly, compression: compression } });
+        
+        // Acknowledge output once xterm.js has parsed it so the server can pace the PTY
+        let unackedBytes = 0;
+        function writeOutput(bytes, size) {
+            if (predictor) predictor.undo();
+            term.write(bytes, () => {
+                unackedBytes += size;
+                if (config.flowControl && unackedBytes >= config.ackBytes) {
+                    socket.emit("ack", { bytes: unackedBytes });
+                    unackedBytes = 0;
+                }
+            });
+            if (predictor) predictor.reconcile(bytes);
+        }
         
-        const socket = io.connect("/pty");
+        // Compressed frames ("z") share one zlib stream. Plain frames that arrive
+        // while compressed ones are still inflating wait behind them; each
+        // frame's uncompressed size "n" says where one frame's output ends.
+        const frames = [];
+        let inflateWriter = null;
+        function flushFrames() {
+            while (frames.length && frames[0].data) {
+                const frame = frames.shift();
+                writeOutput(frame.data, frame.n);
+            }
+        }
+        function startInflater() {
+            const stream = new DecompressionStream("deflate");
+            const reader = stream.readable.getReader();
+            inflateWriter = stream.writable.getWriter();
+            (async () => {
+                for (;;) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    let offset = 0;
+                    while (offset < value.length) {
+                        const frame = frames.find((f) => !f.data);
+                        const take = Math.min(frame.n - frame.filled, value.length - offset);
+                        frame.parts.push(value.subarray(offset, offset + take));
+                        frame.filled += take;
+                        offset += take;
+                        if (frame.filled === frame.n) {
+                            frame.data = new Uint8Array(frame.n);
+                            let position = 0;
+                            for (const part of frame.parts) {
+                                frame.data.set(part, position);
+                                position += part.length;
+                            }
+                        }
+                    }
+                    flushFrames();
+                }
+            })();
+        }
         
         socket.on("pty-output", function (data) {
-            term.write(data.output);
+            if (data.z) {
+                if (!inflateWriter) startInflater();
+                frames.push({ n: data.n, filled: 0, parts: [], data: null });
+                inflateWriter.write(new Uint8Array(data.z));
+            } else if (frames.length) {
+                frames.push({ n: data.n, data: new Uint8Array(data.output) });
+            } else {
+                writeOutput(new Uint8Array(data.output), data.n || 0);
+            }
+        });
+        
+        // Search the server-side scrollback, which holds far more than the renderer
+        function searchScrollback(query, options = {}) {
+            return new Promise((resolve) => {
+                socket.emit("search", Object.assign({ query: query }, options), resolve);
+            });
+        }
+        window.searchScrollback = searchScrollback;
+        
+        function listCommands(start = 0, stop = null) {
+            return new Promise((resolve) => {
+                socket.emit("commands", { start: start, stop: stop }, resolve);
+            });
+        }
+        window.listCommands = listCommands;
+        
+        socket.on("pty-exit", (data) => {
+            const code = data.code === null ? "unknown" : data.code;
+            term.write("\\r\\n[process exited with code " + code + "]\\r\\n");
         });
         
         socket.on("connect", () => {
@@ -258,13 +1434,59 @@ class TerminalServer:
             customFit();
         }, 200);
         
+        // Dropped files are streamed over HTTP into the session's working
+        // directory, never through the PTY; only their names are typed
+        function shellQuote(name) {
+            if (/^[A-Za-z0-9_@%+=:,./-]+$/.test(name)) return name;
+            return "'" + name.split("'").join(`'"'"'`) + "'";
+        }
+        
+        async function uploadFile(file) {
+            const url = "/files?name=" + encodeURIComponent(file.name);
+            const headers = { "X-Viloxterm-Token": config.fileToken };
+            let response = await fetch(url, { method: "PUT", body: file, headers: headers });
+            if (response.status === 409 && confirm(file.name + " already exists. Replace it?")) {
+                response = await fetch(url + "&overwrite=1", { method: "PUT", body: file, headers: headers });
+            }
+            if (!response.ok) {
+                const reason = (await response.json().catch(() => ({}))).error || response.statusText;
+                term.write("\\r\\n[upload of " + file.name + " failed: " + reason + "]\\r\\n");
+                return null;
+            }
+            return file.name;
+        }
+        
+        function downloadFile(name) {
+            const link = document.createElement("a");
+            link.href = "/files?name=" + encodeURIComponent(name) + "&token=" + encodeURIComponent(config.fileToken);
+            link.download = "";
+            link.click();
+        }
+        
+        if (config.fileToken) {
+            const element = document.getElementById("terminal");
+            element.addEventListener("dragover", (e) => e.preventDefault());
+            element.addEventListener("drop", async (e) => {
+                e.preventDefault();
+                const names = [];
+                for (const file of e.dataTransfer.files) {
+                    const name = await uploadFile(file);
+                    if (name) names.push(shellQuote(name));
+                }
+                if (names.length) term.paste(names.join(" ") + " ");
+                term.focus();
+            });
+            window.uploadFile = uploadFile;
+            window.downloadFile = downloadFile;
+        }
+        
         term.attachCustomKeyEventHandler((e) => {
             if (e.type !== "keydown") return true;
             if (e.ctrlKey && e.shiftKey) {
                 const key = e.key.toLowerCase();
                 if (key === "v") {
                     navigator.clipboard.readText().then((toPaste) => {
-                        term.writeText(toPaste);
+                        term.paste(toPaste);
                     });
                     return false;
                 } else if (key === "c" || key === "x") {
@@ -272,6 +1494,11 @@ class TerminalServer:
                     navigator.clipboard.writeText(toCopy);
                     term.focus();
                     return false;
+                } else if (key === "d" && config.fileToken) {
+                    const name = prompt("Download which file? (relative to the shell's directory)");
+                    if (name) downloadFile(name);
+                    term.focus();
+                    return false;
                 }
             }
             return true;
@@ -280,46 +1507,215 @@ class TerminalServer:
 </body>
 </html>
 '''
-    
+
+    def _get_benchmark_template(self):
+        """Page that measures render throughput for each renderer"""
+        return '''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8" />
+    <title>Terminal Render Benchmark</title>
+    <style>
+        body { margin: 0; padding: 10px; background: #1e1e1e; color: #d4d4d4; font-family: sans-serif; }
+        #terminal { width: 960px; height: 480px; }
+        td, th { padding: 2px 12px; text-align: right; }
+    </style>
+    <link rel="stylesheet" href="https://unpkg.com/@xterm/xterm@5.5.0/css/xterm.css" />
+</head>
+<body>
+    <table id="results">
+        <tr><th>renderer</th><th>MB</th><th>seconds</th><th>MB/s</th><th>frames</th><th>fps</th></tr>
+    </table>
+    <div id="terminal"></div>
+    <script src="https://unpkg.com/@xterm/xterm@5.5.0/lib/xterm.js"></script>
+    <script src="https://unpkg.com/@xterm/addon-webgl@0.18.0/lib/addon-webgl.js"></script>
+    <script src="https://unpkg.com/@xterm/addon-canvas@0.7.0/lib/addon-canvas.js"></script>
+    <script>
+        const config = {{ config|tojson }};
+{{ renderer_script|safe }}
+        const params = new URLSearchParams(window.location.search);
+        const megabytes = parseFloat(params.get('mb') || '8');
+        const renderers = (params.get('renderers') || 'webgl,canvas,dom').split(',');
+        const chunkSize = 20 * 1024;
+        
+        // Colored, variable-length lines similar to build or log output
+        function makeChunk() {
+            let chunk = '';
+            let i = 0;
+            while (chunk.length < chunkSize) {
+                chunk += '\\x1b[3' + (i % 8) + 'm' + i + '\\x1b[0m ' + 'output '.repeat(i % 12) + '\\r\\n';
+                i++;
+            }
+            return chunk;
+        }
+        
+        function run(rendererName) {
+            return new Promise((resolve) => {
+                const element = document.getElementById('terminal');
+                const term = new Terminal({ scrollback: 1000 });
+                term.open(element);
+                const used = loadRenderer(term, rendererName);
+                const chunk = makeChunk();
+                const total = Math.ceil(megabytes * 1024 * 1024 / chunk.length);
+                let frames = 0;
+                let done = false;
+                function countFrame() {
+                    frames++;
+                    if (!done) requestAnimationFrame(countFrame);
+                }
+                requestAnimationFrame(countFrame);
+                const started = performance.now();
+                let written = 0;
+                function writeNext() {
+                    if (written === total) {
+                        done = true;
+                        const seconds = (performance.now() - started) / 1000;
+                        const mb = total * chunk.length / (1024 * 1024);
+                        term.dispose();
+                        resolve({
+                            renderer: used,
+                            requested: rendererName,
+                            megabytes: mb,
+                            seconds: seconds,
+                            bytesPerSecond: mb * 1024 * 1024 / seconds,
+                            frames: frames,
+                            fps: frames / seconds,
+                        });
+                        return;
+                    }
+                    written++;
+                    term.write(chunk, writeNext);
+                }
+                writeNext();
+            });
+        }
+        
+        async function runAll() {
+            const results = [];
+            for (const name of renderers) {
+                const result = await run(name);
+                results.push(result);
+                const row = document.getElementById('results').insertRow();
+                [result.renderer, result.megabytes.toFixed(1), result.seconds.toFixed(2),
+                 (result.bytesPerSecond / 1048576).toFixed(1), result.frames,
+                 result.fps.toFixed(1)].forEach((value) => {
+                    row.insertCell().textContent = value;
+                });
+                console.log(JSON.stringify(result));
+            }
+            window.benchmarkResults = results;
+        }
+        
+        window.addEventListener('load', runAll);
+    </script>
+</body>
+</html>
+'''
+
     def start(self):
         """Start the terminal server in a background thread"""
-        if self.running:
+        if self._http_server is not None:
             return self.port
             
+        # Binding here rather than in the thread means the port is known, and
+        # already accepting connections, by the time start() returns
+        self._http_server = make_server(self.host, self.port, self.app, threaded=True,
+                                        request_handler=_NoDelayRequestHandler)
+        self.port = self._http_server.server_port
         self.running = True
         
-        # If port is 0, find an available port
-        if self.port == 0:
-            import socket
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(('', 0))
-                self.port = s.getsockname()[1]
-        
-        def run_server():
-            self.socketio.run(self.app, debug=False, port=self.port, host=self.host, allow_unsafe_werkzeug=True)
-            
-        self.server_thread = threading.Thread(target=run_server, daemon=True)
+        # A short poll interval keeps stop(), which waits for serve_forever, quick
+        self.server_thread = threading.Thread(target=self._http_server.serve_forever,
+                                              kwargs={"poll_interval": 0.05}, daemon=True)
         self.server_thread.start()
-        
-        # Wait a moment for server to start
-        time.sleep(0.5)
                 
         return self.port
         
+    def _shutdown_http_server(self, timeout=2.0):
+        """Disconnect clients, stop serving and release the listening socket"""
+        for viewer in self.viewers:
+            if viewer.sid.startswith("ws-"):
+                continue
+            try:
+                self.socketio.server.disconnect(viewer.sid, namespace="/pty")
+            except Exception:
+                logging.debug(f"could not disconnect {viewer.sid}", exc_info=True)
+        for ws, send_lock in list(self._websockets.items()):
+            # Not in the middle of a frame, unless a send is stuck
+            locked = send_lock.acquire(timeout=1.0)
+            try:
+                ws.close()
+            except Exception:
+                logging.debug("could not close a WebSocket client", exc_info=True)
+            finally:
+                if locked:
+                    send_lock.release()
+        http_server, self._http_server = self._http_server, None
+        if http_server is None:
+            return
+        if self.server_thread is not None and self.server_thread.is_alive():
+            http_server.shutdown()
+            self.server_thread.join(timeout)
+        http_server.server_close()
+        self.server_thread = None
+        
     def stop(self):
-        """Stop the terminal server"""
+        """Stop the terminal server, its child process and its HTTP thread"""
+        self._shutdown(end_session=True)
+
+    def detach(self):
+        """Stop serving but leave a daemon-owned session running to attach to later
+
+        Without a daemon the child cannot outlive the server, so this is stop().
+        """
+        self._shutdown(end_session=not self.daemon)
+
+    def _shutdown(self, end_session):
         self.running = False
-        if self.child_pid:
+        reader = self._reader
+        if reader is not None and reader is not threading.current_thread():
+            os.write(self._wakeup[1], b"x")
+            reader.join(1.0)
+        self._reader = None
+        if self._wakeup:
+            for wakeup_fd in self._wakeup:
+                os.close(wakeup_fd)
+            self._wakeup = None
+        with self._lifecycle_lock:
+            if self.child_pid:
+                if end_session:
+                    self._terminate_child()
+                    if self.priority:
+                        self.priority.release(self.child_pid)
+                    if self.scheduler:
+                        self.scheduler.forget(self.session_id)
+                self.child_pid = None
+                self._zygote_child = None
+                self.app.config["child_pid"] = None
+            self._close_pty()
+        with self._output_cond:
+            self._output_cond.notify_all()
+        for callback in list(self._stop_callbacks):
             try:
-                os.kill(self.child_pid, 15)  # SIGTERM
-            except ProcessLookupError:
-                pass
-        if self.fd:
+                callback()
+            except Exception:
+                logging.exception("terminal stop callback failed")
+        self._shutdown_http_server()
+        if self.session_log:
+            self.session_log.close()
+        self.viewers.close()
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+        if self._rcfile:
             try:
-                os.close(self.fd)
+                os.unlink(self._rcfile)
             except OSError:
                 pass
+            self._rcfile = None
                 
-    def get_url(self):
-        """Get the URL for the terminal server"""
-        return f"http://{self.host}:{self.port}"
\ No newline at end of file
+    def get_url(self, read_only=False):
+        """Get the URL for the terminal server, optionally for a read-only observer"""
+        url = f"http://{self.host}:{self.port}"
+        return f"{url}/?readonly=1" if read_only else url
\ No newline at end of file
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Session Log Store
+Append-only on-disk log of a terminal session's output with line and time indexes
+"""
+import os
+import re
+import mmap
+import time
+import struct
+import bisect
+import threading
+from array import array
+
+NEWLINE = re.compile(b"\n")
+
+
+class SessionLog:
+    """Append-only log of raw PTY output that can be sliced and searched via mmap
+
+    Three files are kept per session inside ``directory``:
+
+    - ``<session_id>.log``  raw output bytes, exactly as read from the PTY
+    - ``<session_id>.lidx`` one native uint64 per line: byte offset of the line start
+    - ``<session_id>.tidx`` one record per append: (timestamp, byte offset, line number)
+
+    Readers never load the whole log; they map the files and walk only the
+    ranges they need.
+    """
+
+    TIME_RECORD = struct.Struct("=dQQ")
+
+    def __init__(self, directory, session_id):
+        os.makedirs(directory, exist_ok=True)
+        self.session_id = session_id
+        self.data_path = os.path.join(directory, f"{session_id}.log")
+        self.line_index_path = os.path.join(directory, f"{session_id}.lidx")
+        self.time_index_path = os.path.join(directory, f"{session_id}.tidx")
+        self._lock = threading.Lock()
+        self._data = open(self.data_path, "ab", buffering=0)
+        self._line_index = open(self.line_index_path, "ab", buffering=0)
+        self._time_index = open(self.time_index_path, "ab", buffering=0)
+        self._size = os.fstat(self._data.fileno()).st_size
+        self._line_count = os.fstat(self._line_index.fileno()).st_size // 8
+        self._time_count = os.fstat(self._time_index.fileno()).st_size // self.TIME_RECORD.size
+        self._at_line_start = self._size == 0 or self._last_byte() == b"\n"
+
+    def _last_byte(self):
+        with open(self.data_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1)
+
+    @property
+    def size(self):
+        """Number of bytes written to the log"""
+        return self._size
+
+    @property
+    def line_count(self):
+        """Number of lines (including a trailing partial line) in the log"""
+        return self._line_count
+
+    def append(self, data, timestamp=None):
+        """Append a chunk of raw output and index the lines it starts"""
+        if not data:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            base = self._size
+            first_line = self._line_count if self._at_line_start else self._line_count - 1
+            starts = array("Q")
+            if self._at_line_start:
+                starts.append(base)
+            starts.extend(base + m.end() for m in NEWLINE.finditer(data))
+            self._at_line_start = data[-1:] == b"\n"
+            if self._at_line_start:
+                # The final newline does not start a line until more data arrives
+                starts.pop()
+            self._data.write(data)
+            self._time_index.write(self.TIME_RECORD.pack(timestamp, base, first_line))
+            if starts:
+                self._line_index.write(starts.tobytes())
+            self._size += len(data)
+            self._line_count += len(starts)
+            self._time_count += 1
+
+    def close(self):
+        """Close the underlying files"""
+        with self._lock:
+            for f in (self._data, self._line_index, self._time_index):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+    def _map(self, path, length):
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ)
+
+    def _snapshot(self):
+        with self._lock:
+            return self._size, self._line_count, self._time_count
+
+    def read_bytes(self, start, end=None):
+        """Return raw log bytes in ``[start, end)``"""
+        size, _, _ = self._snapshot()
+        end = size if end is None else min(end, size)
+        if start >= end:
+            return b""
+        data = self._map(self.data_path, size)
+        try:
+            return data[start:end]
+        finally:
+            data.close()
+
+    def lines(self, start, stop):
+        """Return lines ``start`` to ``stop`` (exclusive) as decoded strings"""
+        size, line_count, _ = self._snapshot()
+        start = max(0, start)
+        stop = min(stop, line_count)
+        if start >= stop:
+            return []
+        index = self._map(self.line_index_path, line_count * 8)
+        offsets = memoryview(index).cast("Q")
+        try:
+            begin = offsets[start]
+            end = offsets[stop] if stop < line_count else size
+        finally:
+            offsets.release()
+            index.close()
+        chunk = self.read_bytes(begin, end)
+        return [line.decode(errors="replace") for line in chunk.split(b"\n")[: stop - start]]
+
+    def search(self, pattern, limit=None):
+        """Yield ``(line_number, offset, line)`` for each regex match in the log
+
+        ``pattern`` may be a str, bytes or compiled bytes pattern. The log is
+        scanned through a memory map so only the touched pages are read.
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode()
+        if isinstance(pattern, bytes):
+            pattern = re.compile(pattern, re.MULTILINE)
+        size, line_count, _ = self._snapshot()
+        if size == 0:
+            return
+        data = self._map(self.data_path, size)
+        index = self._map(self.line_index_path, line_count * 8)
+        offsets = memoryview(index).cast("Q")
+        try:
+            found = 0
+            last_line = -1
+            for match in pattern.finditer(data):
+                line_number = bisect.bisect_right(offsets, match.start()) - 1
+                if line_number == last_line:
+                    continue
+                last_line = line_number
+                begin = offsets[line_number]
+                end = data.find(b"\n", begin)
+                line = data[begin : size if end == -1 else end]
+                yield line_number, match.start(), line.decode(errors="replace")
+                found += 1
+                if limit is not None and found >= limit:
+                    break
+        finally:
+            offsets.release()
+            index.close()
+            data.close()
+
+    def line_at_time(self, timestamp):
+        """Return the number of the first line written at or after ``timestamp``"""
+        _, line_count, time_count = self._snapshot()
+        if time_count == 0:
+            return 0
+        index = self._map(self.time_index_path, time_count * self.TIME_RECORD.size)
+        try:
+            lo, hi = 0, time_count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.TIME_RECORD.unpack_from(index, mid * self.TIME_RECORD.size)[0] < timestamp:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo == time_count:
+                return line_count
+            return self.TIME_RECORD.unpack_from(index, lo * self.TIME_RECORD.size)[2]
+        finally:
+            index.close()
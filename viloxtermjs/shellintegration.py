@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Shell Integration
+OSC 133 prompt/command marks for bash and an index of the commands they delimit
+"""
+import os
+import re
+import time
+import tempfile
+import threading
+from collections import deque
+from .ansi import strip_ansi
+
+# Sourced instead of ~/.bashrc through --rcfile. It loads the usual startup
+# files, then marks prompt start (A), input start (B), output start (C) and
+# command end with its exit status (D).
+BASH_RCFILE = r"""
+[ -f /etc/bash.bashrc ] && . /etc/bash.bashrc
+[ -f ~/.bashrc ] && . ~/.bashrc
+
+__viloxtermjs_precmd() {
+    local status=$?
+    printf '\033]133;D;%s\007\033]133;A\007' "$status"
+}
+__viloxtermjs_ps1() {
+    case "$PS1" in
+        *'133;B'*) ;;
+        *) PS1="$PS1"'\[\033]133;B\007\]' ;;
+    esac
+}
+PROMPT_COMMAND="__viloxtermjs_precmd;${PROMPT_COMMAND:+$PROMPT_COMMAND;}__viloxtermjs_ps1"
+PS0="$PS0"'\033]133;C\007'
+"""
+
+MARK = re.compile(rb"\x1b\]133;([A-D])(?:;([^\x07\x1b]*))?(?:\x07|\x1b\\)")
+MARK_PREFIX = b"\x1b]133;"
+# Marks longer than this are not real marks, so a partial one is not carried
+MAX_MARK = 64
+# Typed command lines are captured up to this many bytes
+MAX_COMMAND_BYTES = 4096
+
+
+def write_bash_rcfile():
+    """Write the bash integration script to a temporary file and return its path"""
+    fd, path = tempfile.mkstemp(prefix="viloxtermjs-", suffix=".bashrc")
+    with os.fdopen(fd, "w") as f:
+        f.write(BASH_RCFILE)
+    return path
+
+
+class CommandTracker:
+    """Builds an index of commands from the OSC 133 marks in a session's output
+
+    Each command is a dict with its ``index``, the ``command`` line as typed,
+    ``start`` and ``end`` times, ``duration``, ``exit_code`` and the
+    ``output_start``/``output_end`` byte offsets of its output in the
+    session's output stream. ``end``, ``duration``, ``exit_code`` and
+    ``output_end`` are None while the command is running.
+    """
+
+    def __init__(self, max_commands=10000):
+        self._commands = deque(maxlen=max_commands)
+        self._dropped = 0
+        self._current = None
+        self._input = None
+        self._carry = b""
+        self._lock = threading.Lock()
+
+    def feed(self, data, offset, timestamp=None):
+        """Scan a chunk of output that starts at byte ``offset`` of the stream"""
+        if self._carry:
+            offset -= len(self._carry)
+            data = self._carry + data
+            self._carry = b""
+        if MARK_PREFIX not in data:
+            if self._input is not None:
+                self._capture_input(data)
+            self._carry_partial_mark(data)
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        position = 0
+        for mark in MARK.finditer(data):
+            if self._input is not None:
+                self._capture_input(data[position:mark.start()])
+            self._handle_mark(mark.group(1), mark.group(2), offset + mark.start(),
+                              offset + mark.end(), timestamp)
+            position = mark.end()
+        if self._input is not None:
+            self._capture_input(data[position:])
+        self._carry_partial_mark(data)
+
+    def _carry_partial_mark(self, data):
+        start = data.rfind(b"\x1b", max(0, len(data) - MAX_MARK))
+        if start == -1:
+            return
+        tail = data[start:]
+        if MARK_PREFIX.startswith(tail[:len(MARK_PREFIX)]) and b"\x07" not in tail \
+                and not MARK.match(tail):
+            self._carry = tail
+            # The carried bytes are seen again with the next chunk
+            if self._input is not None:
+                del self._input[max(0, len(self._input) - len(tail)):]
+
+    def _capture_input(self, data):
+        room = MAX_COMMAND_BYTES - len(self._input)
+        if room > 0:
+            self._input += data[:room]
+
+    def _handle_mark(self, kind, argument, start, end, timestamp):
+        if kind == b"A":
+            # A new prompt without a D mark means the command's end was not reported
+            self._finish(None, start, timestamp)
+        elif kind == b"B":
+            self._input = bytearray()
+        elif kind == b"C":
+            self._finish(None, start, timestamp)
+            command = strip_ansi(bytes(self._input or b"")).decode("utf-8", "replace").strip()
+            self._input = None
+            with self._lock:
+                self._current = {
+                    "index": self._dropped + len(self._commands),
+                    "command": command,
+                    "start": timestamp,
+                    "end": None,
+                    "duration": None,
+                    "exit_code": None,
+                    "output_start": end,
+                    "output_end": None,
+                }
+                if len(self._commands) == self._commands.maxlen:
+                    self._dropped += 1
+                self._commands.append(self._current)
+        elif kind == b"D":
+            exit_code = int(argument) if argument and argument.lstrip(b"-").isdigit() else None
+            self._finish(exit_code, start, timestamp)
+
+    def _finish(self, exit_code, offset, timestamp):
+        with self._lock:
+            command, self._current = self._current, None
+            if command is None:
+                return
+            command["end"] = timestamp
+            command["duration"] = timestamp - command["start"]
+            command["exit_code"] = exit_code
+            command["output_end"] = offset
+
+    @property
+    def running(self):
+        """The command currently running, or None at the prompt"""
+        with self._lock:
+            return dict(self._current) if self._current else None
+
+    def commands(self, start=0, stop=None):
+        """Return copies of the commands with index ``start`` up to ``stop``"""
+        with self._lock:
+            first = self._dropped
+            commands = list(self._commands)
+        stop = first + len(commands) if stop is None else stop
+        return [dict(command) for command in commands[max(0, start - first):max(0, stop - first)]]
+
+    def get(self, index):
+        """Return a copy of command ``index``, or None if unknown or dropped"""
+        found = self.commands(index, index + 1)
+        return found[0] if found else None
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Output Streams
+Async iteration over a session's output for scripts and tests
+"""
+import asyncio
+
+
+class OutputStream:
+    """Async iterator over the output chunks of a TerminalServer
+
+    Chunks are handed from the reader thread to the event loop as they
+    arrive and queue up until consumed. Iteration ends when the child exits,
+    the server is stopped or the stream is closed.
+    """
+
+    def __init__(self, server):
+        self._server = server
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._closed = False
+        server.add_output_callback(self._on_output)
+        server.add_exit_callback(self._on_exit)
+        server._stop_callbacks.append(self._on_stop)
+
+    def _on_output(self, data):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, bytes(data))
+
+    def _on_exit(self, exit_code):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    def _on_stop(self):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    def close(self):
+        """Stop receiving output; iteration ends after what is already queued"""
+        if self._closed:
+            return
+        self._closed = True
+        self._server.remove_output_callback(self._on_output)
+        self._server.remove_exit_callback(self._on_exit)
+        if self._on_stop in self._server._stop_callbacks:
+            self._server._stop_callbacks.remove(self._on_stop)
+        self._queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self._queue.get()
+        if data is None:
+            self.close()
+            raise StopAsyncIteration
+        return data
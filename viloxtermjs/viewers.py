@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Session Viewers
+Fan-out of one PTY session's output to several clients, each with its own
+bounded queue so a slow client cannot hold up the others
+"""
+import time
+import logging
+import threading
+from collections import deque
+
+
+class Viewer:
+    """A client attached to a session
+
+    Output is pushed into a bounded queue by the PTY reader and drained by the
+    viewer's own sender task, which stops sending while more than
+    ``window_bytes`` are unacknowledged. When the queue overflows it is
+    discarded and the viewer is resynchronised with a snapshot of the session
+    instead of the bytes it missed.
+
+    With a ``collapse`` function, a flood - more than COLLAPSE_BYTES of
+    output within one ``frame_interval`` - is replaced by ``collapse(data)``
+    when that returns something shorter, e.g. only the lines still on
+    screen. While flooding the sender
+    waits ``frame_interval`` seconds after each batch, so floods reach the
+    client as a capped number of frames while interactive output is still
+    sent as soon as it arrives.
+
+    A suspended viewer, e.g. a terminal in a hidden tab, keeps queueing but
+    sends nothing until resumed, then catches up in one batch or, if the
+    queue overflowed meanwhile, with a snapshot.
+    """
+
+    COLLAPSE_BYTES = 64 * 1024
+
+    def __init__(self, sid, send, read_only=False, max_queued_bytes=1024 * 1024,
+                 window_bytes=512 * 1024, collapse=None, frame_interval=0):
+        self.sid = sid
+        self.read_only = read_only
+        self.max_queued_bytes = max_queued_bytes
+        self.window_bytes = window_bytes
+        self.collapse = collapse
+        self.frame_interval = frame_interval
+        self.dropped_bytes = 0
+        self.skipped_bytes = 0
+        self.suspended = False
+        self.closed = False
+        self._send = send
+        self._queue = deque()
+        self._queued_bytes = 0
+        self._unacked = 0
+        self._needs_snapshot = False
+        # Stream offset the last snapshot covered
+        self._synced_to = 0
+        self._collapse_at = self.COLLAPSE_BYTES
+        self._flooding = False
+        self._queue_collapsed = False
+        self._frame_due = False
+        self._rate_start = 0.0
+        self._rate_bytes = 0
+        self._cond = threading.Condition()
+
+    @property
+    def backlog(self):
+        """Bytes queued or sent but not yet acknowledged"""
+        return self._queued_bytes + self._unacked
+
+    def push(self, data, end=None):
+        """Queue output for this viewer; never blocks
+
+        ``end`` is the stream offset where ``data`` ends; output already in
+        the last snapshot is not queued again.
+        """
+        with self._cond:
+            if self.closed:
+                return
+            if end is not None and end <= self._synced_to:
+                return
+            if self._needs_snapshot:
+                self.dropped_bytes += len(data)
+                return
+            if self._queued_bytes + len(data) > self.max_queued_bytes:
+                self.dropped_bytes += self._queued_bytes + len(data)
+                self._queue.clear()
+                self._queued_bytes = 0
+                self._needs_snapshot = True
+                logging.debug(f"viewer {self.sid} fell behind, will resync from snapshot")
+            else:
+                self._queue.append(data)
+                self._queued_bytes += len(data)
+                if self.collapse:
+                    self._measure_rate(len(data))
+                    if self._queued_bytes > self._collapse_at:
+                        self._collapse_queue()
+            self._cond.notify()
+
+    def _measure_rate(self, nbytes):
+        now = time.monotonic()
+        elapsed = now - self._rate_start
+        if elapsed >= self.frame_interval:
+            # A flood carries on into the next interval, but not across a pause
+            self._flooding = (elapsed < 2 * self.frame_interval
+                              and self._rate_bytes > self.COLLAPSE_BYTES)
+            self._rate_start, self._rate_bytes = now, 0
+        self._rate_bytes += nbytes
+        if self._rate_bytes > self.COLLAPSE_BYTES:
+            self._flooding = True
+
+    def _collapse_queue(self):
+        self._queue_collapsed = True
+        data = self._collapsed(b"".join(self._queue))
+        self._queue = deque([data])
+        self._queued_bytes = len(data)
+        # Output that cannot be collapsed is not joined again until it doubles
+        self._collapse_at = max(self.COLLAPSE_BYTES, 2 * len(data))
+
+    def _collapsed(self, data):
+        collapsed = self.collapse(data)
+        if collapsed is None or len(collapsed) >= len(data):
+            return data
+        self.skipped_bytes += len(data) - len(collapsed)
+        return collapsed
+
+    def _batch(self, data):
+        """``data`` as the next batch, collapsed if it is part of a flood"""
+        flooding = self._flooding or self._queue_collapsed or len(data) > self.COLLAPSE_BYTES
+        self._queue_collapsed = False
+        self._collapse_at = self.COLLAPSE_BYTES
+        self._frame_due = bool(self.collapse) and flooding
+        return self._collapsed(data) if self._frame_due else data
+
+    def request_snapshot(self):
+        """Replace whatever is queued with a snapshot on the next send"""
+        with self._cond:
+            self._queue.clear()
+            self._queued_bytes = 0
+            self._needs_snapshot = True
+            self._cond.notify()
+
+    def suspend(self):
+        """Hold output back until resume()"""
+        with self._cond:
+            self.suspended = True
+
+    def resume(self):
+        """Send what was held back while suspended"""
+        with self._cond:
+            self.suspended = False
+            self._cond.notify()
+
+    def acknowledge(self, nbytes):
+        """Credit bytes the client reports as consumed"""
+        with self._cond:
+            self._unacked = max(0, self._unacked - nbytes)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._queue.clear()
+            self._queued_bytes = 0
+            self._cond.notify()
+
+    def _ready(self):
+        if self.closed:
+            return True
+        if self.suspended:
+            return False
+        if self.window_bytes and self._unacked >= self.window_bytes:
+            return False
+        return self._needs_snapshot or bool(self._queue)
+
+    def next_batch(self, snapshot, timeout=None):
+        """Wait for and return the next bytes to send, or None once closed"""
+        with self._cond:
+            if not self._cond.wait_for(self._ready, timeout):
+                return b""
+            if self.closed:
+                return None
+            if self._needs_snapshot:
+                self._needs_snapshot = False
+                data = snapshot()
+                if isinstance(data, tuple):
+                    data, self._synced_to = data
+                batch = self._batch(data)
+            else:
+                batch = self._batch(b"".join(self._queue))
+                self._queue.clear()
+                self._queued_bytes = 0
+            self._unacked += len(batch)
+            return batch
+
+    def _wait_for_next_frame(self):
+        """Pace the sender while flooding; returns False once closed"""
+        with self._cond:
+            frame_due, self._frame_due = self._frame_due, False
+            if frame_due and self.frame_interval:
+                self._cond.wait_for(lambda: self.closed, self.frame_interval)
+            return not self.closed
+
+    def run(self, snapshot):
+        """Sender loop; run in the viewer's own background task"""
+        while True:
+            batch = self.next_batch(snapshot)
+            if batch is None:
+                break
+            if batch:
+                self._send(batch)
+            if not self._wait_for_next_frame():
+                break
+
+
+class ViewerSet:
+    """The viewers attached to one session"""
+
+    def __init__(self):
+        self._viewers = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._viewers)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._viewers.values()))
+
+    def get(self, sid):
+        return self._viewers.get(sid)
+
+    def add(self, viewer):
+        with self._lock:
+            self._viewers[viewer.sid] = viewer
+
+    def remove(self, sid):
+        with self._lock:
+            viewer = self._viewers.pop(sid, None)
+        if viewer:
+            viewer.close()
+        return viewer
+
+    def push(self, data, end=None):
+        for viewer in self:
+            viewer.push(data, end)
+
+    def owner_backlog(self):
+        """Largest backlog among viewers that can type into the session
+
+        Suspended viewers do not count: their queue overflows into a
+        snapshot rather than holding the session's output back.
+        """
+        return max((viewer.backlog for viewer in self
+                    if not viewer.read_only and not viewer.suspended), default=0)
+
+    def close(self):
+        with self._lock:
+            viewers, self._viewers = list(self._viewers.values()), {}
+        for viewer in viewers:
+            viewer.close()
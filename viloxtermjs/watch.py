@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Output Watches
+Calls back when a session's output matches watched patterns, matching on a
+worker thread so the PTY reader never waits for it
+"""
+import re
+import queue
+import logging
+import threading
+import itertools
+from .ansi import AnsiStripper
+
+
+class PatternWatcher:
+    """Matches a stream of raw output against a set of regular expressions
+
+    Each pattern is searched on its own over the ANSI-stripped output, so
+    overlapping patterns all fire; when no pattern has groups, one combined
+    alternation first skips chunks that nothing matches. The last
+    ``overlap`` bytes of each chunk are searched again with the next one, so
+    a match split across chunks is still found as long as it is shorter than
+    ``overlap``, and matches are reported once by their offset in the stream.
+
+    Output is handed over through a bounded queue; when the worker falls
+    behind, chunks are dropped (and counted in ``dropped_chunks``) rather
+    than slowing the caller down.
+    """
+
+    def __init__(self, max_queued_chunks=256, overlap=1024):
+        self.overlap = overlap
+        self.dropped_chunks = 0
+        self._queue = queue.Queue(max_queued_chunks)
+        self._watches = {}
+        self._combined = None
+        # Stream offset where each watch's last reported match ended
+        self._reported = {}
+        self._offset = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stripper = AnsiStripper()
+        self._carry = b""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def watch(self, pattern, callback, flags=0):
+        """Call ``callback(match)`` on the watcher thread for every match of ``pattern``
+
+        ``pattern`` is a str or bytes regular expression, matched against the
+        output with escape sequences removed; ``match`` is the ``re.Match``
+        of that pattern against bytes. Returns a handle for unwatch().
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode()
+        compiled = re.compile(pattern, flags)
+        with self._lock:
+            handle = next(self._ids)
+            watches = dict(self._watches)
+            watches[handle] = (compiled, callback)
+            self._combined = self._combine(watches)
+            self._watches = watches
+        return handle
+
+    def unwatch(self, handle):
+        """Stop a watch; returns False if it was not active"""
+        with self._lock:
+            if self._watches.pop(handle, None) is None:
+                return False
+            self._reported.pop(handle, None)
+            self._combined = self._combine(self._watches)
+        return True
+
+    @classmethod
+    def _combine(cls, watches):
+        """The prefilter for ``watches``, or None to match every pattern on its own"""
+        # Only a prefilter: groups would be renumbered inside the alternation,
+        # breaking numbered backreferences, so patterns with groups go without
+        patterns = [compiled for compiled, _ in watches.values()]
+        if not patterns or any(compiled.groups for compiled in patterns):
+            return None
+        # Inline flags keep each pattern's own flags inside the alternation
+        try:
+            return re.compile(b"|".join(b"(?:%s)" % cls._scoped(compiled) for compiled in patterns))
+        except re.error:
+            # e.g. a leading (?i), which is only allowed at the start of a whole pattern
+            return None
+
+    @staticmethod
+    def _scoped(compiled):
+        flags = "".join(letter for flag, letter in ((re.IGNORECASE, "i"), (re.MULTILINE, "m"),
+                                                    (re.DOTALL, "s"), (re.VERBOSE, "x"))
+                        if compiled.flags & flag)
+        return b"(?%s:%s)" % (flags.encode(), compiled.pattern) if flags else compiled.pattern
+
+    def feed(self, data):
+        """Queue a chunk of raw output for matching; never blocks"""
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dropped_chunks += 1
+
+    def close(self, timeout=1.0):
+        """Stop the worker thread after it has matched what is already queued"""
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            try:
+                self._match(self._stripper.feed(data))
+            except Exception:
+                logging.exception("output watch failed")
+
+    def _match(self, text):
+        with self._lock:
+            combined = self._combined
+            watches = dict(self._watches)
+        if not watches or not text:
+            self._offset += len(text)
+            self._carry = b""
+            return
+        window = self._carry + text
+        seen = len(self._carry)
+        base = self._offset - seen
+        self._offset += len(text)
+        self._carry = window[-self.overlap:]
+        if combined is not None and not combined.search(window):
+            return
+        hits = []
+        for handle, (compiled, callback) in watches.items():
+            reported = self._reported.get(handle, 0)
+            for match in compiled.finditer(window):
+                # Matches ending inside the carried tail, or starting inside
+                # one already reported, were seen last time
+                if match.end() <= seen or base + match.start() < reported:
+                    continue
+                reported = base + match.end()
+                hits.append((match.start(), handle, match, callback))
+            self._reported[handle] = reported
+        hits.sort(key=lambda hit: hit[:2])
+        for _, _, match, callback in hits:
+            try:
+                callback(match)
+            except Exception:
+                logging.exception("output watch callback failed")
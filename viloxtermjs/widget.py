@@ -3,11 +3,11 @@
 Qt/PySide6 Terminal Widget
 Encapsulates the pyxterm.js web components in QWebEngineView
 """
-from PySide6.QtCore import QUrl, Signal, QThread, Qt
-from PySide6.QtWidgets import QWidget, QVBoxLayout
+from PySide6.QtCore import QUrl, Signal, Qt, QStandardPaths
+from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from .server import TerminalServer
-import time
+import json
 import logging
 
 class TerminalWidget(QWidget):
@@ -15,15 +15,32 @@ class TerminalWidget(QWidget):
     
     # Signal emitted when terminal is closed
     terminal_closed = Signal()
+    # Signal emitted with the exit code when the terminal's process exits on its own
+    terminal_exited = Signal(int)
+    # Carries the exit code from the server's reader thread to the GUI thread
+    _child_exited = Signal(object)
     
-    def __init__(self, command='bash', cmd_args='', parent=None):
+    def __init__(self, command='bash', cmd_args='', parent=None, session_pool=None,
+                 **server_options):
+        """Extra keyword arguments are passed on to TerminalServer,
+        e.g. ``TerminalWidget(renderer='webgl')``. With ``session_pool`` the
+        server runs in one of the pool's worker processes."""
         super().__init__(parent)
         self.command = command
         self.cmd_args = cmd_args
+        self.session_pool = session_pool
+        self.server_options = server_options
         self.terminal_server = None
         self.web_view = None
+        self._focused = False
+        self._child_exited.connect(self._on_child_exited, Qt.QueuedConnection)
         self._setup_ui()
         self._start_terminal_server()
+        # Keyboard focus is on the web view's internals, not on this widget
+        QApplication.instance().focusChanged.connect(self._on_focus_changed)
+        if server_options.get('file_transfer'):
+            # QtWebEngine drops downloads that nobody accepts
+            self.web_view.page().profile().downloadRequested.connect(self._on_download_requested)
         
     def _setup_ui(self):
         """Setup the UI with QWebEngineView"""
@@ -38,18 +55,24 @@ class TerminalWidget(QWidget):
         """Start the terminal server and load the terminal in web view"""
         try:
             # Create and start terminal server with random port
-            self.terminal_server = TerminalServer(
+            server_factory = (self.session_pool.create_session if self.session_pool
+                              else TerminalServer)
+            self.terminal_server = server_factory(
                 port=0,  # Use random available port
                 host='127.0.0.1',
                 command=self.command,
-                cmd_args=self.cmd_args
+                cmd_args=self.cmd_args,
+                **self.server_options
             )
             
+            # Sessions in a SessionPool worker cannot call back into this process
+            if hasattr(self.terminal_server, 'add_exit_callback'):
+                self.terminal_server.add_exit_callback(self._child_exited.emit)
+            
             # Start server in background
             actual_port = self.terminal_server.start()
-            
-            # Give server a moment to fully start
-            QThread.msleep(500)
+            # Output is held back until the widget is first shown
+            self._notify_session('set_visible', self.isVisible())
             
             # Load terminal URL in web view
             terminal_url = f"http://127.0.0.1:{actual_port}"
@@ -69,6 +92,13 @@ class TerminalWidget(QWidget):
         error_label.setStyleSheet("QLabel { color: red; padding: 10px; }")
         self.layout().addWidget(error_label)
         
+    def _on_child_exited(self, exit_code):
+        """Close the terminal once its process has exited"""
+        if self.terminal_server is None:
+            return
+        self.terminal_exited.emit(-1 if exit_code is None else exit_code)
+        self.close_terminal()
+        
     def close_terminal(self):
         """Close the terminal and cleanup"""
         if self.terminal_server:
@@ -76,11 +106,66 @@ class TerminalWidget(QWidget):
             self.terminal_server = None
         self.terminal_closed.emit()
         
+    def detach_terminal(self):
+        """Release the terminal but leave a daemon-owned session running
+
+        Used when the application quits but wants to reattach to its shells
+        on the next start; without a session daemon this is close_terminal().
+        """
+        if self.terminal_server:
+            detach = getattr(self.terminal_server, 'detach', self.terminal_server.stop)
+            detach()
+            self.terminal_server = None
+        self.terminal_closed.emit()
+        
     def closeEvent(self, event):
         """Handle widget close event"""
         self.close_terminal()
         super().closeEvent(event)
         
+    def showEvent(self, event):
+        """Resume output once the terminal is on screen"""
+        self._notify_session('set_visible', True)
+        super().showEvent(event)
+        
+    def hideEvent(self, event):
+        """Hold output back while the terminal is hidden, e.g. in a background tab"""
+        self._notify_session('set_visible', False)
+        super().hideEvent(event)
+        
+    def _on_focus_changed(self, old, new):
+        """Tell the session when keyboard focus enters or leaves the terminal"""
+        focused = new is not None and (new is self or self.isAncestorOf(new))
+        if focused != self._focused:
+            self._focused = focused
+            self._notify_session('set_focused', focused)
+        
+    def _on_download_requested(self, download):
+        """Save files downloaded from this terminal to the Downloads folder"""
+        if download.page() is not self.web_view.page():
+            return
+        download.setDownloadDirectory(
+            QStandardPaths.writableLocation(QStandardPaths.DownloadLocation))
+        download.accept()
+        logging.info(f"Downloading {download.downloadFileName()} to {download.downloadDirectory()}")
+        
+    def download_file(self, name):
+        """Download ``name``, relative to the shell's directory, into the Downloads folder"""
+        self.web_view.page().runJavaScript(f"downloadFile({json.dumps(name)})")
+        
+    def _notify_session(self, name, value):
+        """Pass a change in visibility or focus on to the session"""
+        if self.terminal_server is None:
+            return
+        try:
+            if hasattr(self.terminal_server, name):
+                getattr(self.terminal_server, name)(value)
+            else:
+                # Sessions in a SessionPool worker
+                self.terminal_server.call(name, value)
+        except Exception as e:
+            logging.debug(f"Could not {name.replace('_', ' ')} on the terminal: {e}")
+        
     def get_command(self):
         """Get the command being run in this terminal"""
         return self.command
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Raw WebSocket Protocol
+A minimal framed alternative to socket.io for the terminal page: every
+binary WebSocket message is one opcode byte followed by its payload
+"""
+import json
+import struct
+
+# Page to server
+INPUT = 0x00            # UTF-8 keystrokes
+RESIZE = 0x01           # rows, cols as big-endian uint16
+ACK = 0x02              # bytes consumed as big-endian uint32
+CALL = 0x03             # JSON {"id", "name", "args"} for search and commands
+
+# Server to page
+OUTPUT = 0x10           # raw PTY output
+OUTPUT_DEFLATE = 0x11   # uncompressed size as big-endian uint32, then deflate data
+EXIT = 0x12             # JSON exit code, null if unknown
+RESULT = 0x13           # JSON {"id", "result"} answering a CALL
+
+TRANSPORTS = ('socketio', 'websocket')
+
+
+def encode_output(payload):
+    """Frame an OutputEncoder payload"""
+    if "z" in payload:
+        return bytes([OUTPUT_DEFLATE]) + struct.pack(">I", payload["n"]) + payload["z"]
+    return bytes([OUTPUT]) + payload["output"]
+
+
+def encode_exit(code):
+    return bytes([EXIT]) + json.dumps(code).encode()
+
+
+def encode_result(call_id, result):
+    return bytes([RESULT]) + json.dumps({"id": call_id, "result": result}).encode()
+
+
+def decode(message):
+    """Split a message from the page into its opcode and decoded payload
+
+    Returns (INPUT, str), (RESIZE, (rows, cols)), (ACK, nbytes) or
+    (CALL, dict). Raises ValueError for anything else.
+    """
+    if not isinstance(message, (bytes, bytearray)) or not message:
+        raise ValueError("expected a binary message")
+    opcode, payload = message[0], bytes(message[1:])
+    try:
+        if opcode == INPUT:
+            return opcode, payload.decode("utf-8", "replace")
+        if opcode == RESIZE:
+            return opcode, struct.unpack(">HH", payload)
+        if opcode == ACK:
+            return opcode, struct.unpack(">I", payload)[0]
+        if opcode == CALL:
+            call = json.loads(payload)
+            if not isinstance(call, dict):
+                raise ValueError(f"malformed message with opcode {opcode:#x}: not an object")
+            return opcode, call
+    except (struct.error, json.JSONDecodeError) as e:
+        raise ValueError(f"malformed message with opcode {opcode:#x}: {e}") from None
+    raise ValueError(f"unknown opcode {opcode:#x}")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Zygote Spawner
+A small single-threaded helper process that forks PTY sessions on behalf of
+the application, so the application never forks its own large,
+multithreaded address space
+
+Every spawn is one connection: the client sends a JSON line and gets a JSON
+line back with the PTY master attached via SCM_RIGHTS. The connection stays
+open and carries one more line, the exit code, once the child has exited.
+The zygote exits when its stdin, a pipe from the application, is closed.
+
+Usage:
+    python -m viloxtermjs.zygote --socket PATH
+"""
+import os
+import sys
+import pty
+import json
+import fcntl
+import shutil
+import signal
+import socket
+import struct
+import termios
+import logging
+import argparse
+import tempfile
+import threading
+import selectors
+import subprocess
+
+
+def _set_winsize(fd, rows, cols):
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+
+
+class Zygote:
+    """Forks PTY sessions for clients connecting to a Unix domain socket"""
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.running = False
+        self._children = {}
+        self._selector = selectors.DefaultSelector()
+        self._listener = None
+        self._wakeup = None
+
+    def listen(self):
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._listener.listen(64)
+        self._selector.register(self._listener, selectors.EVENT_READ, "listen")
+        # SIGCHLD wakes the selector so exit codes are passed on at once
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self._wakeup[1])
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ, "child")
+        self._selector.register(sys.stdin, selectors.EVENT_READ, "parent")
+
+    def serve_forever(self):
+        if self._listener is None:
+            self.listen()
+        self.running = True
+        try:
+            while self.running:
+                for key, _ in self._selector.select():
+                    if key.data == "listen":
+                        self._spawn()
+                    elif key.data == "child":
+                        os.read(self._wakeup[0], 4096)
+                        self._reap_children()
+                    elif not os.read(sys.stdin.fileno(), 4096):
+                        # The application went away
+                        self.running = False
+        finally:
+            self.close()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        for conn in self._children.values():
+            conn.close()
+        self._children.clear()
+
+    def _spawn(self):
+        conn, _ = self._listener.accept()
+        try:
+            line = bytearray()
+            while not line.endswith(b"\n"):
+                data = conn.recv(4096)
+                if not data:
+                    raise ConnectionError("client closed the connection")
+                line += data
+            request = json.loads(line)
+            pid, fd = self._fork(request["argv"], request.get("rows", 24), request.get("cols", 80),
+                                 request.get("env"), request.get("cwd"))
+        except Exception as e:
+            logging.exception("zygote spawn failed")
+            try:
+                conn.sendall(json.dumps({"ok": False, "error": str(e)}).encode() + b"\n")
+            except OSError:
+                pass
+            conn.close()
+            return
+        try:
+            socket.send_fds(conn, [json.dumps({"ok": True, "pid": pid}).encode() + b"\n"], [fd])
+        except OSError:
+            logging.info(f"client went away before receiving pid {pid}")
+        finally:
+            os.close(fd)
+        # Reaped in the main loop only, so the child cannot be missed here
+        self._children[pid] = conn
+
+    def _fork(self, argv, rows, cols, env, cwd):
+        pid, fd = pty.fork()
+        if pid == 0:
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                os.execvpe(argv[0], argv, env if env is not None else os.environ)
+            except OSError as e:
+                sys.stderr.write(f"{argv[0]}: {e.strerror}\r\n")
+            os._exit(127)
+        _set_winsize(fd, rows, cols)
+        return pid, fd
+
+    def _reap_children(self):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            conn = self._children.pop(pid, None)
+            if conn is None:
+                continue
+            try:
+                exit_code = os.waitstatus_to_exitcode(status)
+                conn.sendall(json.dumps({"exit_code": exit_code}).encode() + b"\n")
+            except OSError:
+                pass
+            conn.close()
+
+
+class ZygoteChild:
+    """A session forked by the zygote: its pid, PTY master and exit status"""
+
+    def __init__(self, sock, pid, fd, received=b""):
+        self.pid = pid
+        self.fd = fd
+        self.exited = False
+        self.exit_code = None
+        self._sock = sock
+        self._buffer = bytearray(received)
+
+    def wait(self, timeout=None):
+        """Wait up to ``timeout`` seconds (None: forever) and return whether the child exited"""
+        if self.exited:
+            return True
+        self._sock.settimeout(timeout)
+        try:
+            while not self._buffer.endswith(b"\n"):
+                data = self._sock.recv(4096)
+                if not data:
+                    # The zygote is gone; the exit code is lost with it
+                    break
+                self._buffer += data
+        except (TimeoutError, BlockingIOError):
+            return False
+        if self._buffer:
+            self.exit_code = json.loads(self._buffer).get("exit_code")
+        self.exited = True
+        self.close()
+        return True
+
+    def close(self):
+        """Stop listening for the exit status; the PTY master is not closed"""
+        self._sock.close()
+
+
+class ZygoteClient:
+    """Starts a zygote process and asks it for new PTY sessions
+
+    Start it early, while the application is still small; the zygote is a
+    fresh interpreter either way, but starting it is a fork of the caller.
+    It exits by itself when the application does.
+    """
+
+    def __init__(self):
+        self._directory = tempfile.mkdtemp(prefix="viloxtermjs-zygote-")
+        self.socket_path = os.path.join(self._directory, "zygote.sock")
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "viloxtermjs.zygote", "--socket", self.socket_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, close_fds=True,
+            start_new_session=True)
+        # Printed once the socket is listening
+        if self._process.stdout.readline() != b"ready\n":
+            self.close()
+            raise RuntimeError("zygote failed to start")
+
+    @property
+    def pid(self):
+        return self._process.pid
+
+    def spawn(self, argv, rows=24, cols=80, env=None, cwd=None):
+        """Start ``argv`` on a new PTY and return a ZygoteChild owning its master fd"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            sock.sendall(json.dumps({"argv": list(argv), "rows": rows, "cols": cols,
+                                     "env": env, "cwd": cwd}).encode() + b"\n")
+            data, fds, _, _ = socket.recv_fds(sock, 4096, 1)
+            line, newline, rest = data.partition(b"\n")
+            if not newline:
+                raise ConnectionError("zygote closed the connection")
+            response = json.loads(line)
+            if not response["ok"]:
+                raise RuntimeError(response.get("error", "zygote spawn failed"))
+        except Exception:
+            sock.close()
+            raise
+        # A child that exits at once may have its exit line read along with the reply
+        return ZygoteChild(sock, response["pid"], fds[0], rest)
+
+    def close(self):
+        """Let the zygote exit; sessions it started keep running"""
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait(5)
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_zygote():
+    """The zygote shared by every TerminalServer(zygote=True), started on first use"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = ZygoteClient()
+        return _default_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viloxtermjs zygote spawner")
+    parser.add_argument("--socket", required=True, help="Unix socket path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    zygote = Zygote(args.socket)
+    zygote.listen()
+    sys.stdout.write("ready\n")
+    sys.stdout.flush()
+    zygote.serve_forever()
+
+
+if __name__ == "__main__":
+    main()